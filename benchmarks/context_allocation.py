@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""Benchmark for the per-request cost of the plugin Context.
+
+Compares the original dict-based Context (reproduced below as DictContext)
+with the slotted Context, both freshly created for every request and reused
+through the per-thread free list (``pool_contexts=True``).
+
+For every variant, the script reports the number of memory blocks that are
+allocated for the context during a single request and the time spent on
+creating the context and on the property access of a typical request.
+
+Run it from the root directory of the Flask-Micron project::
+
+    $ python benchmarks/context_allocation.py
+"""
+
+from __future__ import print_function
+import sys
+import timeit
+from flask_micron import plugin
+
+
+class DictContext(object):
+    """The Context implementation from before the switch to slots."""
+
+    @property
+    def function(self):
+        return self._data.get('function', None)
+    @function.setter
+    def function(self, value):
+        self._data['function'] = value
+
+    @property
+    def config(self):
+        return self._data.get('config', None)
+    @config.setter
+    def config(self, value):
+        self._data['config'] = value
+
+    @property
+    def input(self):
+        return self._data.get('input', None)
+    @input.setter
+    def input(self, value):
+        self._data['input'] = value
+
+    @property
+    def output(self):
+        return self._data.get('output', None)
+    @output.setter
+    def output(self, value):
+        self._data['output'] = value
+
+    @property
+    def error(self):
+        return self._data.get('error', None)
+    @error.setter
+    def error(self, value):
+        self._data['error'] = value
+
+    @property
+    def response(self):
+        return self._data.get('response', None)
+    @response.setter
+    def response(self, value):
+        self._data['response'] = value
+
+    def __init__(self):
+        self._data = {}
+
+    def is_assigned(self, property_name):
+        return property_name in self._data
+
+
+CONFIG = {'normalize': True}
+INPUT = {'name': 'John Doe'}
+OUTPUT = 'Hello, John Doe'
+RESPONSE = object()
+
+
+def _handle_request(ctx):
+    """Mimics the context use of a request through the default plugins."""
+    ctx.config = CONFIG
+    ctx.function = _handle_request
+    ctx.input = INPUT
+    ctx.config.get('normalize', True)
+    ctx.input = ctx.input
+    ctx.output = ctx.input['name']
+    ctx.output = OUTPUT
+    ctx.response = RESPONSE if ctx.error is None else None
+    return ctx.response
+
+
+def _no_release(ctx):
+    pass
+
+
+def _release(ctx):
+    ctx.release()
+
+
+VARIANTS = (
+    ("dict-based Context", DictContext, _no_release),
+    ("slotted Context", plugin.Context, _no_release),
+    ("pooled slotted Context", plugin.Context.acquire, _release),
+)
+
+
+def _request(create_context, release_context):
+    ctx = create_context()
+    response = _handle_request(ctx)
+    release_context(ctx)
+    return response
+
+
+def _count_allocated_blocks(create_context, release_context, number=1000):
+    """Returns the average number of memory blocks that are allocated
+    for the context during a request."""
+    _request(create_context, release_context)
+    total = 0
+    for _ in range(number):
+        before = sys.getallocatedblocks()
+        ctx = create_context()
+        _handle_request(ctx)
+        total += sys.getallocatedblocks() - before
+        release_context(ctx)
+        del ctx
+    return float(total) / number
+
+
+def main():
+    number = 200000
+    print("%-24s %16s %16s" % ("", "blocks/request", "usec/request"))
+    for name, create_context, release_context in VARIANTS:
+        blocks = _count_allocated_blocks(create_context, release_context)
+        seconds = min(timeit.repeat(
+            lambda: _request(create_context, release_context),
+            number=number, repeat=5))
+        print("%-24s %16.1f %16.3f" % (
+            name, blocks, seconds / number * 1000000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Benchmark for serializing dataclass output.
+
+Compares serializing a list of nested dataclass instances using:
+
+* ``dataclasses.asdict()`` before serialization, which deep copies
+  the data
+* the original encoder, which called ``dataclasses.fields()`` for every
+  value (reproduced below as ``_encode_dataclass``)
+* the encoder that is compiled once per class by the EncoderRegistry
+
+Run it from the root directory of the Flask-Micron project::
+
+    $ python benchmarks/dataclass_encoding.py
+"""
+
+from __future__ import print_function
+import dataclasses
+import json
+import timeit
+from typing import List
+from flask_micron.encoder import EncoderRegistry
+
+
+@dataclasses.dataclass
+class Owner(object):
+    id: int
+    name: str
+
+
+@dataclasses.dataclass
+class Record(object):
+    id: int
+    name: str
+    email: str
+    price: float
+    active: bool
+    tags: List[str]
+    owner: Owner
+
+
+def _encode_dataclass(value):
+    return {
+        field.name: getattr(value, field.name)
+        for field in dataclasses.fields(value)}
+
+
+def _create_record(number):
+    return Record(
+        number, 'Record number %d' % number, 'user%d@example.com' % number,
+        number * 1.25, number % 2 == 0, ['alpha', 'beta'],
+        Owner(number % 17, 'Owner'))
+
+
+RECORDS = [_create_record(n) for n in range(50000)]
+
+VARIANTS = (
+    ("dataclasses.asdict()",
+     lambda: json.dumps([dataclasses.asdict(r) for r in RECORDS])),
+    ("before: fields() per value",
+     lambda: json.dumps(RECORDS, default=_encode_dataclass)),
+    ("compiled per class",
+     lambda: json.dumps(RECORDS, default=EncoderRegistry().encode)),
+)
+
+
+def main():
+    print("%d records" % len(RECORDS))
+    for name, serialize in VARIANTS:
+        print("  %-28s %10.1f msec" % (
+            name, min(timeit.repeat(serialize, number=1, repeat=5)) * 1000))
+
+
+if __name__ == "__main__":
+    main()
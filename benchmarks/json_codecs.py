@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Benchmark for the JSON codecs.
+
+Compares the way in which JSON data were handled before the codec registry
+(reproduced below as ``_flask_loads`` and ``_flask_dumps``: decoding and
+stripping the POST body, followed by ``flask.json``, pretty printing the
+output and using an isinstance chain for serializing other types) with
+every codec that is available in this Python environment (using compact
+output and the encoder registry).
+
+For every payload, the script reports the time that is spent on
+deserializing the POST body (bytes, as read from the request), the time
+that is spent on serializing the output (into bytes, as sent in the
+response) and the size of the serialized output.
+
+Run it from the root directory of the Flask-Micron project::
+
+    $ python benchmarks/json_codecs.py
+"""
+
+from __future__ import print_function
+from datetime import datetime
+from datetime import timedelta
+import timeit
+from flask import json
+from flask_micron.codec import CodecRegistry
+from flask_micron.encoder import EncoderRegistry
+
+
+def _create_record(number):
+    return {
+        'id': number,
+        'name': u'Record number %d' % number,
+        'price': number * 1.25,
+        'active': number % 2 == 0,
+        'tags': ['alpha', 'beta', u'gämma'],
+        'created': datetime(2016, 1, 1, 12, number % 60),
+        'owner': {'id': number % 17, 'email': 'user%d@example.com' % number}
+    }
+
+
+PAYLOADS = (
+    ("small", {'who': 'World'}, 20000),
+    ("1000 records", [_create_record(n) for n in range(1000)], 20),
+    ("100000 records", [_create_record(n) for n in range(100000)], 1),
+)
+
+
+def _flask_loads(body):
+    body = body.decode('utf-8')
+    if body.strip() == "":
+        return None
+    return json.loads(body)
+
+
+def _flask_dumps(value):
+    return json.dumps(value, indent=2, default=_serializer_hook) \
+        .encode('utf-8')
+
+
+def _serializer_hook(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    if isinstance(value, str):
+        return value
+    raise TypeError(type(value).__name__)
+
+
+def _codec_variants():
+    yield "before: flask.json", _flask_loads, _flask_dumps
+    registry = CodecRegistry()
+    encode = EncoderRegistry().encode
+    for name in registry.names:
+        codec = registry.get(name)
+        yield (
+            name,
+            codec.loads,
+            lambda value, codec=codec: codec.dumps(value, encode))
+
+
+def _time(function, number):
+    return min(timeit.repeat(function, number=number, repeat=3)) / number
+
+
+def main():
+    for payload_name, payload, number in PAYLOADS:
+        body = _flask_dumps(payload)
+        print("%s (%d bytes)" % (payload_name, len(body)))
+        print("  %-20s %16s %16s %16s" % (
+            "", "loads usec", "dumps usec", "dumps bytes"))
+        for name, loads, dumps in _codec_variants():
+            loads_time = _time(lambda: loads(body), number)
+            dumps_time = _time(lambda: dumps(payload), number)
+            print("  %-20s %16.1f %16.1f %16d" % (
+                name, loads_time * 1000000, dumps_time * 1000000,
+                len(dumps(payload))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Benchmark for the input normalization.
+
+Compares the original recursive normalization, which rebuilt every dict
+and list (reproduced below as ``_recursive_normalize``, including the
+original ``is_string`` that redefined its implementation on every call),
+with the iterative, in-place normalization.
+
+Additionally, for the JSON payloads, decoding followed by normalization
+is compared with normalization while decoding (the
+``normalize_while_decoding`` option), for every available codec that
+supports it.
+
+The payloads are JSON documents of about 10 MB, plus a deeply nested
+structure. Since the normalization modifies its input, the payload is
+deserialized again before every run. Only the normalization itself
+is timed.
+
+Run it from the root directory of the Flask-Micron project::
+
+    $ python benchmarks/normalization.py
+"""
+
+from __future__ import print_function
+import json
+import timeit
+from flask_micron.codec import CodecRegistry
+from flask_micron.plugins.normalize_input import _normalize
+from flask_micron.plugins.normalize_input import create_decoding_normalizer
+
+
+def _is_string(value):
+    try:
+        basestring
+        def is_string(value):
+            return isinstance(value, basestring)
+    except NameError:
+        def is_string(value):
+            return isinstance(value, (str, bytes))
+    return is_string(value)
+
+
+def _recursive_normalize(data, strip_strings, make_empty_none):
+    if not strip_strings and not make_empty_none:
+        return data
+
+    if data is None:
+        return data
+
+    if _is_string(data):
+        if strip_strings:
+            data = data.strip()
+        if make_empty_none:
+            data = None if data == "" else data
+
+    elif isinstance(data, dict):
+        data = dict([
+            (k, _recursive_normalize(data[k], strip_strings, make_empty_none))
+            for k in data.keys()
+        ])
+
+    elif isinstance(data, list):
+        data = [
+            _recursive_normalize(v, strip_strings, make_empty_none)
+            for v in data
+        ]
+
+    return data
+
+
+def _create_record(number):
+    return {
+        'id': number,
+        'name': u' Record number %d ' % number,
+        'email': 'user%d@example.com' % number,
+        'comment': '' if number % 3 else '  Some comment  ',
+        'price': number * 1.25,
+        'active': number % 2 == 0,
+        'tags': [' alpha', 'beta ', u'gämma', ''],
+        'owner': {'id': number % 17, 'name': '  Owner  '}
+    }
+
+
+def _create_deep(depth):
+    data = inner = []
+    for _ in range(depth):
+        nested = [' value ']
+        inner.append(nested)
+        inner = nested
+    return data
+
+
+_RECORDS = json.dumps([_create_record(n) for n in range(45000)])
+
+_STRINGS = json.dumps([u' string %d ' % n for n in range(700000)])
+
+JSON_PAYLOADS = (
+    ("records (%d bytes)" % len(_RECORDS), _RECORDS),
+    ("strings (%d bytes)" % len(_STRINGS), _STRINGS),
+)
+
+PAYLOADS = (
+    ("records (%d bytes)" % len(_RECORDS), lambda: json.loads(_RECORDS)),
+    ("strings (%d bytes)" % len(_STRINGS), lambda: json.loads(_STRINGS)),
+    ("nested lists (depth 100000)", lambda: _create_deep(100000)),
+)
+
+VARIANTS = (
+    ("before: recursive", _recursive_normalize),
+    ("iterative, in place", _normalize),
+)
+
+
+def _time(normalize, create_data):
+    timings = []
+    for _ in range(3):
+        data = create_data()
+        timings.append(timeit.timeit(
+            lambda: normalize(data, True, True), number=1))
+    return min(timings)
+
+
+def main():
+    for payload_name, create_data in PAYLOADS:
+        print(payload_name)
+        for name, normalize in VARIANTS:
+            try:
+                print("  %-20s %10.1f msec" % (
+                    name, _time(normalize, create_data) * 1000))
+            except RuntimeError:
+                # The recursion limit was exceeded.
+                print("  %-20s %15s" % (name, "RecursionError"))
+    for payload_name, body in JSON_PAYLOADS:
+        print("decode + normalize, %s" % payload_name)
+        for name, decode in _decoding_variants():
+            print("  %-30s %10.1f msec" % (
+                name, min(timeit.repeat(
+                    lambda: decode(body), number=1, repeat=3)) * 1000))
+
+
+def _decoding_variants():
+    registry = CodecRegistry()
+    for name in registry.names:
+        codec = registry.get(name)
+        yield (
+            "%s, two passes" % name,
+            lambda body, codec=codec: _normalize(codec.loads(body), True, True))
+        if codec.supports_object_hook:
+            yield (
+                "%s, while decoding" % name,
+                lambda body, codec=codec: _decode_normalized(codec, body))
+
+
+def _decode_normalized(codec, body):
+    (object_hook, finish) = create_decoding_normalizer({})
+    return finish(codec.loads(body, object_hook))
+
+
+if __name__ == "__main__":
+    main()
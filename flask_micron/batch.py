@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+flask_micron.batch
+==================
+
+This module provides the function that handles batch requests, which
+can be used to call multiple Micron methods using a single HTTP request.
+
+A batch request takes a list of calls as its input. Every call is a dict,
+containing the name of the Micron method to call and optionally the input
+for that method::
+
+    [
+        {"method": "hello", "input": "World"},
+        {"method": "ping"}
+    ]
+
+Every call is handled by the Micron method that is called, using its own
+configuration and plugin hooks (including access control). The output of
+the batch request is a list, containing a result for every call, in the
+same order as the calls::
+
+    [
+        {"output": "Hello, World"},
+        {"output": "pong"}
+    ]
+
+When a call fails, its result contains an error instead of an output.
+The error is described like the output of a failing regular request::
+
+    {"error": {"code": "AccessDenied", "caused_by": "client", ...}}
+
+:copyright: (c) 2016 by Maurice Makaay
+:license: BSD, see LICENSE for more details.
+"""
+
+from flask_micron.compat import is_string
+from flask_micron.errors import MicronClientError
+from flask_micron.method import create_error_output
+
+
+def create_batch_function(methods):
+    """Creates the function that handles batch requests.
+
+    :param dict methods:
+        The Micron methods that can be called from a batch, indexed by
+        their name.
+
+    :returns:
+        A function that takes a list of calls as its argument and that
+        returns a list of results.
+    """
+    def batch(calls):
+        if not isinstance(calls, list):
+            raise InvalidBatch()
+        return [_handle_call(methods, call) for call in calls]
+    return batch
+
+
+def _handle_call(methods, call):
+    try:
+        method = _get_method(methods, call)
+    except MicronClientError as error:
+        return {'error': create_error_output(error, None)}
+    (output, error) = method.call_with_input(call.get('input', None))
+    if error is None:
+        return {'output': output}
+    return {'error': output}
+
+
+def _get_method(methods, call):
+    if not isinstance(call, dict) or not is_string(call.get('method', None)):
+        raise InvalidBatchCall()
+    try:
+        return methods[call['method']]
+    except KeyError:
+        raise UnknownMethod({'method': call['method']})
+
+
+class InvalidBatch(MicronClientError):
+    """The input for a batch request must be a list of calls."""
+
+
+class InvalidBatchCall(MicronClientError):
+    """A call in a batch request must be a dict, containing at least
+    the name of the method to call."""
+
+
+class UnknownMethod(MicronClientError):
+    """A call in a batch request refers to an unknown method."""
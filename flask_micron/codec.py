@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+flask_micron.codec
+==================
+
+This module provides the JSON codecs that are used by Flask-Micron to
+deserialize the request input and to serialize the response output.
+
+Every :any:`Micron` object holds a :any:`CodecRegistry` (available as
+``micron.codecs``), in which the codecs are registered by name. The
+following codecs are registered by default:
+
+* **orjson**: uses `orjson`_, when it is installed
+* **ujson**: uses `ujson`_, when it is installed
+* **simplejson**: uses `simplejson`_, when it is installed
+* **json**: uses the ``json`` module from the Python standard library
+* **flask**: uses ``flask.json``, the JSON implementation of the Flask app
+
+The codec to use can be selected using the configuration option
+``json_codec``. By default, the 'flask' codec is used, so the JSON
+settings of the Flask app (e.g. ``app.json.sort_keys`` or a custom JSON
+provider) are applied. The other codecs must be selected explicitly.
+The value 'auto' selects the fastest codec that is available (in the order
+as listed above, 'flask' not included). The option can be set for the
+Micron object, or for a specific method::
+
+    micron = Micron(app, json_codec='auto')
+
+    @micron.method(json_codec='orjson')
+    def large_report():
+        ...
+
+Note that the codecs do not produce exactly the same JSON output. They
+differ for example in the escaping of non-ASCII characters. Unlike the
+'flask' codec (with the default Flask settings), the other codecs do not
+sort the keys of objects. Since the response bytes change, switching
+codecs also changes the ETags of the responses and it makes cached
+responses (e.g. in clients and proxies) obsolete.
+The data that the output represents is the same for all codecs, but
+there are differences in what values can be serialized. Therefore, check
+the following before switching to another codec, e.g. by using 'auto':
+
+* orjson serializes some types natively (e.g. datetimes, UUIDs and
+  dataclasses), so the encoders that are registered for these types
+  (see :mod:`flask_micron.encoder`) are not used. For example, a custom
+  encoder that is registered for datetime values is skipped.
+* orjson cannot serialize integers that do not fit in 64 bits. Such
+  values result in an error.
+* orjson and ujson do not support an object hook, which is required
+  for the ``normalize_while_decoding`` option (see
+  :ref:`plugins_normalize_input`).
+
+.. _orjson: https://github.com/ijl/orjson
+.. _ujson: https://github.com/ultrajson/ultrajson
+.. _simplejson: https://github.com/simplejson/simplejson
+
+:copyright: (c) 2016 by Maurice Makaay
+:license: BSD, see LICENSE for more details.
+"""
+
+import abc
+import json
+import sys
+from flask import json as flask_json
+from flask_micron.compat import ABC
+from flask_micron.errors import ImplementationError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+
+DEFAULT_CODEC = 'flask'
+"""The name of the codec that is used when no codec is configured."""
+
+AUTO = 'auto'
+"""The codec name that selects the fastest available codec."""
+
+PREFERRED_CODECS = ('orjson', 'ujson', 'simplejson', 'json')
+"""The codec names in order of preference, for selecting a codec
+when the codec name :any:`AUTO` is used."""
+
+_COMPACT_SEPARATORS = (',', ':')
+
+
+class Codec(ABC):
+    """The Codec class defines the interface for a JSON codec.
+    Derived classes must implement :meth:`loads` and :meth:`dumps`
+    for the deserialization and serialization of JSON data.
+    """
+
+    binary = False
+    """True when the codec parses bytes directly, without decoding
+    them into a string first."""
+
+    supports_object_hook = False
+    """True when the codec can call an object hook for every JSON object
+    that is decoded (see :meth:`loads`)."""
+
+    @abc.abstractmethod
+    def loads(self, data, object_hook=None):
+        """Deserializes JSON data.
+
+        :param data:
+            The JSON data to deserialize, as bytes (UTF-8 encoded)
+            or as a string.
+        :param function object_hook:
+            When set, this function is called for every decoded JSON
+            object (as a dict), innermost objects first. Its return value
+            is used instead of the dict. Only supported by codecs for
+            which :any:`supports_object_hook` is True.
+
+        :returns:
+            The deserialized data.
+        """
+
+    @abc.abstractmethod
+    def dumps(self, value, default, indent=None):
+        """Serializes data into JSON.
+
+        :param value:
+            The data to serialize.
+        :param function default:
+            The function to call for values that cannot be serialized
+            by the codec itself. It must return a serializable value or
+            raise an exception.
+        :param int indent:
+            When set, the output is pretty printed using this indentation.
+            Otherwise, compact output is produced, without any whitespace
+            between the JSON tokens.
+
+        :returns:
+            The JSON data as UTF-8 encoded bytes.
+        """
+
+
+class JsonCodec(Codec):
+    """A codec that uses the ``json`` module from the standard library."""
+
+    supports_object_hook = True
+
+    def loads(self, data, object_hook=None):
+        return json.loads(data, object_hook=object_hook)
+
+    def dumps(self, value, default, indent=None):
+        return json.dumps(
+            value, default=default, indent=indent,
+            separators=None if indent else _COMPACT_SEPARATORS
+        ).encode('utf-8')
+
+
+class FlaskCodec(Codec):
+    """A codec that uses ``flask.json``, so the JSON settings of the
+    Flask app are applied."""
+
+    supports_object_hook = True
+
+    def loads(self, data, object_hook=None):
+        return flask_json.loads(data, object_hook=object_hook)
+
+    def dumps(self, value, default, indent=None):
+        return flask_json.dumps(
+            value, default=default, indent=indent,
+            separators=None if indent else _COMPACT_SEPARATORS
+        ).encode('utf-8')
+
+
+class SimplejsonCodec(Codec):
+    """A codec that uses `simplejson`_."""
+
+    supports_object_hook = True
+
+    def loads(self, data, object_hook=None):
+        return simplejson.loads(data, object_hook=object_hook)
+
+    def dumps(self, value, default, indent=None):
+        return simplejson.dumps(
+            value, default=default, indent=indent,
+            separators=None if indent else _COMPACT_SEPARATORS
+        ).encode('utf-8')
+
+
+class UjsonCodec(Codec):
+    """A codec that uses `ujson`_."""
+
+    binary = True
+
+    def loads(self, data, object_hook=None):
+        _check_no_object_hook(self, object_hook)
+        return ujson.loads(data)
+
+    def dumps(self, value, default, indent=None):
+        return ujson.dumps(
+            value, default=default, indent=indent or 0,
+            ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+
+
+class OrjsonCodec(Codec):
+    """A codec that uses `orjson`_.
+
+    Note that `orjson`_ natively serializes some types that are not
+    supported by the other codecs (e.g. dates and dataclasses). These
+    are serialized without calling the default function. Integers that
+    do not fit in 64 bits cannot be serialized.
+    """
+
+    binary = True
+
+    def loads(self, data, object_hook=None):
+        _check_no_object_hook(self, object_hook)
+        return orjson.loads(data)
+
+    def dumps(self, value, default, indent=None):
+        # orjson replaces exceptions that are raised by the default
+        # function with a TypeError. The original exception is kept
+        # here, so it can be raised instead.
+        errors = []
+
+        def _default(item):
+            try:
+                return default(item)
+            except Exception:
+                errors.append(sys.exc_info()[1])
+                raise
+
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(value, default=_default, option=option)
+        except TypeError:
+            if errors:
+                raise errors[0]
+            raise
+
+
+def _check_no_object_hook(codec, object_hook):
+    if object_hook is not None:
+        raise ImplementationError(
+            "The %s does not support an object_hook" % type(codec).__name__)
+
+
+class CodecRegistry(object):
+    """The CodecRegistry holds the JSON codecs that can be selected
+    using the ``json_codec`` configuration option.
+    """
+
+    def __init__(self):
+        self._codecs = {}
+        self.register('json', JsonCodec())
+        self.register('flask', FlaskCodec())
+        if simplejson is not None:
+            self.register('simplejson', SimplejsonCodec())
+        if ujson is not None:
+            self.register('ujson', UjsonCodec())
+        if orjson is not None:
+            self.register('orjson', OrjsonCodec())
+
+    @property
+    def names(self):
+        """The sorted list of names of the registered codecs."""
+        return sorted(self._codecs)
+
+    def register(self, name, codec):
+        """Registers a codec. An existing codec by the same name
+        is replaced.
+
+        :param string name:
+            The name by which the codec can be selected.
+        :param Codec codec:
+            The codec to register.
+
+        :returns:
+            This CodecRegistry instance, useful for fluent syntax.
+
+        Example::
+
+            micron.codecs.register('my_codec', MyCodec())
+
+            @micron.method(json_codec='my_codec')
+            def hello():
+                return "Hello, world!"
+        """
+        self._codecs[name] = codec
+        return self
+
+    def get(self, name=None):
+        """Retrieves a codec.
+
+        :param string name:
+            The name of the codec. When None is used, then the default
+            codec ('flask') is returned. When 'auto' is used, then the
+            fastest available codec is returned.
+
+        :returns:
+            The Codec.
+
+        :raises ImplementationError:
+            When no codec is registered by the provided name.
+        """
+        if name is None:
+            name = DEFAULT_CODEC
+        elif name == AUTO:
+            for preferred_name in PREFERRED_CODECS:
+                if preferred_name in self._codecs:
+                    return self._codecs[preferred_name]
+        try:
+            return self._codecs[name]
+        except KeyError:
+            raise ImplementationError(
+                "Unknown json_codec '%s' used (available codecs are: %s)" %
+                (name, ", ".join(self.names)))
@@ -11,6 +11,23 @@
     :license: BSD, see LICENSE for more details.
 """
 
+import abc
+
+try:
+    from collections.abc import Iterator
+except ImportError:
+    from collections import Iterator
+
+try:
+    STRING_TYPES = (basestring,)
+except NameError:
+    STRING_TYPES = (str, bytes)
+
+# A base class for abstract base classes, which works for both Python v2
+# and Python v3 (like abc.ABC, which only exists in Python v3).
+ABC = abc.ABCMeta('ABC', (object,), {'__slots__': ()})
+
+
 def is_string(value):
     """Check if a value is a string.
 
@@ -19,13 +36,4 @@ def is_string(value):
     :returns:
         True in case the provided value is a string, False otherwise.
     """
-    try:
-        basestring
-        def is_string(value):
-            """Python 2 compatible implementation of is_string(value)."""
-            return isinstance(value, basestring)
-    except NameError:
-        def is_string(value):
-            """Python 3 compatible implementation of is_string(value)."""
-            return isinstance(value, (str, bytes))
-    return is_string(value)
+    return isinstance(value, STRING_TYPES)
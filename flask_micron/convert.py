@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+flask_micron.convert
+====================
+
+This module provides the conversion of input data into typed objects,
+driven by type annotations.
+
+When the argument of a Micron method is annotated with a dataclass,
+a ``NamedTuple`` or a ``TypedDict``, then the decoded JSON input is
+converted into that type before the function is called::
+
+    @dataclass
+    class Person:
+        name: str
+        emails: List[str] = field(default_factory=list)
+        address: Optional[Address] = None
+
+    @micron.method()
+    def register(person: Person):
+        ...
+
+The annotations of the fields are used to convert nested data as well.
+Supported are the types mentioned above, ``List[T]``, ``Dict[str, T]``
+and ``Optional[T]`` of those. Values for other annotations are passed on
+as-is: the conversion does not check their types (use
+:ref:`plugins_validate_input` for that).
+
+* A dataclass or ``TypedDict`` is created from a JSON object. Fields
+  without a default value are required and unknown fields are not allowed.
+* A ``NamedTuple`` is created from a JSON object or from a JSON array
+  with the field values in order.
+* ``None`` is passed on as-is.
+
+The annotations are inspected only once, when the function is decorated,
+resulting in a converter function that is used for every request. When
+the input cannot be converted, an ``InvalidInput`` exception (see
+:mod:`flask_micron.errors`) is raised, describing all violations.
+
+:copyright: (c) 2016 by Maurice Makaay
+:license: BSD, see LICENSE for more details.
+"""
+
+from flask_micron.errors import ImplementationError
+from flask_micron.errors import InvalidInput
+
+try:
+    import typing
+except ImportError:
+    typing = None
+
+try:
+    import dataclasses
+except ImportError:
+    dataclasses = None
+
+try:
+    from types import UnionType as _UnionType
+except ImportError:
+    _UnionType = None
+
+
+_violation = InvalidInput.violation
+
+
+def compile_converter(annotation):
+    """Compiles the converter for input data that are annotated with the
+    provided type.
+
+    :param annotation:
+        The type annotation.
+
+    :returns:
+        None when the annotation does not require any conversion. Otherwise,
+        a function that takes the input data as its argument and that returns
+        the converted data.
+
+    :raises ImplementationError:
+        When the annotation cannot be used for conversion.
+    """
+    convert = _compile(annotation, {})
+    if convert is None:
+        return None
+
+    def convert_data(data):
+        if data is None:
+            return None
+        violations = []
+        result = convert(data, (), violations)
+        if violations:
+            raise InvalidInput(violations)
+        return result
+    return convert_data
+
+
+def get_argument_annotation(function):
+    """Returns the type annotation for the single argument of a function.
+
+    :param function function:
+        The function to inspect.
+
+    :returns:
+        The type annotation, or None when the function does not take
+        an argument or when its argument is not annotated.
+    """
+    annotations = getattr(function, '__annotations__', None)
+    if not annotations or typing is None:
+        return None
+    names = [name for name in annotations if name != 'return']
+    if len(names) != 1:
+        return None
+    try:
+        return typing.get_type_hints(function)[names[0]]
+    except Exception as error:
+        raise ImplementationError(
+            "Cannot resolve the type annotation for argument '%s' of %s: %s"
+            % (names[0], getattr(function, '__name__', function), error))
+
+
+def get_list_item_type(annotation):
+    """Returns the item type for a ``List[T]`` type annotation.
+
+    :param annotation:
+        The type annotation.
+
+    :returns:
+        The item type T, or None when the annotation is not ``List[T]``.
+    """
+    (origin, args) = _get_origin_and_args(annotation)
+    if origin is list and len(args) == 1:
+        return args[0]
+    return None
+
+
+def _compile(annotation, compiled):
+    """Compiles the converter for a type annotation. The converter takes
+    the value to convert, its path in the input data and the list to add
+    violations to. Converters are never called for None values."""
+    if typing is None:
+        return None
+    try:
+        if annotation in compiled:
+            return compiled[annotation]
+    except TypeError:
+        # Unhashable annotations are not among the convertible types.
+        return None
+    if _is_dataclass(annotation):
+        return _compile_dataclass(annotation, compiled)
+    if _is_namedtuple(annotation):
+        return _compile_namedtuple(annotation, compiled)
+    if _is_typeddict(annotation):
+        return _compile_typeddict(annotation, compiled)
+    (origin, args) = _get_origin_and_args(annotation)
+    if origin is list and len(args) == 1:
+        return _compile_list(annotation, args[0], compiled)
+    if origin is dict and len(args) == 2:
+        return _compile_dict(annotation, args[1], compiled)
+    if origin is typing.Union or (
+            _UnionType is not None and origin is _UnionType):
+        return _compile_optional(annotation, args, compiled)
+    return None
+
+
+def _compile_dataclass(cls, compiled):
+    hints = _get_type_hints(cls)
+    fields = [
+        (field.name, field.default is dataclasses.MISSING and
+         field.default_factory is dataclasses.MISSING)
+        for field in dataclasses.fields(cls) if field.init
+    ]
+    return _compile_object(
+        cls, hints, fields, lambda values: cls(**values), compiled)
+
+
+def _compile_namedtuple(cls, compiled):
+    hints = _get_type_hints(cls)
+    defaults = getattr(cls, '_field_defaults', {})
+    fields = [(name, name not in defaults) for name in cls._fields]
+    convert_object = _compile_object(
+        cls, hints, fields, lambda values: cls(**values), compiled)
+    names = cls._fields
+
+    def convert_namedtuple(value, path, violations):
+        if isinstance(value, list):
+            if len(value) > len(names):
+                violations.append(_violation(
+                    path, "must contain at most %d items" % len(names)))
+                return None
+            value = dict(zip(names, value))
+        return convert_object(value, path, violations)
+    compiled[cls] = convert_namedtuple
+    return convert_namedtuple
+
+
+def _compile_typeddict(cls, compiled):
+    hints = _get_type_hints(cls)
+    required = getattr(cls, '__required_keys__', None)
+    if required is None:
+        required = hints if getattr(cls, '__total__', True) else ()
+    fields = [(name, name in required) for name in hints]
+    return _compile_object(cls, hints, fields, dict, compiled)
+
+
+def _compile_object(cls, hints, fields, build, compiled):
+    """Compiles the converter for JSON objects, which are turned into
+    a typed object by calling build() with the converted field values."""
+    # A converter is registered before compiling the converters for the
+    # fields, so types that refer to themselves can be converted. It calls
+    # the final converter for the type, once that is compiled.
+    compiled[cls] = lambda value, path, violations: compiled[cls](
+        value, path, violations)
+
+    specs = tuple(
+        (name, _compile(hints.get(name, None), compiled), required)
+        for (name, required) in fields)
+    names = frozenset(name for (name, _) in fields)
+
+    def convert_object(value, path, violations):
+        if not isinstance(value, dict):
+            violations.append(_violation(path, "must be an object"))
+            return None
+        errors = len(violations)
+        values = {}
+        for (name, convert, required) in specs:
+            if name in value:
+                item = value[name]
+                if convert is not None and item is not None:
+                    item = convert(item, path + (name,), violations)
+                values[name] = item
+            elif required:
+                violations.append(_violation(path + (name,), "is required"))
+        if len(values) != len(value):
+            for name in value:
+                if name not in names:
+                    violations.append(
+                        _violation(path + (name,), "is not allowed"))
+        if len(violations) > errors:
+            return None
+        return build(values)
+
+    compiled[cls] = convert_object
+    return convert_object
+
+
+def _compile_list(annotation, item_type, compiled):
+    convert_item = _compile(item_type, compiled)
+    if convert_item is None:
+        return None
+
+    def convert_list(value, path, violations):
+        if not isinstance(value, list):
+            violations.append(_violation(path, "must be an array"))
+            return None
+        return [
+            item if item is None
+            else convert_item(item, path + (index,), violations)
+            for (index, item) in enumerate(value)
+        ]
+    compiled[annotation] = convert_list
+    return convert_list
+
+
+def _compile_dict(annotation, value_type, compiled):
+    convert_value = _compile(value_type, compiled)
+    if convert_value is None:
+        return None
+
+    def convert_dict(value, path, violations):
+        if not isinstance(value, dict):
+            violations.append(_violation(path, "must be an object"))
+            return None
+        return dict(
+            (key, item if item is None
+             else convert_value(item, path + (key,), violations))
+            for (key, item) in value.items()
+        )
+    compiled[annotation] = convert_dict
+    return convert_dict
+
+
+def _compile_optional(annotation, args, compiled):
+    converters = [
+        _compile(arg, compiled) for arg in args if arg is not type(None)]
+    if all(convert is None for convert in converters):
+        return None
+    if len(converters) > 1:
+        raise ImplementationError(
+            "Cannot convert input to %s: only Optional[T] is supported "
+            "for unions" % (annotation,))
+    compiled[annotation] = converters[0]
+    return converters[0]
+
+
+def _is_dataclass(annotation):
+    return dataclasses is not None and isinstance(annotation, type) and \
+        dataclasses.is_dataclass(annotation)
+
+
+def _is_namedtuple(annotation):
+    return isinstance(annotation, type) and \
+        issubclass(annotation, tuple) and \
+        hasattr(annotation, '_fields') and \
+        bool(getattr(annotation, '__annotations__', None))
+
+
+def _is_typeddict(annotation):
+    return isinstance(annotation, type) and \
+        issubclass(annotation, dict) and \
+        hasattr(annotation, '__total__')
+
+
+def _get_origin_and_args(annotation):
+    if typing is None:
+        return (None, ())
+    get_origin = getattr(typing, 'get_origin', None)
+    if get_origin is not None:
+        return (get_origin(annotation), typing.get_args(annotation))
+    return (
+        getattr(annotation, '__origin__', None),
+        getattr(annotation, '__args__', None) or ())
+
+
+def _get_type_hints(cls):
+    try:
+        return typing.get_type_hints(cls)
+    except Exception as error:
+        raise ImplementationError(
+            "Cannot resolve the type annotations of %s: %s" % (
+                cls.__name__, error))
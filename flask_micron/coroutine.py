@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+flask_micron.coroutine
+======================
+
+This module provides support for coroutine functions (``async def``),
+which can be used both for Micron methods and for plugin hook functions.
+
+Flask handles a request synchronously, within a worker thread. Therefore,
+Flask-Micron runs coroutines until completion on an event loop that it
+manages for the current thread. Within the coroutine, ``await`` can be used
+as usual, e.g. to perform multiple I/O operations concurrently using
+``asyncio.gather()``.
+
+The event loop is created once per thread and it is reused for all
+coroutines that are run by that thread. Coroutines are run in the thread
+that handles the request, so the Flask request context is available
+within them. Note that a coroutine cannot be run when an event loop is
+already running in the current thread.
+
+:copyright: (c) 2016 by Maurice Makaay
+:license: BSD, see LICENSE for more details.
+"""
+
+import atexit
+import inspect
+import threading
+import weakref
+from functools import update_wrapper
+from flask_micron.errors import ImplementationError
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+_loops = threading.local()
+_all_loops = weakref.WeakSet()
+
+
+def is_coroutine_function(function):
+    """Check if a function is a coroutine function (``async def``).
+
+    :param function function:
+        The function to check.
+
+    :returns:
+        True in case the function is a coroutine function, False otherwise.
+    """
+    if asyncio is None:
+        return False
+    return inspect.iscoroutinefunction(function) or \
+        inspect.iscoroutinefunction(getattr(function, '__call__', None))
+
+
+def to_sync(function):
+    """Wraps a coroutine function into a regular function, which runs the
+    coroutine until completion on the event loop for the current thread.
+
+    :param function function:
+        The coroutine function to wrap.
+
+    :returns:
+        The regular function.
+    """
+    def _sync(*args):
+        return run(function(*args))
+    try:
+        update_wrapper(_sync, function)
+    except AttributeError:
+        pass
+    return _sync
+
+
+def run(coroutine):
+    """Runs a coroutine until completion on the event loop for the
+    current thread.
+
+    :param coroutine:
+        The coroutine to run.
+
+    :returns:
+        The return value of the coroutine.
+    """
+    return _get_event_loop().run_until_complete(coroutine)
+
+
+def _get_event_loop():
+    loop = getattr(_loops, 'loop', None)
+    if loop is None or loop.is_closed():
+        if asyncio is None:
+            raise ImplementationError(
+                "Coroutines can only be used when asyncio is available")
+        loop = _loops.loop = asyncio.new_event_loop()
+        _all_loops.add(loop)
+    return loop
+
+
+@atexit.register
+def _close_event_loops():
+    for loop in list(_all_loops):
+        if not loop.is_running():
+            loop.close()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+flask_micron.encoder
+====================
+
+This module provides the registry of encoders that are used to serialize
+values of types that the JSON codecs cannot serialize by themselves.
+
+An encoder is a function that takes a value and that returns a JSON
+serializable representation of that value. Encoders are registered per
+type. For a value, the encoder of the first type in the method resolution
+order of its type is used, so an encoder also applies to subclasses of
+the type for which it is registered. The encoder that is found for a type
+is cached, so for every further value of that type, finding the encoder
+only costs a dict lookup.
+
+Every :any:`Micron` object holds an :any:`EncoderRegistry` (available as
+``micron.encoders``), in which encoders for the following types are
+registered by default:
+
+* ``datetime.datetime``, ``datetime.date`` and ``datetime.time``:
+  ISO 8601 string
+* ``datetime.timedelta``: ``str(value)``, e.g. "1 day, 0:00:02"
+* ``bytes``: UTF-8 decoded string
+* ``decimal.Decimal``: string, so no precision is lost
+* ``uuid.UUID``: string
+* ``set`` and ``frozenset``: list
+
+Instances of dataclasses and `attrs`_ classes are serialized as a dict of
+their fields. For such a class, an encoder is generated the first time that
+an instance is serialized. It reads the fields using direct attribute
+access, so no deep copy is made like ``dataclasses.asdict()`` does. Values
+in the fields are serialized as usual, using the encoders where needed.
+
+.. _attrs: https://www.attrs.org/
+
+Example::
+
+    micron = Micron(app)
+    micron.encoders.register(Money, lambda money: money.format())
+
+Note that some codecs serialize specific types natively, without using
+the encoders. See :mod:`flask_micron.codec` for more information.
+
+:copyright: (c) 2016 by Maurice Makaay
+:license: BSD, see LICENSE for more details.
+"""
+
+from datetime import date
+from datetime import datetime
+from datetime import time
+from datetime import timedelta
+from decimal import Decimal
+import keyword
+import re
+from uuid import UUID
+from flask_micron.errors import ImplementationError
+
+try:
+    import dataclasses
+except ImportError:
+    dataclasses = None
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class EncoderRegistry(object):
+    """The EncoderRegistry holds the encoders that are used for serializing
+    values of types that are not natively supported by the JSON codecs.
+    """
+
+    def __init__(self):
+        self._encoders = {}
+        self._dispatch = {}
+        self.register(datetime, _encode_isoformat)
+        self.register(date, _encode_isoformat)
+        self.register(time, _encode_isoformat)
+        self.register(timedelta, str)
+        self.register(bytes, _encode_bytes)
+        self.register(str, _encode_str)
+        self.register(Decimal, str)
+        self.register(UUID, str)
+        self.register(set, list)
+        self.register(frozenset, list)
+
+    def register(self, value_type, encoder):
+        """Registers the encoder for a type. An existing encoder for the
+        same type is replaced.
+
+        :param type value_type:
+            The type to register the encoder for. The encoder is also used
+            for subclasses of this type, unless an encoder is registered
+            for the subclass itself.
+        :param function encoder:
+            The function that takes a value of the type and that returns
+            a JSON serializable representation of the value.
+
+        :returns:
+            This EncoderRegistry instance, useful for fluent syntax.
+        """
+        self._encoders[value_type] = encoder
+        self._dispatch = {}
+        return self
+
+    def encode(self, value):
+        """Encodes a value into a JSON serializable representation.
+        This method is passed to the JSON codec as its default function.
+
+        :param value:
+            The value to encode.
+
+        :returns:
+            The JSON serializable representation of the value.
+
+        :raises ImplementationError:
+            When no encoder is available for the type of the value.
+        """
+        try:
+            encoder = self._dispatch[type(value)]
+        except KeyError:
+            encoder = self._resolve(type(value))
+        return encoder(value)
+
+    def _resolve(self, value_type):
+        for base_type in value_type.__mro__:
+            encoder = self._encoders.get(base_type, None)
+            if encoder is not None:
+                break
+        else:
+            encoder = _compile_fields_encoder(value_type)
+            if encoder is None:
+                encoder = _encode_unsupported
+        self._dispatch[value_type] = encoder
+        return encoder
+
+
+def _encode_isoformat(value):
+    return value.isoformat()
+
+
+def _encode_bytes(value):
+    return value.decode('utf-8')
+
+
+def _encode_str(value):
+    return value
+
+
+def _compile_fields_encoder(value_type):
+    """Compiles an encoder for dataclasses and attrs classes, which
+    creates a dict of the fields of a value. For other types, None is
+    returned."""
+    if dataclasses is not None and dataclasses.is_dataclass(value_type):
+        names = [field.name for field in dataclasses.fields(value_type)]
+    elif hasattr(value_type, '__attrs_attrs__'):
+        names = [attribute.name for attribute in value_type.__attrs_attrs__]
+    else:
+        return None
+
+    if not all(_is_identifier(name) for name in names):
+        def _encode_fields(value):
+            return dict((name, getattr(value, name)) for name in names)
+        return _encode_fields
+
+    # Generating the code for the encoder results in a plain dict display
+    # with attribute lookups, which is the fastest way to create the dict.
+    # The code is safe to execute: it contains only field names, which
+    # have been checked to be identifiers.
+    source = "def _encode_fields(value):\n    return {%s}\n" % ", ".join(
+        "%r: value.%s" % (name, name) for name in names)
+    namespace = {}
+    exec(source, namespace)  # pylint: disable=exec-used
+    return namespace['_encode_fields']
+
+
+def _is_identifier(name):
+    return _IDENTIFIER.match(name) is not None and \
+        not keyword.iskeyword(name)
+
+
+def _encode_unsupported(value):
+    raise ImplementationError(
+        "Unsupported type '%s' used in response data "
+        "(no support for JSON serializing this type)" % type(value).__name__)
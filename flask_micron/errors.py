@@ -87,6 +87,31 @@ class AuthorizationFailed(MicronClientError):
     the client does not meet the authorization criteria."""
 
 
+class InvalidInput(MicronClientError):
+    """The input for the request is not valid for the method.
+    The details describe the violations."""
+
+    @staticmethod
+    def violation(path, message):
+        """Describes a single violation, for use in the details.
+
+        :param path:
+            The path to the offending value in the input data, as a sequence
+            of dict keys and list indexes. It is formatted as a JSON Pointer.
+        :param string message:
+            The message that describes the violation.
+
+        :returns:
+            A dict describing the violation.
+        """
+        return {
+            'path': ''.join(
+                '/' + str(part).replace('~', '~0').replace('/', '~1')
+                for part in path),
+            'message': message
+        }
+
+
 class MicronServerError(MicronError):
     """Base class for errors that are caused by the server."""
     def __init__(self, details=None):
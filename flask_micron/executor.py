@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+flask_micron.executor
+=====================
+
+This module provides the process pools that are used for running Micron
+methods in separate processes. This is meant for CPU-bound methods: within
+a single process, these hold the GIL and stall the other threads that
+handle requests. Running them in a pool of worker processes makes them
+scale over the available CPU cores, while the worker threads keep serving
+other requests.
+
+Running a method in a process pool is enabled using the ``executor``
+option (see :ref:`plugins_call_function`)::
+
+    @micron.method(executor='process', executor_workers=4)
+    def render_report(parameters):
+        ...
+
+The function and its input are sent to a worker process, where the
+function is called. Its output is sent back to the request handling.
+Therefore, the function must be defined at the module level, and its
+input and output must be picklable. Lambdas and nested functions are
+rejected when the function is decorated. Whether the function can be
+pickled is checked on its first call, since the function is not yet
+available from its module while it is being decorated. Coroutine
+functions are run until completion within the worker process.
+
+Pools are shared between all Micron methods that use the same number of
+workers. A pool is created when it is first used. At that point, all its
+worker processes are started up front (the warm-up), so the first requests
+do not each pay the cost for starting a process. Use :func:`warm_up` to
+do this when the application starts instead.
+
+When a worker process dies (e.g. killed by the OS because of its memory
+use), the request that was running in that process fails. The pool is
+replaced by a new one, which is used for the next requests (the restart).
+
+:copyright: (c) 2016 by Maurice Makaay
+:license: BSD, see LICENSE for more details.
+"""
+
+import atexit
+import os
+import pickle
+import threading
+from flask_micron import coroutine
+from flask_micron.errors import ImplementationError
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures import wait
+    from concurrent.futures.process import BrokenProcessPool
+except ImportError:
+    ProcessPoolExecutor = None
+
+
+EXECUTORS = (None, 'process')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def check_executor(executor):
+    """Checks the value of the ``executor`` option.
+
+    :param executor:
+        The executor option value.
+
+    :raises ImplementationError:
+        When the executor is not supported.
+    """
+    if executor not in EXECUTORS:
+        raise ImplementationError(
+            "Unsupported executor '%s' used (supported executors are "
+            "None or 'process')" % (executor,))
+    if executor == 'process' and ProcessPoolExecutor is None:
+        raise ImplementationError(
+            "The 'process' executor can only be used when "
+            "concurrent.futures is available")
+
+
+def to_process(function, workers=None):
+    """Wraps a function into a function that calls it in a worker process
+    of the process pool for the provided number of workers.
+
+    The process pool is looked up on the first call, so wrapping the
+    function does not start any processes.
+
+    :param function function:
+        The function to wrap. It must be picklable, i.e. defined at
+        the module level.
+    :param int workers:
+        The number of worker processes in the pool. By default, the number
+        of CPUs is used.
+
+    :returns:
+        The function that calls the wrapped function in a worker process.
+
+    :raises ImplementationError:
+        When the function is not defined at the module level.
+    """
+    check_executor('process')
+    qualname = getattr(function, '__qualname__', '')
+    if not qualname or '<' in qualname:
+        raise ImplementationError(
+            "A Micron method that uses the 'process' executor must be "
+            "defined at the module level, so it can be sent to a worker "
+            "process (%s is not)" % (qualname or function,))
+    return _ProcessFunction(function, _get_worker_count(workers))
+
+
+def get_pool(workers=None):
+    """Returns the process pool for the provided number of workers.
+
+    :param int workers:
+        The number of worker processes. By default, the number of CPUs
+        is used.
+
+    :returns:
+        The :class:`ProcessPool`.
+    """
+    workers = _get_worker_count(workers)
+    with _pools_lock:
+        pool = _pools.get(workers, None)
+        if pool is None:
+            pool = _pools[workers] = ProcessPool(workers)
+        return pool
+
+
+def warm_up(workers=None):
+    """Starts the worker processes for the process pool for the provided
+    number of workers, when they have not been started yet.
+
+    :param int workers:
+        The number of worker processes. By default, the number of CPUs
+        is used.
+    """
+    get_pool(workers).warm_up()
+
+
+class ProcessPool(object):
+    """A managed pool of worker processes, which starts its processes
+    on first use and which replaces itself when it breaks."""
+
+    def __init__(self, workers):
+        """
+        :param int workers:
+            The number of worker processes.
+        """
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        """Creates the pool, including its worker processes, when it has not
+        been created yet."""
+        self._get_executor()
+
+    def call(self, function, *args):
+        r"""Calls the function in a worker process.
+
+        :param function function:
+            The function to call.
+        :param \*args:
+            The arguments for the function.
+
+        :returns:
+            The return value of the function.
+
+        :raises Exception:
+            The exception that was raised by the function, or
+            BrokenProcessPool when the worker process died.
+        """
+        executor = self._get_executor()
+        try:
+            return executor.submit(_call, function, args).result()
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+
+    def shutdown(self):
+        """Shuts down the worker processes. A new pool is created when the
+        pool is used again."""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                executor = ProcessPoolExecutor(self.workers)
+                # Submitting a task for every worker at once makes the
+                # executor start all worker processes.
+                wait([
+                    executor.submit(_warm_up) for _ in range(self.workers)])
+                self._executor = executor
+            return self._executor
+
+    def _restart(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+
+class _ProcessFunction(object):
+    """Calls a function in a worker process. The check whether the
+    function can be pickled and the lookup of the pool are done on the
+    first call."""
+
+    def __init__(self, function, workers):
+        self.function = function
+        self.workers = workers
+        self._pool = None
+
+    def __call__(self, *args):
+        pool = self._pool
+        if pool is None:
+            try:
+                pickle.dumps(self.function)
+            except Exception as error:
+                raise ImplementationError(
+                    "A Micron method that uses the 'process' executor must "
+                    "be available from its module, so it can be sent to a "
+                    "worker process (%s)" % error)
+            pool = self._pool = get_pool(self.workers)
+        return pool.call(self.function, *args)
+
+
+def _call(function, args):
+    """Calls the function within the worker process."""
+    if coroutine.is_coroutine_function(function):
+        return coroutine.run(function(*args))
+    return function(*args)
+
+
+def _warm_up():
+    return os.getpid()
+
+
+def _get_worker_count(workers):
+    if workers is None:
+        return os.cpu_count() or 1
+    if isinstance(workers, bool) or not isinstance(workers, int) or \
+       workers < 1:
+        raise ImplementationError(
+            "executor_workers must be a positive integer, not %r" % (
+                workers,))
+    return workers
+
+
+@atexit.register
+def _shutdown_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.shutdown()
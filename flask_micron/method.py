@@ -10,9 +10,11 @@ make them work for Flask-Micron request handling.
 :license: BSD, see LICENSE for more details.
 """
 
+import copy
 import re
 import sys
 import traceback
+from collections import namedtuple
 from functools import update_wrapper
 import flask
 from flask_micron import plugin
@@ -21,6 +23,75 @@ from flask_micron.errors import UnhandledException
 from flask_micron.errors import ImplementationError
 
 
+# The hooks that make up the request handling, in order of execution.
+# The second field in the tuples is the context property that is monitored
+# for the *[Single]* hooks (see plugin.Container.call_one()).
+REQUEST_HOOKS = (
+    ('start_request', None),
+    ('check_access', None),
+    ('after_check_access', None),
+    ('read_input', 'input'),
+    ('normalize_input', None),
+    ('validate_input', None),
+    ('call_function', 'output'),
+    ('process_output', None),
+    ('create_response', 'response'),
+    ('process_response', None),
+    ('end_request', None),
+)
+
+# The hooks that are always called at the end of the request handling.
+# When a hook function provides a response early, by setting ctx.response,
+# the hooks between that hook and these hooks are skipped.
+FINISHING_HOOKS = ('process_response', 'end_request')
+
+# The hooks that are allowed to modify ctx.config.
+CONFIG_HOOKS = (
+    ('start_request', None),
+)
+
+# The hooks that make up the error handling, in order of execution.
+ERROR_HOOKS = (
+    ('create_response', 'response'),
+    ('process_error', None),
+    ('process_response', None),
+    ('end_request', None),
+)
+
+# The hooks that make up the handling of a single call within a batch
+# request. The input is provided by the batch and the output is collected
+# by the batch, so no hooks are called for the request and response.
+BATCH_ITEM_HOOKS = (
+    ('start_request', None),
+    ('check_access', None),
+    ('after_check_access', None),
+    ('normalize_input', None),
+    ('validate_input', None),
+    ('call_function', 'output'),
+    ('process_output', None),
+    ('end_request', None),
+)
+
+# The hooks that make up the error handling for a single call within
+# a batch request. The end_request hook is not part of it, since it is
+# always called at the end of the call, also when an error occurred.
+BATCH_ITEM_ERROR_HOOKS = (
+    ('process_error', None),
+)
+
+_Compiled = namedtuple('_Compiled', (
+    'request_pipeline',
+    'request_stages',
+    'request_finish',
+    'error_pipeline',
+    'batch_item_stages',
+    'batch_item_finish',
+    'batch_item_error_pipeline',
+    'copy_config',
+    'pool_contexts'
+))
+
+
 class MicronMethod(object):
     """The MicronMethod class wraps a standard function to make it work
     for Flask-Micron request handling. If forms the glue between the
@@ -39,6 +110,7 @@ class MicronMethod(object):
         self.function = function
         self.plugins = micron.plugins
         self.config = MicronMethodConfig(micron.config)
+        self._compiled = (None, None)
 
     def configure(self, **configuration):
         r"""Updates the configuration for this MicronMethod instance.
@@ -55,6 +127,20 @@ class MicronMethod(object):
         self.config.configure(**configuration)
         return self
 
+    def compile(self):
+        """Compiles the request pipeline for this MicronMethod.
+
+        Calling this method is optional, since the pipeline is compiled
+        automatically when needed. It can be used to let plugins check the
+        method early on, as they can raise an ImplementationError while
+        compiling their hook functions.
+
+        :returns:
+            The MicronMethod itself, useful for fluent syntax.
+        """
+        self._get_compiled()
+        return self
+
     def __call__(self):
         """Executes the MicronMethod.
 
@@ -68,56 +154,205 @@ class MicronMethod(object):
             The Flask Response object to return to the client.
         """
         self._enable_cookies_for_js_clients()
-        ctx = plugin.Context()
-        ctx.config = self.config.flattened
-        ctx.function = self.function
+        compiled = self._get_compiled()
+        ctx = self._create_context(compiled)
         try:
-            self.plugins.call_all(ctx, 'start_request')
-            self.plugins.call_all(ctx, 'check_access')
-            self.plugins.call_all(ctx, 'after_check_access')
-            self.plugins.call_one(ctx, 'read_input', 'input')
-            self.plugins.call_all(ctx, 'normalize_input')
-            self.plugins.call_all(ctx, 'validate_input')
-            self.plugins.call_one(ctx, 'call_function', 'output')
-            self.plugins.call_all(ctx, 'process_output')
-            self.plugins.call_one(ctx, 'create_response', 'response')
-            self.plugins.call_all(ctx, 'process_response')
-            self.plugins.call_all(ctx, 'end_request')
+            _run_stages(ctx, compiled.request_stages, compiled.request_finish)
         except MicronError:
             (_, error, traceback_) = sys.exc_info()
-            self._handle_error(ctx, error, traceback_)
+            self._handle_error(ctx, error, traceback_, compiled.error_pipeline)
         except Exception:
             (_, error, traceback_) = sys.exc_info()
-            self._handle_error(ctx, UnhandledException(error), traceback_)
+            self._handle_error(
+                ctx, UnhandledException(error), traceback_,
+                compiled.error_pipeline)
+
+        response = ctx.response
+        if compiled.pool_contexts:
+            ctx.release()
+        return response
+
+    def call_with_input(self, data):
+        """Executes the MicronMethod for input data that is provided by
+        the caller, instead of being read from the request. This is used
+        for handling the calls in a batch request.
+
+        The hooks for reading the request and for creating a response are
+        not called, all other hooks are. When a hook function provides
+        a response early, the output is taken from ``ctx.output`` as it is
+        at that point, so such a hook function must set the output as well.
+
+        Errors are not raised, but returned as error output (like the output
+        for a failing regular request), so a batch can continue with its
+        next call. The ``process_error`` hook is called for such errors.
+        The ``end_request`` hook is always called, also when an error
+        occurred.
+
+        Note that plugins can modify the input data in place (e.g. input
+        normalization does), so pass a copy of data that must be kept
+        unchanged.
+
+        :param data:
+            The input data for the function.
 
-        return ctx.response
+        :returns:
+            A tuple (output, error). When the call succeeded, the output
+            is the function output and the error is None. Otherwise, the
+            error is the exception that was raised and the output contains
+            the error description.
+        """
+        compiled = self._get_compiled()
+        ctx = self._create_context(compiled)
+        ctx.input = data
+        try:
+            _run_stages(ctx, compiled.batch_item_stages, ())
+            result = (ctx.output, None)
+        except MicronError:
+            (_, error, traceback_) = sys.exc_info()
+            self._handle_error(
+                ctx, error, traceback_, compiled.batch_item_error_pipeline)
+            result = (ctx.output, error)
+        except Exception:
+            (_, error, traceback_) = sys.exc_info()
+            error = UnhandledException(error)
+            self._handle_error(
+                ctx, error, traceback_, compiled.batch_item_error_pipeline)
+            result = (ctx.output, error)
+        finally:
+            try:
+                for hook_function in compiled.batch_item_finish:
+                    hook_function(ctx)
+            finally:
+                if compiled.pool_contexts:
+                    ctx.release()
+        return result
+
+    @property
+    def pipeline(self):
+        """The compiled hook functions for this MicronMethod, as a tuple
+        of two lists: the functions for handling a request and the functions
+        for handling an error (see :meth:`plugin.Container.pipeline`).
+
+        The pipeline is compiled on first use and it is recompiled
+        automatically when plugins are added or when the configuration
+        is changed.
+        """
+        compiled = self._get_compiled()
+        return (compiled.request_pipeline, compiled.error_pipeline)
+
+    def _get_compiled(self):
+        (version, compiled) = self._compiled
+        current_version = (self.plugins.version, self.config.generation)
+        if version != current_version:
+            config = self.config.snapshot
+            function = self.function
+            (request_stages, request_finish) = self._compile_stages(
+                REQUEST_HOOKS, config)
+            (batch_item_stages, batch_item_finish) = self._compile_stages(
+                BATCH_ITEM_HOOKS, config)
+            compiled = _Compiled(
+                request_pipeline=[
+                    hook_function
+                    for stage in request_stages for hook_function in stage
+                ] + request_finish,
+                request_stages=request_stages,
+                request_finish=request_finish,
+                error_pipeline=self.plugins.pipeline(
+                    ERROR_HOOKS, config, function),
+                batch_item_stages=batch_item_stages,
+                batch_item_finish=batch_item_finish,
+                batch_item_error_pipeline=self.plugins.pipeline(
+                    BATCH_ITEM_ERROR_HOOKS, config, function),
+                # The config snapshot is shared between requests. Plugins
+                # that modify the config get a private copy to work with.
+                copy_config=len(self.plugins.pipeline(
+                    CONFIG_HOOKS, config, function)) > 0,
+                # Reusing Context objects is optional, since it requires
+                # plugins not to hold on to the context after end_request.
+                pool_contexts=bool(config.get('pool_contexts', False))
+            )
+            self._compiled = (current_version, compiled)
+        return compiled
+
+    def _compile_stages(self, hooks, config):
+        """Compiles the hook functions for the hooks, grouped per hook
+        into stages. The hook functions for the FINISHING_HOOKS are
+        returned separately, as a flat list."""
+        stages = []
+        finish = []
+        for hook in hooks:
+            hook_functions = self.plugins.pipeline(
+                (hook,), config, self.function)
+            if hook[0] in FINISHING_HOOKS:
+                finish.extend(hook_functions)
+            elif hook_functions:
+                stages.append(hook_functions)
+        return (stages, finish)
+
+    def _create_context(self, compiled):
+        if compiled.pool_contexts:
+            ctx = plugin.Context.acquire()
+        else:
+            ctx = plugin.Context()
+        config = self.config.snapshot
+        ctx.config = dict(config) if compiled.copy_config else config
+        ctx.function = self.function
+        return ctx
 
     def _enable_cookies_for_js_clients(self):
         flask.current_app.config['SESSION_COOKIE_HTTPONLY'] = False
 
-    def _handle_error(self, ctx, error, traceback_):
+    def _handle_error(self, ctx, error, traceback_, error_pipeline):
         ctx.error = error
-        ctx.output = {
-            'code': type(error).__name__,
-            'caused_by': error.caused_by,
-            'description': str(error),
-            'details': error.details,
-            'trace': self._create_trace(traceback_)
-        }
-        self.plugins.call_one(ctx, 'create_response', 'reponse')
-        self.plugins.call_all(ctx, 'process_error')
-        self.plugins.call_all(ctx, 'process_response')
-        self.plugins.call_all(ctx, 'end_request')
-
-    def _create_trace(self, traceback_):
-        ctx = flask._app_ctx_stack.top
-        debug = ctx.app.debug if ctx else False
-        if not debug:
-            return None
-        tb_list = traceback.extract_tb(traceback_)
-        formatted = traceback.format_list(tb_list)
-        stripped = [line.strip() for line in formatted]
-        return stripped
+        ctx.output = create_error_output(error, traceback_)
+        for hook_function in error_pipeline:
+            hook_function(ctx)
+
+
+def _run_stages(ctx, stages, finish):
+    """Runs the hook functions for a plugin context. After every stage,
+    it is checked whether a response has been provided. If so, the
+    remaining stages are skipped and only the finishing hook functions
+    are run."""
+    for stage in stages:
+        for hook_function in stage:
+            hook_function(ctx)
+        if ctx.response is not None:
+            break
+    for hook_function in finish:
+        hook_function(ctx)
+
+
+def create_error_output(error, traceback_):
+    """Creates the output data that describe an error to the client.
+
+    :param MicronError error:
+        The error to describe.
+    :param traceback_:
+        The traceback for the error. It is only included in the output
+        when the Flask app is running in debug mode.
+
+    :returns:
+        A dict, describing the error.
+    """
+    return {
+        'code': type(error).__name__,
+        'caused_by': error.caused_by,
+        'description': str(error),
+        'details': error.details,
+        'trace': _create_trace(traceback_)
+    }
+
+
+def _create_trace(traceback_):
+    ctx = flask._app_ctx_stack.top
+    debug = ctx.app.debug if ctx else False
+    if not debug:
+        return None
+    tb_list = traceback.extract_tb(traceback_)
+    formatted = traceback.format_list(tb_list)
+    stripped = [line.strip() for line in formatted]
+    return stripped
 
 
 class MicronMethodConfig(object):
@@ -153,6 +388,11 @@ class MicronMethodConfig(object):
 
     IDENTIFIER_FORMAT = re.compile('^[a-zA-Z_][a-zA-Z0-9_]*$')
 
+    # Incremented on every change that is made to any MicronMethodConfig.
+    # Since changes to a config affect all of its descendants, this is
+    # what is used to invalidate cached snapshots.
+    _generation = 0
+
     def __init__(self, parent=None, **configuration):
         r"""Creates a new MicronMethodConfig.
 
@@ -166,6 +406,7 @@ class MicronMethodConfig(object):
         setmyattr = super(MicronMethodConfig, self).__setattr__
         setmyattr('_parent', parent)
         setmyattr('_data', {})
+        setmyattr('_snapshot', (None, None))
 
         self.configure(**configuration)
 
@@ -207,6 +448,7 @@ class MicronMethodConfig(object):
         """
         self._check_option_name(name)
         self._data[name] = value
+        MicronMethodConfig._generation += 1
 
     def _check_option_name(self, name):
         if not self.IDENTIFIER_FORMAT.match(name):
@@ -215,6 +457,14 @@ class MicronMethodConfig(object):
                 "(only lowercase letters, numbers and underscores are allowed "
                 "and the name must start with a letter)" % name)
 
+    @property
+    def generation(self):
+        """A counter that changes whenever a configuration option is set.
+        It can be used to find out whether data that were derived from
+        the configuration have become outdated.
+        """
+        return MicronMethodConfig._generation
+
     @property
     def option_names(self):
         """Returns a set of all configuration option names that are currently
@@ -243,6 +493,25 @@ class MicronMethodConfig(object):
             parent = parent._parent
         return flattened
 
+    @property
+    def snapshot(self):
+        """Returns a read-only dict of all configuration options that are
+        currently in use in the MicronMethodConfig hierarchy.
+
+        Unlike :attr:`flattened`, the snapshot is cached and the same
+        object is returned, until a configuration option is changed in
+        this MicronMethodConfig or in one of its parents.
+
+        :returns:
+            A :class:`ConfigSnapshot`, containing all configuration options.
+        """
+        (generation, snapshot) = self._snapshot
+        if generation != MicronMethodConfig._generation:
+            generation = MicronMethodConfig._generation
+            snapshot = ConfigSnapshot(self.flattened)
+            setmyattr = super(MicronMethodConfig, self).__setattr__
+            setmyattr('_snapshot', (generation, snapshot))
+        return snapshot
 
     def get(self, name):
         """Retrieve a configuration value by name.
@@ -263,3 +532,39 @@ class MicronMethodConfig(object):
             raise KeyError(
                 "No value defined for configuration option '%s'" % name)
         return self._parent.get(name)
+
+
+class ConfigSnapshot(dict):
+    """A read-only dict, used for sharing a flattened MicronMethodConfig
+    between requests. Trying to modify it raises an ImplementationError.
+
+    Plugins that need to modify the configuration must do so from
+    the ``start_request`` hook. Flask-Micron provides those plugins with
+    a modifiable copy of the configuration. All methods that modify
+    a dict are blocked, including the ``|=`` operator.
+
+    Copying or pickling a snapshot results in a plain (modifiable) dict.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise ImplementationError(
+            "The method config is read-only (modifying ctx.config "
+            "is only allowed from the start_request hook)")
+
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+    clear = _read_only
+    pop = _read_only
+    popitem = _read_only
+    setdefault = _read_only
+    update = _read_only
+    __ior__ = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+flask_micron.microbatch
+=======================
+
+This module provides micro-batching: calling a function once for the
+inputs of multiple concurrent requests. This pays off for functions for
+which handling multiple inputs at once costs little more than handling
+a single input, e.g. vectorized scoring of a machine learning model.
+
+Micro-batching is enabled for a Micron method using the ``batch`` option
+(see :ref:`plugins_call_function`). The function then takes a list of
+inputs as its argument and it must return a list of outputs, one for
+every input, in the same order::
+
+    @micron.method(batch=True, max_batch=64, max_wait_ms=5)
+    def score(inputs):
+        return model.predict(inputs).tolist()
+
+Flask handles requests in worker threads. No extra thread is used for
+collecting the inputs: the request that finds no open batch for the
+function starts one and becomes its leader. The leader waits until the
+batch is full (``max_batch`` inputs) or until ``max_wait_ms`` milliseconds
+have passed, whichever comes first. Inputs from requests that arrive in
+the meantime are added to the batch. The leader then calls the function
+with the inputs and hands out the outputs to the waiting requests, which
+continue with their own request handling from there (e.g. creating their
+response).
+
+Note that the function is called from the thread and the Flask request
+context of the leader, so the function must not depend on ``flask.request``
+or on other request specific data. When the function raises an exception,
+then this exception is raised for the leader. The other requests in the
+batch each get a copy of the exception, which has the original exception
+as its ``__cause__``. This way, the requests do not share a traceback.
+
+:copyright: (c) 2016 by Maurice Makaay
+:license: BSD, see LICENSE for more details.
+"""
+
+import threading
+from numbers import Integral
+from numbers import Number
+from flask_micron.errors import ImplementationError
+
+
+DEFAULT_MAX_BATCH = 64
+
+DEFAULT_MAX_WAIT_MS = 5
+
+
+class Batcher(object):
+    """The Batcher collects the inputs from concurrent calls into batches
+    and calls the batch function once for every batch.
+    """
+
+    def __init__(self, function, max_batch=DEFAULT_MAX_BATCH,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        """
+        :param function function:
+            The function that takes a list of inputs and that returns
+            a list of outputs.
+        :param int max_batch:
+            The maximum number of inputs in a batch.
+        :param number max_wait_ms:
+            The maximum time in milliseconds to wait for more inputs,
+            before the function is called.
+
+        :raises ImplementationError:
+            When the settings are invalid.
+        """
+        if isinstance(max_batch, bool) or \
+           not isinstance(max_batch, Integral) or max_batch < 1:
+            raise ImplementationError(
+                "max_batch must be a positive integer, not %r" % (max_batch,))
+        if isinstance(max_wait_ms, bool) or \
+           not isinstance(max_wait_ms, Number) or max_wait_ms < 0:
+            raise ImplementationError(
+                "max_wait_ms must be a number >= 0, not %r" % (max_wait_ms,))
+        self.function = function
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def call(self, data):
+        """Adds the input to a batch and waits for the function to be called
+        for that batch.
+
+        :param data:
+            The input data.
+
+        :returns:
+            The output for the input data.
+
+        :raises Exception:
+            The exception that was raised by the function, or an
+            ImplementationError when the function did not return a list
+            of outputs matching the inputs.
+        """
+        with self._lock:
+            batch = self._pending
+            leader = batch is None
+            if leader:
+                batch = self._pending = _Batch()
+            index = len(batch.inputs)
+            batch.inputs.append(data)
+            if index + 1 >= self.max_batch:
+                self._pending = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._pending is batch:
+                    self._pending = None
+            batch.run(self.function)
+        else:
+            batch.done.wait()
+        return batch.get_output(index)
+
+
+class _Batch(object):
+    __slots__ = ('inputs', 'outputs', 'error', 'full', 'done')
+
+    def __init__(self):
+        self.inputs = []
+        self.outputs = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+    def run(self, function):
+        try:
+            outputs = function(self.inputs)
+            if not isinstance(outputs, (list, tuple)) or \
+               len(outputs) != len(self.inputs):
+                raise ImplementationError(
+                    "A batch function must return a list with an output "
+                    "for each of its %d inputs" % len(self.inputs))
+            self.outputs = outputs
+        except Exception as error:
+            self.error = error
+        finally:
+            self.done.set()
+
+    def get_output(self, index):
+        if self.error is not None:
+            # The leader (which added the first input) raises the original
+            # error. Raising that same instance from multiple threads would
+            # make them all add their frames to its traceback.
+            if index == 0:
+                raise self.error
+            raise _copy_error(self.error)
+        return self.outputs[index]
+
+
+def _copy_error(error):
+    """Returns a copy of the error, which has the error as its cause.
+    The copy is created without calling __init__(), since that might take
+    other arguments than the ones that are stored in the error. When the
+    error cannot be copied, the error itself is returned."""
+    try:
+        copied = type(error).__new__(type(error), *error.args)
+        copied.args = error.args
+        copied.__dict__.update(error.__dict__)
+    except Exception:
+        return error
+    copied.__cause__ = error
+    return copied
@@ -13,11 +13,17 @@ a function to make it work as a :any:`MicronMethod`.
 from flask_micron.errors import ImplementationError
 from flask_micron.method import MicronMethod
 from flask_micron.method import MicronMethodConfig
+from flask_micron.batch import create_batch_function
+from flask_micron.codec import CodecRegistry
+from flask_micron.encoder import EncoderRegistry
 from flask_micron import plugin
 from flask_micron.plugins import json_input
 from flask_micron.plugins import normalize_input
+from flask_micron.plugins import validate_input
 from flask_micron.plugins import call_function
 from flask_micron.plugins import json_output
+from flask_micron.plugins import cache
+from flask_micron.plugins import compress
 
 
 class Micron(object):
@@ -51,13 +57,23 @@ class Micron(object):
         """
         self.config = MicronMethodConfig(**configuration)
 
+        self.codecs = CodecRegistry()
+        self.encoders = EncoderRegistry()
+
+        self.cache = cache.Plugin(self.codecs, self.encoders)
+
         self.plugins = plugin.Container(
-            json_input.Plugin(),
+            json_input.Plugin(self.codecs),
             normalize_input.Plugin(),
+            validate_input.Plugin(),
             call_function.Plugin(),
-            json_output.Plugin()
+            json_output.Plugin(self.codecs, self.encoders),
+            self.cache,
+            compress.Plugin()
         )
 
+        self.methods = {}
+
         self.app = None
         if app is not None:
             self.init_app(app)
@@ -136,6 +152,13 @@ class Micron(object):
     def method(self, rule=None, **configuration):
         r"""Decorates a function to make it work as a Micron method.
 
+        Micron methods only accept POST requests, unless the ``readonly``
+        or the ``http_cache`` option is set. Such read-only methods accept
+        GET requests as well, with the input in the ``input`` query
+        parameter (see :ref:`plugins_json_input`), so their responses can
+        be cached by browsers and proxy servers (see
+        :ref:`plugins_json_output`).
+
         :param string rule:
             The URL rule to use for this method. Default value:
             /<name of decorated function>
@@ -169,11 +192,101 @@ class Micron(object):
         def _decorator(func, rule=rule):
             if rule is None:
                 rule = _create_url_rule(func)
-            wrapped = MicronMethod(self, func).configure(**configuration)
-            self.app.add_url_rule(rule, view_func=wrapped, methods=['POST'])
+            wrapped = self._add_url_rule(rule, func, configuration)
+            self.methods[_create_method_name(rule)] = wrapped
             return func
         return _decorator
 
+    def batch(self, rule='/batch', **configuration):
+        r"""Adds a route for batch requests, which can be used to call
+        multiple Micron methods using a single HTTP request. See
+        :mod:`flask_micron.batch` for information on the input and output
+        format.
+
+        Every call in a batch is handled by the Micron method that is called,
+        using its own configuration and plugin hooks. The hooks that read
+        the request and create the response are only called for the batch
+        request itself.
+
+        :param string rule:
+            The URL rule to use for batch requests. Default value: /batch
+        :param \**configuration:
+            Configuration options for the batch request itself. These
+            configuration options can be used to override the default
+            configuration as set for the Micron object.
+
+        :returns:
+            This Micron instance, useful for fluent syntax.
+
+        Example::
+
+            from flask import Flask
+            from flask_micron import Micron
+
+            app = Flask(__name__)
+            micron = Micron(app).batch()
+
+            @micron.method()
+            def hello(who='World'):
+                return 'Hello, %s' % who
+
+        A batch request to ``/batch`` could now look like this::
+
+            [{"method": "hello", "input": "you"}, {"method": "hello"}]
+        """
+        if self.app is None:
+            raise ImplementationError(
+                'Batch requests can only be used when '
+                'the Micron class is linked to a Flask app')
+
+        # Normalization is done by the methods that are called, according
+        # to their own configuration.
+        configuration.setdefault('normalize', False)
+        # The calls in a batch can be anything, so batch requests must
+        # never be cached by HTTP caches.
+        configuration.setdefault('readonly', False)
+        configuration.setdefault('http_cache', None)
+        self._add_url_rule(
+            rule, create_batch_function(self.methods), configuration)
+        return self
+
+    def _add_url_rule(self, rule, func, configuration):
+        wrapped = MicronMethod(self, func) \
+            .configure(**configuration) \
+            .compile()
+        methods = ['GET', 'POST'] if _is_readonly(wrapped) else ['POST']
+        self.app.add_url_rule(rule, view_func=wrapped, methods=methods)
+        return wrapped
+
+
+def _is_readonly(method):
+    """Checks if a Micron method must be available for GET requests.
+
+    :param MicronMethod method:
+        The Micron method to check.
+
+    :returns:
+        True when the ``readonly`` or the ``http_cache`` option is set for
+        the method, False otherwise.
+    """
+    config = method.config.snapshot
+    return bool(config.get('readonly', False)) or \
+        config.get('http_cache', None) is not None
+
+
+def _create_method_name(rule):
+    """Creates the name by which a Micron method can be called from
+    a batch request.
+
+    :param string rule:
+        The URL rule for the Micron method.
+
+    :returns:
+        The name: the URL rule without its leading slash.
+    """
+    return rule.lstrip('/')
+
+
 def _create_url_rule(func):
     """Creates the URL rule for a function.
 
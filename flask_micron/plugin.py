@@ -11,6 +11,8 @@ This module provides the classes that make up the Flask-Micron plugin system.
 """
 
 import inspect
+import threading
+from flask_micron import coroutine
 
 
 class Plugin(object):
@@ -402,6 +404,54 @@ class Plugin(object):
         +--------------+---------------------------------------------------+
         """
 
+    def compile_hook(self, hook, function, config):
+        """Not a hook itself, but a way for a plugin to provide the hook
+        function that must be used in the request pipeline for a specific
+        Micron method.
+
+        Micron calls this method for every hook that the plugin implements,
+        when it compiles the pipeline for a Micron method. This happens
+        when the method is decorated and again when plugins are added or
+        when configuration is changed. This makes it the place to do work
+        that would otherwise have to be repeated for every request, like
+        inspecting the function or interpreting configuration options.
+        Problems that are found at this point can be reported by raising
+        an :any:`ImplementationError`.
+
+        When None is returned, the hook is left out of the pipeline
+        altogether, so it doesn't cost anything during request handling.
+
+        Note that the config is the static method configuration, so changes
+        that are made to ``ctx.config`` by a ``start_request`` hook are not
+        visible here.
+
+        :param string hook:
+            The name of the hook.
+        :param function function:
+            The function that is wrapped by Flask-Micron.
+        :param dict config:
+            The method config, flattened as a dict.
+
+        :returns:
+            The function to call with the plugin context as argument,
+            or None when the hook must not be called.
+
+        Example::
+
+            import flask_micron
+
+            class Shouter(flask_micron.Plugin):
+
+                def compile_hook(self, hook, function, config):
+                    if config.get('shout', False):
+                        return self.process_output
+                    return None
+
+                def process_output(self, ctx):
+                    ctx.output = ctx.output.upper()
+        """
+        return getattr(self, hook)
+
 
 class Container(object):
     """The Container class well... contains Flask-Micron plugins.
@@ -417,6 +467,7 @@ class Container(object):
         """
         self._plugins = []
         self._hook_functions = {}
+        self.version = 0
         self.add(*plugins)
 
     def add(self, *plugins):
@@ -428,11 +479,13 @@ class Container(object):
         for plugin in plugins:
             self._compile_plugin(plugin)
             self._plugins.append(plugin)
+        self.version += 1
 
     def _compile_plugin(self, plugin):
         hooks = Compiler().compile(plugin)
         for hook, hook_function in hooks.items():
-            self._hook_functions.setdefault(hook, []).append(hook_function)
+            self._hook_functions.setdefault(hook, []).append(
+                (plugin, hook_function))
 
     def call_all(self, context, hook):
         """Call the hook function in all registered plugins.
@@ -443,7 +496,7 @@ class Container(object):
             The name of the hook function to call.
         """
         if hook in self._hook_functions:
-            for hook_function in self._hook_functions[hook]:
+            for _, hook_function in self._hook_functions[hook]:
                 hook_function(context)
 
     def call_one(self, context, hook, monitor_field):
@@ -461,13 +514,50 @@ class Container(object):
             is assigned to that field, no more hooks functions are called.
         """
         try:
-            for hook_function in reversed(self._hook_functions[hook]):
+            for _, hook_function in reversed(self._hook_functions[hook]):
                 hook_function(context)
                 if context.is_assigned(monitor_field):
                     return
         except KeyError:
             return None
 
+    def pipeline(self, hooks, config, function=None):
+        """Compile a flat list of hook functions, which can be called
+        in order to run the provided hooks for a plugin context.
+
+        The hook functions are provided by the plugins for the function and
+        config (see :meth:`Plugin.compile_hook`). Hooks that are not
+        implemented by any of the plugins, or for which the plugins do not
+        provide a hook function, are left out of the pipeline.
+
+        :param hooks:
+            A sequence of (hook, monitor_field) tuples. When monitor_field
+            is None, the hook function of all plugins is called (like
+            :meth:`call_all` does). Otherwise, the hook is handled
+            like :meth:`call_one` does.
+        :param dict config:
+            The method config, flattened as a dict.
+        :param function function:
+            The function that is wrapped by Flask-Micron.
+
+        :returns:
+            A list of functions that take a plugin context as argument.
+        """
+        pipeline = []
+        for hook, monitor_field in hooks:
+            hook_functions = [
+                _compile_hook(plugin, hook, hook_function, function, config)
+                for plugin, hook_function
+                in self._hook_functions.get(hook, [])
+            ]
+            hook_functions = [f for f in hook_functions if f is not None]
+            if monitor_field is None or len(hook_functions) < 2:
+                pipeline.extend(hook_functions)
+            else:
+                pipeline.append(
+                    _create_call_one(hook_functions, monitor_field))
+        return pipeline
+
     def __len__(self):
         return len(self._plugins)
 
@@ -522,10 +612,14 @@ class Compiler(object):
             for plugin_name, plugin_function in PLUGIN_METHODS.items()
             if name == plugin_name and base_function != plugin_function
         ]
-        hooks = {}
-        for name, hook_function in hook_functions:
-            hooks[name] = self._create_hook_function_call(hook_function)
-        return hooks
+        # Hook functions are used as-is. Bound methods and plain functions
+        # can be called directly using a plugin context as argument, so
+        # wrapping them would only add call overhead. Only coroutine
+        # functions are wrapped, to run them until completion.
+        return dict(
+            (name, _make_sync(hook_function))
+            for name, hook_function in hook_functions
+        )
 
     def _extract_functions(self, plugin):
         if isinstance(plugin, dict):
@@ -543,10 +637,31 @@ class Compiler(object):
             ]
         return functions
 
-    def _create_hook_function_call(self, hook_function):
-        def _call(context):
-            return hook_function(context)
-        return _call
+
+def _compile_hook(plugin, hook, hook_function, function, config):
+    if isinstance(plugin, dict):
+        compile_hook = plugin.get('compile_hook', None)
+    else:
+        compile_hook = getattr(plugin, 'compile_hook', None)
+    if compile_hook is None:
+        return hook_function
+    return _make_sync(compile_hook(hook, function, config))
+
+
+def _make_sync(hook_function):
+    if coroutine.is_coroutine_function(hook_function):
+        return coroutine.to_sync(hook_function)
+    return hook_function
+
+
+def _create_call_one(hook_functions, monitor_field):
+    hook_functions = tuple(reversed(hook_functions))
+    def _call_one(context):
+        for hook_function in hook_functions:
+            hook_function(context)
+            if context.is_assigned(monitor_field):
+                return
+    return _call_one
 
 
 PLUGIN_METHODS = dict((
@@ -554,9 +669,22 @@ PLUGIN_METHODS = dict((
     for (name, base_function)
     in Plugin.__dict__.items()
     if name[0] != '_' and inspect.isfunction(base_function)
+    and name != 'compile_hook'
 ))
 
 
+# The properties that are available in a plugin Context.
+CONTEXT_PROPERTIES = (
+    'function', 'config', 'input', 'output', 'error', 'response'
+)
+
+# The maximum number of released Context objects to keep per thread.
+MAX_FREE_CONTEXTS = 4
+
+_free_contexts = threading.local()
+_get = object.__getattribute__
+
+
 class Context(object):
     """The flask_micron.plugin.Context is used to store the data that is
     required for Micron during request processing. This data is initialized by
@@ -564,64 +692,93 @@ class Context(object):
 
     For information on the data that are stored in this object, take
     a look at :ref:`user_plugins_context`.
-    """
 
-    @property
-    def function(self):
-        """The function that is wrapped as a MicronMethod."""
-        return self._data.get('function', None)
-    @function.setter
-    def function(self, value):
-        self._data['function'] = value
-
-    @property
-    def config(self):
-        """The configuration for the MicronMethod, flattened as a dict.
+    The context properties are stored in slots. A property to which no
+    value was assigned yet, simply has an empty slot. Reading such a
+    property returns None.
+
+    Plugins can store their own request specific state as extra attributes
+    on the context (e.g. ``ctx.my_state``). Unlike the context properties,
+    reading such an attribute before it was assigned raises an
+    AttributeError.
+
+    Context objects can be reused, by using :meth:`acquire` to get a
+    context and :meth:`release` to hand it back when the request
+    has been handled.
+
+    .. attribute:: function
+
+        The function that is wrapped as a MicronMethod.
+
+    .. attribute:: config
+
+        The configuration for the MicronMethod, flattened as a dict.
         (see: :ref:`user_plugins_configurable`)
-        """
-        return self._data.get('config', None)
-    @config.setter
-    def config(self, value):
-        self._data['config'] = value
-
-    @property
-    def input(self):
-        """The input data for the function (the `Flask`_ ``Request``
+
+    .. attribute:: input
+
+        The input data for the function (the `Flask`_ ``Request``
         translated into a Python data structure).
-        """
-        return self._data.get('input', None)
-    @input.setter
-    def input(self, value):
-        self._data['input'] = value
-
-    @property
-    def output(self):
-        """The return value of the function."""
-        return self._data.get('output', None)
-    @output.setter
-    def output(self, value):
-        self._data['output'] = value
-
-    @property
-    def error(self):
-        """The exception object, in case an unhandled exception is
+
+    .. attribute:: output
+
+        The return value of the function.
+
+    .. attribute:: error
+
+        The exception object, in case an unhandled exception is
         raised during the request handling.
+
+    .. attribute:: response
+
+        The `Flask`_ ``Response`` object to return to the caller.
+    """
+
+    # The __dict__ slot holds the extra attributes that plugins assign.
+    __slots__ = CONTEXT_PROPERTIES + ('__dict__',)
+
+    def __getattr__(self, name):
+        # Only called for empty slots and for unknown attributes.
+        if name in CONTEXT_PROPERTIES:
+            return None
+        raise AttributeError(
+            "'Context' object has no attribute '%s'" % name)
+
+    @classmethod
+    def acquire(cls):
+        """Returns a Context object from the free list for the current
+        thread. When the free list is empty, a new Context is created.
+
+        :returns:
+            A Context object without any assigned properties.
         """
-        return self._data.get('error', None)
-    @error.setter
-    def error(self, value):
-        self._data['error'] = value
-
-    @property
-    def response(self):
-        """The `Flask`_ ``Response`` object to return to the caller."""
-        return self._data.get('response', None)
-    @response.setter
-    def response(self, value):
-        self._data['response'] = value
-
-    def __init__(self):
-        self._data = {}
+        free = getattr(_free_contexts, 'contexts', None)
+        if free:
+            return free.pop()
+        return cls()
+
+    def release(self):
+        """Resets the Context and adds it to the free list for the current
+        thread, so it can be reused by :meth:`acquire`.
+
+        The Context must not be used anymore after releasing it.
+        """
+        self.reset()
+        free = getattr(_free_contexts, 'contexts', None)
+        if free is None:
+            free = _free_contexts.contexts = []
+        if len(free) < MAX_FREE_CONTEXTS:
+            free.append(self)
+
+    def reset(self):
+        """Unassigns all context properties and removes the extra
+        attributes that were assigned by plugins."""
+        for property_name in CONTEXT_PROPERTIES:
+            try:
+                delattr(self, property_name)
+            except AttributeError:
+                pass
+        self.__dict__.clear()
 
     def is_assigned(self, property_name):
         """Checks whether or not a value was actively assigned to
@@ -641,4 +798,8 @@ class Context(object):
         :returns:
             True if a value was assigned, False otherwise.
         """
-        return property_name in self._data
+        try:
+            _get(self, property_name)
+            return True
+        except AttributeError:
+            return False
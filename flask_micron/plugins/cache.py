@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""This plugin caches the responses of Micron methods.
+
+It is meant for pure methods: methods for which the output only depends
+on the input. When such a method is called with the same input again,
+the response is served from the cache, without calling the method and
+without serializing its output.
+
+Mode of operation
+-----------------
+
+Caching is enabled for a method by setting the ``cache_ttl`` option.
+For methods that do not use caching, the plugin does not add any hooks
+to the request handling.
+
+The cache key is derived from the Micron method and a hash of the
+normalized input (``ctx.input``), in which the order of the keys in dicts
+does not matter. Optionally, the cache can be scoped to the session or to
+the user (see the ``cache_scope`` option below). Access checks are always
+performed, also when the response is served from the cache.
+
+* When the cache contains an entry for the key, then the plugin provides
+  the response early on, using the serialized response data from the
+  cache. The function is not called and the request handling continues
+  with the ``process_response`` hook. ``ctx.output`` is set to
+  a :any:`CachedOutput` object.
+* Otherwise, the function is called and its response is created as usual.
+  After that, the serialized response data are stored in the cache.
+  Only successful, non-streaming responses are stored.
+
+When a method is called from a batch request, then a cache hit provides
+the cached output to the batch.
+
+When the ``etag`` option is enabled (see :ref:`plugins_json_output`),
+then the ETag is stored along with the response data, and responses that
+are served from the cache honour the ``If-None-Match`` header as well.
+
+Entries are removed from the cache when they expire (``cache_ttl``) and,
+least recently used first, when the cache grows beyond its maximum
+number of entries or bytes. Entries can also be invalidated by tag.
+Every method has a cache of its own.
+
+Configuration options
+---------------------
+
+**cache_ttl**: number of seconds (default = None)
+    The time to live for cached responses. Caching is enabled for a
+    method by setting this option.
+
+**cache_max_entries**: int (default = 1000)
+    The maximum number of responses to cache for the method.
+
+**cache_max_bytes**: int (default = None)
+    The maximum total size of the cached response data for the method.
+    By default, there is no maximum.
+
+**cache_scope**: None, 'session' or a function (default = None)
+    By default, cached responses are shared between all clients.
+    When set to 'session', the cached responses are only shared between
+    requests that use the same session data. When set to a function,
+    this function is called with the plugin context as its argument.
+    Cached responses are then shared between requests for which this
+    function returns the same value, e.g. the id of the logged in user.
+
+**cache_tags**: list of strings or a function (default = None)
+    The tags to assign to the cached responses. When set to a function,
+    this function is called with the input as its argument and it must
+    return the list of tags. Cached responses can be invalidated by tag,
+    using ``micron.cache.invalidate(tag)``.
+
+Example::
+
+    @micron.method(cache_ttl=60, cache_max_entries=10000,
+                   cache_tags=lambda input: ['product:%s' % input])
+    def get_product(product_id):
+        return database.get_product(product_id)
+
+    @micron.method()
+    def update_product(product):
+        database.update_product(product)
+        micron.cache.invalidate('product:%s' % product['id'])
+
+Members
+-------
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from flask import session
+from flask_micron.codec import CodecRegistry
+from flask_micron.encoder import EncoderRegistry
+from flask_micron.errors import ImplementationError
+from flask_micron.plugins.json_output import create_json_response
+from flask_micron import plugin
+
+try:
+    from time import monotonic as _now
+except ImportError:
+    from time import time as _now
+
+
+DEFAULT_MAX_ENTRIES = 1000
+
+_CANONICAL_SEPARATORS = (',', ':')
+
+
+class Plugin(plugin.Plugin):
+    """A plugin to cache the responses of Micron methods."""
+
+    def __init__(self, codecs=None, encoders=None):
+        """
+        :param CodecRegistry codecs:
+            The registry to get the JSON codec from, for providing cached
+            output to batch requests. When not provided, a registry with
+            the default codecs is used.
+        :param EncoderRegistry encoders:
+            The registry of encoders, used for hashing the input. An
+            encoder for :any:`CachedOutput` is added to it. When not
+            provided, a registry with the default encoders is used.
+        """
+        self.codecs = CodecRegistry() if codecs is None else codecs
+        self.encoders = EncoderRegistry() if encoders is None else encoders
+        self.encoders.register(CachedOutput, self._decode)
+        self._caches = {}
+
+    def compile_hook(self, hook, function, config):
+        """Leaves the cache out of the request pipeline for methods that
+        do not use caching. For methods that do, the cache is set up.
+        """
+        ttl = config.get('cache_ttl', None)
+        if not ttl:
+            return None
+        scope = config.get('cache_scope', None)
+        if scope not in (None, 'session') and not callable(scope):
+            raise ImplementationError(
+                "Unsupported cache_scope '%s' used (supported scopes are "
+                "None, 'session' or a function)" % scope)
+        if hook == 'call_function':
+            self._set_up_cache(function, (
+                ttl,
+                config.get('cache_max_entries', DEFAULT_MAX_ENTRIES),
+                config.get('cache_max_bytes', None)))
+        return getattr(self, hook)
+
+    def invalidate(self, *tags):
+        r"""Removes the cached responses that have been assigned one
+        or more of the provided tags.
+
+        :param \*tags:
+            The tags to invalidate.
+        """
+        for cache in list(self._caches.values()):
+            cache.invalidate(tags)
+
+    def clear(self):
+        """Removes all cached responses."""
+        for cache in list(self._caches.values()):
+            cache.clear()
+
+    def call_function(self, ctx):
+        """Looks up the response in the cache. When a cached response is
+        found, it is provided as the response for the request. Otherwise,
+        the cache key is kept in ``ctx.cache_pending``, for storing the
+        response.
+        """
+        cache = self._caches.get(ctx.function, None)
+        if cache is None:
+            return
+        key = _create_key(ctx, self.encoders.encode)
+        entry = cache.get(key)
+        if entry is None:
+            ctx.cache_pending = (cache, key)
+        else:
+            ctx.output = CachedOutput(entry)
+            ctx.response = create_json_response(
+                entry.data, ctx.config,
+                content_type=entry.content_type, etag=entry.etag)
+
+    def process_response(self, ctx):
+        """Stores the response data in the cache."""
+        pending = getattr(ctx, 'cache_pending', None)
+        ctx.cache_pending = None
+        if pending is None or ctx.error is not None:
+            return
+        response = ctx.response
+        if response.status_code != 200 or response.is_streamed:
+            return
+        (cache, key) = pending
+        (etag, _) = response.get_etag()
+        cache.put(key, _Entry(
+            response.get_data(), response.content_type, etag,
+            _get_tags(ctx)))
+
+    def end_request(self, ctx):
+        """Forgets the cache key for requests that did not produce
+        a response, e.g. the calls in a batch request."""
+        ctx.cache_pending = None
+
+    def _set_up_cache(self, function, settings):
+        # The pipeline is compiled more than once for a method, e.g. when
+        # plugins are added. The existing cache is kept, unless the
+        # cache settings were changed.
+        cache = self._caches.get(function, None)
+        if cache is None or cache.settings != settings:
+            self._caches[function] = _Cache(*settings)
+
+    def _decode(self, output):
+        return self.codecs.get().loads(output.entry.data)
+
+
+class CachedOutput(object):
+    """The output for a request that is served from the cache.
+    It refers to the cached, serialized response data."""
+
+    __slots__ = ('entry',)
+
+    def __init__(self, entry):
+        self.entry = entry
+
+
+def _create_key(ctx, encode):
+    """Creates the cache key: a hash of the input, which does not depend
+    on the order of the keys in dicts, and of the cache scope."""
+    scope = ctx.config.get('cache_scope', None)
+    if scope is None:
+        key_data = ctx.input
+    elif scope == 'session':
+        key_data = [ctx.input, dict(session)]
+    else:
+        key_data = [ctx.input, scope(ctx)]
+    canonical = json.dumps(
+        key_data, sort_keys=True, separators=_CANONICAL_SEPARATORS,
+        default=encode)
+    return hashlib.sha1(canonical.encode('utf-8')).digest()
+
+
+def _get_tags(ctx):
+    tags = ctx.config.get('cache_tags', None)
+    if callable(tags):
+        tags = tags(ctx.input)
+    return tuple(tags) if tags else ()
+
+
+class _Entry(object):
+    __slots__ = (
+        'data', 'content_type', 'etag', 'tags', 'expires', 'variants')
+
+    def __init__(self, data, content_type, etag, tags):
+        self.data = data
+        self.content_type = content_type
+        self.etag = etag
+        self.tags = tags
+        self.expires = None
+        # Derived versions of the data (e.g. compressed), which can be
+        # stored here by other plugins.
+        self.variants = {}
+
+
+class _Cache(object):
+    """The cache for a single Micron method, which keeps its entries in
+    least recently used order."""
+
+    def __init__(self, ttl, max_entries, max_bytes):
+        self.settings = (ttl, max_entries, max_bytes)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            if entry.expires <= _now():
+                self._forget(key, entry)
+                return None
+            self._entries[key] = entry
+            return entry
+
+    def put(self, key, entry):
+        if self.max_bytes is not None and len(entry.data) > self.max_bytes:
+            return
+        entry.expires = _now() + self.ttl
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self.size += len(entry.data)
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self.size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._forget(key, entry)
+
+    def _forget(self, key, entry):
+        self.size -= len(entry.data)
+        for tag in entry.tags:
+            keys = self._tags.get(tag, None)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
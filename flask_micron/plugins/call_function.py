@@ -62,12 +62,89 @@ Below are the possible scenarios.
 
 For other scenarios, appropriate exceptions will be raised.
 
+The function can also be a coroutine function (``async def``). It is
+then run until completion, using the event loop that Flask-Micron manages
+for the current thread (see :mod:`flask_micron.coroutine`).
+
+With the ``executor`` option set to 'process', the function is called in
+a worker process instead (see :mod:`flask_micron.executor`). The input
+conversion and batching that are described below still take place within
+the request handling, so only the call itself is moved to the worker.
+
+**The single argument is annotated with a type**
+
+.. code:: python
+
+    @micron.method()
+    def the_function(arg: MyDataclass):
+        ...
+
+| When the argument is annotated with a dataclass, a ``NamedTuple`` or
+| a ``TypedDict`` (or a list or dict of these), then ``ctx.input`` is
+| converted into that type before the function is called.
+| See :mod:`flask_micron.convert` for the details.
+
+**The function handles a batch of inputs**
+
+.. code:: python
+
+    @micron.method(batch=True, max_batch=64, max_wait_ms=5)
+    def the_function(inputs):
+        ...
+
+| The inputs of concurrent requests are collected and the function is
+| called once with the list of inputs. It must return a list with an output
+| for every input. See :mod:`flask_micron.microbatch` for the details.
+| A ``None`` input is only accepted when the argument has a default value.
+| When the argument is annotated with ``List[T]``, every input is
+| converted into T before it is added to the batch.
+
+The function signature is inspected only once, when the function is
+decorated using ``@micron.method()``. A function with an unsupported
+signature results in an ``ImplementationError`` at that point. Based on
+the signature and on the type annotation for the argument, a call strategy
+is compiled for the function, which is used to call the function during
+request handling.
+
+Configuration options
+---------------------
+
+**batch**: True/False (default = False)
+    Whether or not to call the function for a batch of inputs.
+
+**max_batch**: int (default = 64)
+    The maximum number of inputs in a batch.
+
+**max_wait_ms**: number (default = 5)
+    The maximum time in milliseconds to wait for more inputs, before
+    the function is called for a batch.
+
+**executor**: None or 'process' (default = None)
+    By default, the function is called from the thread that handles the
+    request. When set to 'process', the function is called in a pool of
+    worker processes, which is useful for CPU-bound functions.
+    See :mod:`flask_micron.executor` for the details.
+
+**executor_workers**: int (default = the number of CPUs)
+    The number of worker processes in the pool, when the 'process'
+    executor is used.
+
 Members
 -------
 """
 
 import inspect
+import threading
 from flask_micron import plugin
+from flask_micron import coroutine
+from flask_micron.convert import compile_converter
+from flask_micron.convert import get_argument_annotation
+from flask_micron.convert import get_list_item_type
+from flask_micron.executor import check_executor
+from flask_micron.executor import to_process
+from flask_micron.microbatch import Batcher
+from flask_micron.microbatch import DEFAULT_MAX_BATCH
+from flask_micron.microbatch import DEFAULT_MAX_WAIT_MS
 from flask_micron.errors import MicronClientError
 from flask_micron.errors import ImplementationError
 
@@ -76,11 +153,161 @@ class Plugin(plugin.Plugin):
     """This plugin calls the function that is wrapped by Flask-Micron,
     using the input data as prepared in the context.
     """
+    def __init__(self):
+        self._calls = {}
+        self._batchers = {}
+        self._batchers_lock = threading.Lock()
+
+    def compile_hook(self, hook, function, config):
+        """Compiles the call strategy for the wrapped function."""
+        if function is None:
+            return self.call_function
+        return self._compile(function, config)
+
     def call_function(self, ctx):
-        signature = _check_function_signature(ctx.function)
-        _check_input(signature, ctx.input)
-        output = _call_function(ctx.function, signature, ctx.input)
-        ctx.output = output
+        call = self._calls.get(ctx.function, None)
+        if call is None:
+            call = self._compile(ctx.function, ctx.config or {})
+            self._calls[ctx.function] = call
+        call(ctx)
+
+    def _compile(self, function, config):
+        if not config.get('batch', False):
+            return _compile_call(function, config)
+        return _compile_batch_call(function, self._get_batcher(
+            function, config))
+
+    def _get_batcher(self, function, config):
+        # The pipeline is compiled more than once for a method (e.g. for
+        # requests and for calls from a batch request). These all share
+        # the same Batcher, unless the settings were changed.
+        settings = (
+            config.get('max_batch', DEFAULT_MAX_BATCH),
+            config.get('max_wait_ms', DEFAULT_MAX_WAIT_MS),
+            config.get('executor', None),
+            config.get('executor_workers', None))
+        with self._batchers_lock:
+            (current_settings, batcher) = self._batchers.get(
+                function, (None, None))
+            if batcher is None or current_settings != settings:
+                batcher = Batcher(
+                    _create_runner(function, config),
+                    settings[0], settings[1])
+                self._batchers[function] = (settings, batcher)
+            return batcher
+
+
+def takes_input(function):
+    """Checks whether or not a function takes an argument for the input.
+
+    :param function function:
+        The function to check.
+
+    :returns:
+        True when the function takes an argument, False otherwise.
+    """
+    (wants_input, _) = _check_function_signature(function)
+    return wants_input
+
+
+def _compile_call(function, config):
+    """Compiles the call strategy for a function, based on its signature.
+
+    :param function function:
+        The function for which to compile the call strategy.
+    :param dict config:
+        The method configuration, which defines how to run the function.
+
+    :returns:
+        A function that takes a plugin context as its argument. It calls
+        the function using ``ctx.input`` and stores the return value
+        in ``ctx.output``.
+    """
+    (wants_input, has_default) = _check_function_signature(function)
+    convert = None
+    if wants_input:
+        convert = compile_converter(get_argument_annotation(function))
+    function = _create_runner(function, config)
+    if not wants_input:
+        return _create_no_arg_call(function)
+    if convert is not None:
+        function = _create_converting_call(function, convert)
+    if has_default:
+        return _create_optional_arg_call(function)
+    return _create_required_arg_call(function)
+
+
+def _compile_batch_call(function, batcher):
+    """Compiles the call strategy for a function that handles a batch of
+    inputs. The inputs are passed on to the Batcher, which calls the
+    function."""
+    (wants_input, has_default) = _check_function_signature(function)
+    if not wants_input:
+        raise ImplementationError(
+            "A Micron method that uses the batch option must take "
+            "an argument for the list of inputs")
+    annotation = get_argument_annotation(function)
+    convert = None
+    if annotation is not None:
+        item_type = get_list_item_type(annotation)
+        if item_type is not None:
+            convert = compile_converter(item_type)
+        elif compile_converter(annotation) is not None:
+            raise ImplementationError(
+                "The argument of a Micron method that uses the batch option "
+                "must be annotated with List[T] for input conversion")
+
+    def _call(ctx):
+        data = ctx.input
+        if data is None:
+            if not has_default:
+                raise MissingInput()
+        elif convert is not None:
+            data = convert(data)
+        ctx.output = batcher.call(data)
+    return _call
+
+
+def _create_runner(function, config):
+    """Wraps the function into a regular function that runs it, using
+    the configured executor."""
+    executor = config.get('executor', None)
+    check_executor(executor)
+    if executor == 'process':
+        return to_process(function, config.get('executor_workers', None))
+    if coroutine.is_coroutine_function(function):
+        return coroutine.to_sync(function)
+    return function
+
+
+def _create_no_arg_call(function):
+    def _call(ctx):
+        if ctx.input is not None:
+            raise UnexpectedInput()
+        ctx.output = function()
+    return _call
+
+
+def _create_converting_call(function, convert):
+    def _call(data):
+        return function(convert(data))
+    return _call
+
+
+def _create_required_arg_call(function):
+    def _call(ctx):
+        data = ctx.input
+        if data is None:
+            raise MissingInput()
+        ctx.output = function(data)
+    return _call
+
+
+def _create_optional_arg_call(function):
+    def _call(ctx):
+        data = ctx.input
+        ctx.output = function() if data is None else function(data)
+    return _call
 
 
 def _check_function_signature(function):
@@ -140,22 +367,6 @@ def _inspect_signature(function):
         return inspect.getargspec(function)
 
 
-def _check_input(signature, data):
-    (wants_input, has_default) = signature
-    if wants_input and data is None and not has_default:
-        raise MissingInput()
-    if not wants_input and data is not None:
-        raise UnexpectedInput()
-
-
-def _call_function(function, signature, data):
-    (wants_input, _) = signature
-    if not wants_input or data is None:
-        return function()
-    else:
-        return function(data)
-
-
 class MissingInput(MicronClientError):
     """The requested method requires input, but no input was
     provided by the client."""
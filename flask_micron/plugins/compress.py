@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""This plugin compresses the responses of Micron methods.
+
+Mode of operation
+-----------------
+
+Compression is enabled for a method by setting the ``compress`` option.
+For methods that do not use compression, the plugin does not add any hooks
+to the request handling.
+
+A response is compressed when all of the following conditions are met:
+
+* the response is successful (status 200) and it is not streamed
+* the response body is at least ``compress_min_size`` bytes long
+* the client accepts gzip or deflate, according to the ``Accept-Encoding``
+  header of the request (when both are accepted, the encoding with the
+  highest preference is used)
+
+The compressed response gets a ``Content-Encoding`` header. A strong ETag
+(see :ref:`plugins_json_output`) is changed into a weak ETag, since the
+body is no longer the body that the ETag was computed for. Responses that
+can be compressed get ``Accept-Encoding`` in their ``Vary`` header, so
+HTTP caches will not serve a compressed response to clients that do not
+accept it.
+
+When a response is served from the cache (see :ref:`plugins_cache`), then
+its compressed body is stored along with the cached response, so the same
+response data do not have to be compressed again. Note that the compressed
+bodies do not count for the ``cache_max_bytes`` option.
+
+This plugin handles the ``process_response`` hook after the other bundled
+plugins. Plugins that are added to Micron later on therefore get to see
+the compressed response.
+
+Configuration options
+---------------------
+
+**compress**: True/False (default = False)
+    Whether or not to compress the responses.
+
+**compress_min_size**: int (default = 1024)
+    The minimum size of a response body in bytes, for compressing it.
+    Compressing small bodies costs more time than it saves.
+
+**compress_level**: int from 1 to 9 (default = 6)
+    The compression level to use. 1 is the fastest, 9 gives the best
+    compression.
+
+Example::
+
+    @micron.method(compress=True, compress_level=9)
+    def large_report():
+        ...
+
+Members
+-------
+"""
+
+import zlib
+from flask import request
+from flask_micron.plugins.cache import CachedOutput
+from flask_micron import plugin
+
+
+DEFAULT_MIN_SIZE = 1024
+
+DEFAULT_LEVEL = 6
+
+ENCODINGS = ('gzip', 'deflate')
+
+# The zlib window bits for the encodings: 31 produces the gzip format,
+# 15 produces the zlib format, which is what HTTP calls deflate.
+_WBITS = {'gzip': 31, 'deflate': 15}
+
+
+class Plugin(plugin.Plugin):
+    """A plugin to compress the responses of Micron methods."""
+
+    def compile_hook(self, hook, function, config):
+        """Leaves the plugin out of the request pipeline for methods that
+        do not use compression."""
+        if not config.get('compress', False):
+            return None
+        return self.process_response
+
+    def process_response(self, ctx):
+        """Compresses the response, when applicable."""
+        response = ctx.response
+        if response.status_code != 200 or response.is_streamed or \
+           'Content-Encoding' in response.headers:
+            return
+        data = response.get_data()
+        if len(data) < ctx.config.get('compress_min_size', DEFAULT_MIN_SIZE):
+            return
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+        if encoding is None:
+            return
+        level = ctx.config.get('compress_level', DEFAULT_LEVEL)
+        response.set_data(_get_compressed(ctx.output, data, encoding, level))
+        response.headers['Content-Encoding'] = encoding
+        (etag, weak) = response.get_etag()
+        if etag is not None and not weak:
+            response.set_etag(etag, weak=True)
+
+
+def _get_compressed(output, data, encoding, level):
+    """Returns the compressed data. For output that is served from the
+    cache, the compressed data are stored in the cache entry."""
+    if not isinstance(output, CachedOutput):
+        return _compress(data, encoding, level)
+    variant = (encoding, level)
+    compressed = output.entry.variants.get(variant, None)
+    if compressed is None:
+        compressed = _compress(data, encoding, level)
+        output.entry.variants[variant] = compressed
+    return compressed
+
+
+def _compress(data, encoding, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    return compressor.compress(data) + compressor.flush()
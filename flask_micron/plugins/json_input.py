@@ -4,7 +4,10 @@
 Mode of operation
 -----------------
 
-The POST body is read from the incoming `Flask`_ request.
+The POST body is read from the incoming `Flask`_ request. For a GET
+request (only accepted for read-only methods, see :any:`Micron.method`),
+the JSON data are read from the ``input`` query parameter instead,
+e.g. ``GET /hello?input=%22World%22``.
 
 * When this body contains a valid JSON string, it is deserialized and
   stored in ``ctx.input``.
@@ -12,41 +15,440 @@ The POST body is read from the incoming `Flask`_ request.
   input string), then ``ctx.input`` is set to ``None``.
 * When invalid data is provided, a ``NonJsonInput`` exception is raised.
 
+A POST body that is compressed using gzip or deflate (as indicated by the
+``Content-Encoding`` request header) is decompressed transparently. For
+deflate, both the zlib format and raw deflate data are accepted. The
+compressed body is read from the request stream and decompressed chunk by
+chunk, so the full compressed body is never buffered next to the
+decompressed body. When the decompressed body grows beyond
+``max_decompressed_size`` bytes, an ``InputTooLarge`` exception is raised,
+which protects the server against decompression bombs. Other content
+encodings result in an ``UnsupportedContentEncoding`` exception.
+
+For methods that take no arguments, ``ctx.input`` is set to ``None`` and
+only a check is done to see if the client provided input anyway, in which
+case an ``UnexpectedInput`` exception is raised. An empty POST body does
+not have to be read for this, since the ``Content-Length`` header tells
+that it is empty. At most 64 bytes of the body are read (after
+decompression for a compressed body) and the body is accepted when it
+contains no input: only whitespace, a JSON ``null`` or a string that is
+normalized into ``None`` (e.g. ``""``, see :ref:`plugins_normalize_input`).
+Longer bodies are rejected without reading the rest of them, even when they
+would not contain any input. When the ``Content-Length`` header tells that
+an uncompressed body is longer, it is rejected without reading it at all.
+
 Note: ``ctx`` refers to a :ref:`plugin context <user_plugins_context>`.
 
+Configuration options
+---------------------
+
+**stream_input**: True/False (default = False)
+    Whether or not to read the POST body directly from the request stream.
+    By default, the body is read using Flask's ``request.get_data()``, which
+    caches the full body in the request. When streaming is enabled, the
+    body is read from ``request.stream`` in chunks and it is not cached,
+    so ``request.get_data()`` will not provide it afterwards. This reduces
+    the memory footprint for large POST bodies.
+
+**input_chunk_size**: int (default = 65536)
+    The number of bytes to read from the request stream at once,
+    when ``stream_input`` is enabled or when the POST body is compressed.
+
+**max_decompressed_size**: int (default = 16777216)
+    The maximum size in bytes of a compressed POST body after
+    decompression. Set to None to allow any size.
+
+**max_input_bytes**: int (default = None)
+    The maximum size in bytes of the POST body (or of the ``input`` query
+    parameter for GET requests). The ``Content-Length`` of the request is
+    checked before the body is read, so an oversized body is rejected
+    without reading it. For a compressed body, this is the size before
+    decompression.
+
+**max_depth**: int (default = None)
+    The maximum nesting depth of lists and dicts in the input. A list
+    of strings has depth 1, a list of lists of strings has depth 2.
+
+**max_items**: int (default = None)
+    The maximum total number of items in all lists and dicts in the input.
+
+When one of these limits is exceeded, an ``InputTooLarge`` or
+``InputTooDeep`` exception is raised. The depth and items limits are
+checked by the ``normalize_input`` hook of this plugin, which runs before
+the (recursive) input normalization. This way, the limits also apply to
+the input of the calls in a batch request (see :mod:`flask_micron.batch`),
+for which the input is not read by this plugin.
+
+**json_codec**: string (default = 'flask')
+    The name of the JSON codec to use for deserializing the POST body.
+    See :mod:`flask_micron.codec` for the available codecs.
+
+**normalize_while_decoding**: True/False (default = False)
+    Whether or not to normalize the input while decoding it, instead of
+    in a separate pass (see :ref:`plugins_normalize_input`). When the input
+    was normalized, ``ctx.input_normalized`` is set to True, which tells
+    the normalize_input plugin not to normalize the input again.
+
+Example::
+
+    @micron.method(stream_input=True, max_input_bytes=10000000,
+                   max_depth=2, max_items=100000)
+    def bulk_import(rows):
+        ...
+
 Members
 -------
 """
 
-from flask import json
+import zlib
 from flask import request
 from flask_micron.errors import MicronClientError
+from flask_micron.codec import CodecRegistry
+from flask_micron.plugins.call_function import takes_input
+from flask_micron.plugins.call_function import UnexpectedInput
+from flask_micron.plugins.normalize_input import create_decoding_normalizer
+from flask_micron.plugins.normalize_input import normalize
 from flask_micron import plugin
-from flask_micron.compat import is_string
+
+
+DEFAULT_INPUT_CHUNK_SIZE = 65536
+
+DEFAULT_MAX_DECOMPRESSED_SIZE = 16 * 1024 * 1024
+
+QUERY_INPUT_PARAMETER = 'input'
+
+# The zlib window bits for the supported content encodings: 31 reads the
+# gzip format, 15 reads the zlib format, which is what HTTP calls deflate.
+_WBITS = {'gzip': 31, 'x-gzip': 31, 'deflate': 15}
+
+# The zlib window bits for reading raw deflate data (without the zlib
+# header), which many clients send for the deflate content encoding.
+_RAW_DEFLATE_WBITS = -15
+
+# The maximum size of a POST body that is read for checking that a method
+# without arguments did not get any input. This leaves room for a JSON
+# null value, surrounded by some whitespace.
+_MAX_NO_INPUT_BYTES = 64
+
+# The maximum size of a compressed POST body that is read for that check.
+# Compressed data can be padded (e.g. with empty deflate blocks), so the
+# decompressed size alone does not limit the number of bytes that is read.
+_MAX_NO_INPUT_COMPRESSED_BYTES = 1024
 
 
 class Plugin(plugin.Plugin):
     """A plugin to read the input for the Micron method from the request."""
 
+    def __init__(self, codecs=None):
+        """
+        :param CodecRegistry codecs:
+            The registry to get the JSON codec from. When not provided,
+            a registry with the default codecs is used.
+        """
+        self.codecs = CodecRegistry() if codecs is None else codecs
+
+    def compile_hook(self, hook, function, config):
+        """Checks the configured JSON codec, so an unknown codec is
+        reported when the method is decorated, instead of on the first
+        request. For methods that do not take input, a hook function is
+        returned that avoids reading and parsing the input.
+
+        The ``normalize_input`` hook is left out when no input limits
+        are configured.
+        """
+        if hook == 'normalize_input':
+            if function is not None and (
+                    not takes_input(function) or
+                    _get_shape_limits(config) is None):
+                return None
+            return self.normalize_input
+        self.codecs.get(config.get('json_codec', None))
+        if function is not None and not takes_input(function):
+            return self.check_no_input
+        return self.read_input
+
+    def check_no_input(self, ctx):
+        """Checks that no input was provided, for methods that do not
+        take input. Sets ``ctx.input`` to None."""
+        if request.method == 'GET':
+            self.read_input(ctx)
+            data = ctx.input
+        else:
+            content_length = request.content_length
+            if content_length == 0:
+                ctx.input = None
+                return
+            encoding = _get_content_encoding()
+            # For chunked or compressed bodies, the size of the input
+            # cannot be told up front.
+            if content_length is not None and \
+               content_length > _MAX_NO_INPUT_BYTES and encoding is None:
+                raise UnexpectedInput()
+            codec = self.codecs.get(ctx.config.get('json_codec', None))
+            data = _parse(_read_no_input_body(encoding), codec)
+        if data is not None and normalize(data, ctx.config) is not None:
+            raise UnexpectedInput()
+        ctx.input = None
+
     def read_input(self, ctx):
         """Reads the input data and stores it in the plugin context."""
-        ctx.input = None
-        post_body = request.get_data()
+        config = ctx.config
+        codec = self.codecs.get(config.get('json_codec', None))
+        max_bytes = config.get('max_input_bytes', None)
+        normalizer = None
+        if config.get('normalize_while_decoding', False) and \
+           codec.supports_object_hook:
+            normalizer = create_decoding_normalizer(config)
+        if request.method == 'GET':
+            query_input = request.args.get(QUERY_INPUT_PARAMETER, None)
+            if query_input is not None:
+                _check_size(len(query_input), max_bytes)
+            ctx.input = _parse(query_input, codec, normalizer)
+        else:
+            ctx.input = _parse(
+                _read_body(config, codec, max_bytes), codec, normalizer)
+        if normalizer is not None:
+            ctx.input_normalized = True
 
-        if post_body is None:
-            return
+    def normalize_input(self, ctx):
+        """Checks the input against the ``max_depth`` and ``max_items``
+        limits, before the input is normalized."""
+        limits = _get_shape_limits(ctx.config)
+        if limits is not None:
+            _check_shape(ctx.input, *limits)
+
+
+def _read_body(config, codec, max_bytes):
+    """Reads the POST body. When a maximum input size is configured, the
+    Content-Length of the request is checked before the body is read.
+    Without a Content-Length (chunked transfer encoding), the size is
+    checked while reading the request stream."""
+    content_length = request.content_length
+    if content_length is not None:
+        _check_size(content_length, max_bytes)
+    chunk_size = config.get('input_chunk_size', DEFAULT_INPUT_CHUNK_SIZE)
+    encoding = _get_content_encoding()
+    if encoding is not None:
+        max_size = config.get(
+            'max_decompressed_size', DEFAULT_MAX_DECOMPRESSED_SIZE)
+        return _read_compressed_stream(
+            chunk_size, codec, encoding, max_size, max_bytes)
+    if config.get('stream_input', False) or (
+            max_bytes is not None and content_length is None):
+        return _read_stream(chunk_size, codec, max_bytes)
+    return request.get_data()
 
-        if isinstance(post_body, bytes):
-            post_body = post_body.decode('utf-8')
 
-        if is_string(post_body) and post_body.strip() == "":
+def _get_content_encoding():
+    """Returns the content encoding of the POST body, or None when the
+    body is not encoded."""
+    encoding = request.headers.get('Content-Encoding', None)
+    if encoding is None:
+        return None
+    encoding = encoding.strip().lower()
+    if encoding in ('', 'identity'):
+        return None
+    if encoding not in _WBITS:
+        raise UnsupportedContentEncoding(encoding)
+    return encoding
+
+
+def _read_chunks(chunk_size, max_bytes):
+    """Reads the POST body from the request stream, in chunks of at most
+    chunk_size bytes, until the total size exceeds max_bytes."""
+    size = 0
+    while True:
+        chunk = request.stream.read(chunk_size)
+        if not chunk:
             return
+        size += len(chunk)
+        _check_size(size, max_bytes)
+        yield chunk
+
+
+def _read_stream(chunk_size, codec, max_bytes=None):
+    """Reads the POST body from the request stream. When the codec parses
+    bytes directly, the raw body is returned. Otherwise, the body is
+    returned as a decoded string and the raw body is released when this
+    function returns, so it is not kept in memory while the JSON data are
+    parsed."""
+    body = bytearray()
+    for chunk in _read_chunks(chunk_size, max_bytes):
+        body.extend(chunk)
+    return body if codec.binary else body.decode('utf-8')
+
+
+def _read_compressed_stream(
+        chunk_size, codec, encoding, max_size, max_bytes=None):
+    """Like _read_stream(), but every chunk that is read from the request
+    stream is decompressed before it is added to the body. When the
+    decompressed body exceeds max_size bytes, reading is aborted."""
+    decompressor = _Decompressor(encoding)
+    body = bytearray()
+    try:
+        for chunk in _read_chunks(chunk_size, max_bytes):
+            if max_size is None:
+                body.extend(decompressor.decompress(chunk))
+            else:
+                # Decompressing is limited to one byte more than allowed,
+                # which is enough to tell that the body is too large.
+                remaining = max_size - len(body)
+                data = decompressor.decompress(chunk, remaining + 1)
+                if len(data) > remaining:
+                    raise InputTooLarge({'max_decompressed_size': max_size})
+                body.extend(data)
+            if decompressor.eof:
+                break
+    except zlib.error:
+        raise NonJsonInput()
+    if not decompressor.eof:
+        raise NonJsonInput()
+    return body if codec.binary else body.decode('utf-8')
+
+
+def _read_no_input_body(encoding):
+    """Reads the POST body for a method that does not take input. When the
+    body (after decompression) is longer than _MAX_NO_INPUT_BYTES, reading
+    is aborted and an UnexpectedInput exception is raised."""
+    decompressor = None
+    if encoding is not None:
+        decompressor = _Decompressor(encoding)
+    body = bytearray()
+    size = 0
+    while True:
+        chunk = request.stream.read(_MAX_NO_INPUT_BYTES + 1)
+        if not chunk:
+            break
+        if decompressor is not None:
+            size += len(chunk)
+            if size > _MAX_NO_INPUT_COMPRESSED_BYTES:
+                raise UnexpectedInput()
+            try:
+                chunk = decompressor.decompress(
+                    chunk, _MAX_NO_INPUT_BYTES + 1 - len(body))
+            except zlib.error:
+                raise NonJsonInput()
+        body.extend(chunk)
+        if len(body) > _MAX_NO_INPUT_BYTES:
+            raise UnexpectedInput()
+    if decompressor is not None and not decompressor.eof:
+        raise NonJsonInput()
+    return bytes(body)
+
+
+class _Decompressor(object):
+    """Decompresses a POST body chunk by chunk. For the deflate content
+    encoding, both the zlib format and raw deflate data are accepted: when
+    the body does not start with a zlib header, it is read as raw deflate
+    data. This requires the first two bytes of the body, so these are held
+    back until they are available."""
+
+    def __init__(self, encoding):
+        self._encoding = encoding
+        self._decompressor = None
+        self._head = b''
+        if encoding != 'deflate':
+            self._decompressor = zlib.decompressobj(_WBITS[encoding])
+
+    @property
+    def eof(self):
+        """True when the end of the compressed data has been reached."""
+        return self._decompressor is not None and self._decompressor.eof
+
+    def decompress(self, data, max_length=0):
+        """Decompresses a chunk of data, like zlib's decompress()."""
+        if self._decompressor is None:
+            data = self._head + data
+            if len(data) < 2:
+                self._head = data
+                return b''
+            self._head = b''
+            self._decompressor = zlib.decompressobj(
+                _WBITS[self._encoding] if _is_zlib_header(data)
+                else _RAW_DEFLATE_WBITS)
+        return self._decompressor.decompress(data, max_length)
+
+
+def _is_zlib_header(data):
+    """Checks if the data start with a zlib header: the deflate compression
+    method, and a checksum over the first two bytes."""
+    (cmf, flg) = bytearray(data[:2])
+    return cmf & 0x0f == 8 and (cmf * 256 + flg) % 31 == 0
 
+
+def _check_size(size, max_bytes):
+    if max_bytes is not None and size > max_bytes:
+        raise InputTooLarge({'max_input_bytes': max_bytes})
+
+
+def _get_shape_limits(config):
+    max_depth = config.get('max_depth', None)
+    max_items = config.get('max_items', None)
+    if max_depth is None and max_items is None:
+        return None
+    return (max_depth, max_items)
+
+
+def _check_shape(data, max_depth, max_items):
+    """Checks the nesting depth of the containers in the input data and
+    the total number of items that they hold. This is done iteratively,
+    so a deeply nested input cannot exhaust the Python stack."""
+    items = 0
+    pending = [(data, 1)]
+    while pending:
+        (value, depth) = pending.pop()
+        if isinstance(value, dict):
+            values = value.values()
+        elif isinstance(value, list):
+            values = value
+        else:
+            continue
+        if max_depth is not None and depth > max_depth:
+            raise InputTooDeep({'max_depth': max_depth})
+        items += len(values)
+        if max_items is not None and items > max_items:
+            raise InputTooLarge({'max_items': max_items})
+        depth += 1
+        for item in values:
+            if isinstance(item, (dict, list)):
+                pending.append((item, depth))
+
+
+def _parse(post_body, codec, normalizer=None):
+    """Deserializes the POST body. The body is passed to the codec as-is,
+    so a codec that parses bytes directly can do so without first
+    creating a decoded copy of the body. When a normalizer is provided,
+    the data are normalized while decoding."""
+    if not post_body or post_body.isspace():
+        return None
+
+    if normalizer is None:
         try:
-            ctx.input = json.loads(post_body)
+            return codec.loads(post_body)
         except Exception:
             raise NonJsonInput()
 
+    (object_hook, finish) = normalizer
+    try:
+        data = codec.loads(post_body, object_hook)
+    except Exception:
+        raise NonJsonInput()
+    return finish(data)
+
 
 class NonJsonInput(MicronClientError):
     """The POST body for the request did not contain valid JSON data."""
+
+
+class InputTooLarge(MicronClientError):
+    """The input for the request exceeds the maximum allowed size."""
+
+
+class InputTooDeep(MicronClientError):
+    """The input for the request contains data structures that are nested
+    deeper than the maximum allowed depth."""
+
+
+class UnsupportedContentEncoding(MicronClientError):
+    """The POST body for the request uses a content encoding that is not
+    supported (supported are gzip and deflate)."""
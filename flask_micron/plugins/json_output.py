@@ -1,6 +1,4 @@
 # -*- coding: utf-8 -*-
-#pylint: disable=too-many-return-statements
-
 """This plugin produces a JSON response for a request.
 
 Mode of operation
@@ -12,15 +10,94 @@ by the wrapped function. This data is serialized into JSON.
 The JSON data is put in a `Flask`_ ``Response`` object, which is stored
 in ``ctx.response``.
 
+Values of types that the JSON codec cannot serialize by itself (e.g.
+datetime, Decimal, UUID, set or dataclass instances) are serialized using
+the encoders from ``micron.encoders``. Encoders for other types can be
+added to this registry. See :mod:`flask_micron.encoder` for more
+information.
+
+Streaming output
+----------------
+
+When the wrapped function returns a generator (or another type of
+iterator), then the output is not serialized in one go. Instead, a
+streaming response is created, which serializes and sends the items from
+the iterator one by one, as they are produced. This keeps memory use
+bounded for large outputs and it lets the first data go out immediately.
+
+Note that the items are produced after the ``end_request`` hook was
+called. When an exception is raised while producing the items, the
+stream is ended with an error item, containing the same error data
+that is returned for failing regular requests.
+
+Configuration options
+---------------------
+
+**stream_format**: 'ndjson' or 'array' (default = 'ndjson')
+    The format to use for streaming output. 'ndjson' produces
+    newline-delimited JSON (content type ``application/x-ndjson``), in which
+    every item is serialized on its own line. An error is sent as a final
+    line ``{"error": {...}}``. 'array' produces a regular JSON array
+    (content type ``application/json``), which is written incrementally.
+    An error is sent as a final array item ``{"error": {...}}``.
+
+**json_codec**: string (default = 'flask')
+    The name of the JSON codec to use for serializing the output.
+    See :mod:`flask_micron.codec` for the available codecs.
+
+**http_cache**: number of seconds or a string (default = None)
+    Enables caching of the responses for GET requests by browsers and proxy
+    servers, by adding a ``Cache-Control`` header to successful responses.
+    When set to a number, the header is ``public, max-age=<number>``.
+    When set to a string, that string is used as the header value, e.g.
+    ``private, max-age=10``. Setting this option makes the method accept
+    GET requests (see :any:`Micron.method`).
+
+**http_vary**: list of strings (default = None)
+    The names of request headers to add to the ``Vary`` header of
+    responses to GET requests, for methods that use ``http_cache``.
+    Use this when the output depends on request headers.
+
+**etag**: True/False (default = False)
+    Whether or not to add a strong ``ETag`` header to successful responses.
+    The ETag is a hash of the serialized output. When the client sends
+    a matching ``If-None-Match`` header, then an empty response with status
+    304 (Not Modified) is returned instead, so the client can reuse the
+    response data that it already has. Streaming output gets no ETag.
+
+**pretty_output**: True/False (default = None)
+    Whether or not to pretty print the JSON output, using indentation
+    and newlines. By default, the output is pretty printed only when the
+    Flask app runs in debug mode. Otherwise, compact JSON output is
+    produced. Streaming output is never pretty printed.
+
+Example::
+
+    @micron.method(stream_format='array')
+    def all_the_rows():
+        for row in database.query_all_rows():
+            yield row
+
 Members
 -------
 """
 
-from datetime import datetime
-from datetime import timedelta
-from flask import json
+import hashlib
+import sys
+from flask import current_app
+from flask import has_app_context
+from flask import has_request_context
+from flask import request
+from flask import stream_with_context
 from flask.wrappers import Response
+from flask_micron.codec import CodecRegistry
+from flask_micron.compat import Iterator
+from flask_micron.compat import is_string
+from flask_micron.encoder import EncoderRegistry
+from flask_micron.errors import MicronError
 from flask_micron.errors import ImplementationError
+from flask_micron.errors import UnhandledException
+from flask_micron.method import create_error_output
 from flask_micron import plugin
 
 
@@ -28,26 +105,148 @@ class Plugin(plugin.Plugin):
     """A plugin to create the response for a Micron method as a
     JSON-serialized message.
     """
+    def __init__(self, codecs=None, encoders=None):
+        """
+        :param CodecRegistry codecs:
+            The registry to get the JSON codec from. When not provided,
+            a registry with the default codecs is used.
+        :param EncoderRegistry encoders:
+            The registry of encoders for types that the JSON codec cannot
+            serialize by itself. When not provided, a registry with the
+            default encoders is used.
+        """
+        self.codecs = CodecRegistry() if codecs is None else codecs
+        self.encoders = EncoderRegistry() if encoders is None else encoders
+
+    def compile_hook(self, hook, function, config):
+        """Checks the configured JSON codec, so an unknown codec is
+        reported when the method is decorated, instead of on the first
+        request. HTTP cache headers are only processed for methods
+        that use them.
+        """
+        self.codecs.get(config.get('json_codec', None))
+        if hook == 'process_response':
+            if config.get('http_cache', None) is None:
+                return None
+            return self.process_response
+        return self.create_response
+
     def create_response(self, ctx):
         """Serialize the Micron method output as JSON data and create the
         Flask Response object.
         """
-        ctx.response = Response(
-            json.dumps(ctx.output, indent=2, default=_serializer_hook),
-            status=200 if ctx.error is None else 500,
-            content_type="application/json"
+        config = ctx.config or {}
+        codec = self.codecs.get(config.get('json_codec', None))
+        if isinstance(ctx.output, Iterator):
+            ctx.response = _create_stream_response(
+                ctx.output, config, codec, self.encoders.encode)
+            return
+        indent = 2 if _is_pretty_output(config) else None
+        ctx.response = create_json_response(
+            codec.dumps(ctx.output, self.encoders.encode, indent=indent),
+            config,
+            status=200 if ctx.error is None else 500
         )
 
+    def process_response(self, ctx):
+        """Adds the HTTP cache headers to successful responses
+        for GET requests."""
+        if request.method != 'GET' or ctx.error is not None:
+            return
+        response = ctx.response
+        if response.status_code not in (200, 304):
+            return
+        http_cache = ctx.config['http_cache']
+        if is_string(http_cache):
+            response.headers['Cache-Control'] = http_cache
+        else:
+            response.headers['Cache-Control'] = \
+                'public, max-age=%d' % http_cache
+        for header in ctx.config.get('http_vary', None) or ():
+            response.vary.add(header)
+
+
+def create_json_response(data, config, status=200,
+                         content_type="application/json", etag=None):
+    """Creates the Flask Response object for serialized output data.
+
+    When the ``etag`` option is enabled in the config and the status is 200,
+    the ETag header is added to the response. When the ETag matches the
+    ``If-None-Match`` header of the request, then an empty response with
+    status 304 (Not Modified) is returned instead.
+
+    :param bytes data:
+        The serialized output data.
+    :param dict config:
+        The method config.
+    :param int status:
+        The HTTP status code for the response.
+    :param string content_type:
+        The content type for the response.
+    :param string etag:
+        The ETag for the data. When not provided, but needed, it is
+        computed from the data.
+
+    :returns:
+        The Flask Response object.
+    """
+    if status != 200 or not config.get('etag', False):
+        return Response(data, status=status, content_type=content_type)
+    if etag is None:
+        etag = hashlib.sha1(data).hexdigest()
+    if has_request_context() and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(data, status=status, content_type=content_type)
+    response.set_etag(etag)
+    return response
+
+
+def _is_pretty_output(config):
+    pretty_output = config.get('pretty_output', None)
+    if pretty_output is None:
+        return has_app_context() and current_app.debug
+    return pretty_output
+
+
+def _create_stream_response(output, config, codec, encode):
+    stream_format = config.get('stream_format', 'ndjson')
+    if stream_format == 'ndjson':
+        stream = _stream_ndjson(output, codec, encode)
+        content_type = "application/x-ndjson"
+    elif stream_format == 'array':
+        stream = _stream_array(output, codec, encode)
+        content_type = "application/json"
+    else:
+        raise ImplementationError(
+            "Unsupported stream_format '%s' used (supported formats are "
+            "'ndjson' and 'array')" % stream_format)
+    if has_request_context():
+        stream = stream_with_context(stream)
+    return Response(stream, status=200, content_type=content_type)
+
+
+def _stream_ndjson(output, codec, encode):
+    for item in _stream_items(output):
+        yield codec.dumps(item, encode) + b"\n"
+
+
+def _stream_array(output, codec, encode):
+    separator = b"["
+    for item in _stream_items(output):
+        yield separator + codec.dumps(item, encode)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
 
-def _serializer_hook(value):
-    if isinstance(value, datetime):
-        return value.isoformat()
-    if isinstance(value, timedelta):
-        return str(value)
-    if isinstance(value, bytes):
-        return value.decode('utf-8')
-    if isinstance(value, str):
-        return value
-    raise ImplementationError(
-        "Unsupported type '%s' used in response data "
-        "(no support for JSON serializing this type)" % type(value).__name__)
+def _stream_items(output):
+    """Yields the items from the output iterator. When producing the items
+    fails, the error is yielded as a final error item."""
+    try:
+        for item in output:
+            yield item
+    except Exception:
+        (_, error, traceback_) = sys.exc_info()
+        if not isinstance(error, MicronError):
+            error = UnhandledException(error)
+        yield {'error': create_error_output(error, traceback_)}
@@ -17,7 +17,11 @@ Normalization is applied to:
   - strings
   - dicts (recursively)
   - lists (recursively)
-  
+
+Dicts and lists are normalized in place, so no copy of the input data
+is created. Nested data are walked iteratively, which means that there
+is no limit on the nesting depth of the input data.
+
 Configuration options
 ---------------------
 
@@ -30,6 +34,23 @@ Configuration options
 **make_empty_strings_none**: True/False (default = True)
     Whether or not empty strings must be normalized to None.
 
+**normalize_while_decoding**: True/False (default = False)
+    Whether or not to normalize the input while the JSON data are decoded
+    (see :ref:`plugins_json_input`), instead of in a separate pass over
+    the decoded data afterwards. This is only done for JSON codecs that
+    support an object hook (json, flask and simplejson). For other codecs,
+    this option is ignored. The normalized data are the same either way.
+    Since the object hook is a Python function that is called for every
+    JSON object, this is not necessarily faster than a separate pass.
+    Use ``benchmarks/normalization.py`` to compare both approaches.
+
+    The plugin that reads the input tells this plugin that the input was
+    normalized while decoding it, by setting the extra context attribute
+    ``ctx.input_normalized`` to True (see :ref:`user_plugins_context`).
+    When this attribute is not set, the input is normalized as usual. So a
+    plugin that replaces the ``read_input`` hook of the json_input plugin
+    does not have to do anything for this.
+
 Example::
 
     @micron.method(
@@ -44,47 +65,164 @@ Members
 -------
 """
 from flask_micron import plugin
-from flask_micron.compat import is_string
+from flask_micron.compat import STRING_TYPES
+from flask_micron.plugins.call_function import takes_input
+
+
+_CONTAINER_TYPES = (dict, list)
+
+# While decoding, the object hook normalizes every dict. The dicts that
+# are nested inside other data are then already normalized.
+_LIST_TYPES = (list,)
 
 
 class Plugin(plugin.Plugin):
     """An input normalization plugin for Micron.  """
 
+    def compile_hook(self, hook, function, config):
+        """Leaves normalization out of the request pipeline when it
+        is disabled by the configuration.
+        """
+        if _get_settings(config) is None:
+            return None
+        if function is not None and not takes_input(function):
+            return None
+        return self.normalize_input
+
     def normalize_input(self, ctx):
         """Normalizes input data.
 
+        The input is not normalized again, when it was normalized while
+        decoding it. The plugin that reads the input indicates this by
+        setting ``ctx.input_normalized`` to True.
+
         :param ctx:
             The plugin context, containing the data to normalize.
         """
-        if ctx.config.get('normalize', True):
-            strip_strings = ctx.config.get('strip_strings', True)
-            make_empty_none = ctx.config.get('make_empty_strings_none', True)
-            ctx.input = _normalize(ctx.input, strip_strings, make_empty_none)
+        if getattr(ctx, 'input_normalized', False):
+            return
+        settings = _get_settings(ctx.config)
+        if settings is not None:
+            ctx.input = _normalize(ctx.input, *settings)
+
+
+def normalize(data, config):
+    """Normalizes data, using the normalization options from the
+    configuration. Lists and dicts are normalized in place.
+
+    :param data:
+        The data to normalize.
+    :param dict config:
+        The configuration for the Micron method.
+
+    :returns:
+        The normalized data.
+    """
+    settings = _get_settings(config)
+    if settings is None:
+        return data
+    return _normalize(data, *settings)
+
+
+def create_decoding_normalizer(config):
+    """Creates the functions for normalizing input data while the data
+    are decoded, for the ``normalize_while_decoding`` option.
+
+    :param dict config:
+        The configuration for the Micron method.
+
+    :returns:
+        None when normalization is disabled by the configuration.
+        Otherwise, a tuple (object_hook, finish). The object_hook must be
+        passed on to the JSON codec, to normalize the decoded dicts.
+        The finish function must be called with the decoded data. It
+        normalizes the data that are not inside a dict and it returns
+        the normalized data. The caller must then set
+        ``ctx.input_normalized`` to True, so the data are not normalized
+        again by the normalize_input hook.
+    """
+    settings = _get_settings(config)
+    if settings is None:
+        return None
+    (strip_strings, make_empty_none) = settings
+
+    def object_hook(data):
+        for (key, value) in data.items():
+            if isinstance(value, STRING_TYPES):
+                if strip_strings:
+                    value = value.strip()
+                if make_empty_none and value == "":
+                    value = None
+                data[key] = value
+            elif isinstance(value, list):
+                _normalize_containers(
+                    value, strip_strings, make_empty_none, _LIST_TYPES)
+        return data
 
+    def finish(data):
+        if isinstance(data, STRING_TYPES):
+            data = _normalize_string(data, strip_strings, make_empty_none)
+        elif isinstance(data, list):
+            _normalize_containers(
+                data, strip_strings, make_empty_none, _LIST_TYPES)
+        return data
 
-def _normalize(data, strip_strings, make_empty_none):
+    return (object_hook, finish)
+
+
+def _get_settings(config):
+    """Returns the normalization settings (strip_strings,
+    make_empty_none), or None when normalization is disabled."""
+    if not config.get('normalize', True):
+        return None
+    strip_strings = config.get('strip_strings', True)
+    make_empty_none = config.get('make_empty_strings_none', True)
     if not strip_strings and not make_empty_none:
-        return data
+        return None
+    return (strip_strings, make_empty_none)
 
-    if data is None:
-        return data
 
-    if is_string(data):
-        if strip_strings:
-            data = data.strip()
-        if make_empty_none:
-            data = None if data == "" else data
+def _normalize(data, strip_strings, make_empty_none):
+    """Normalizes the data. Lists and dicts are normalized in place.
+    Nested lists and dicts are handled iteratively, so deeply nested data
+    cannot exhaust the Python stack."""
+    if not strip_strings and not make_empty_none:
+        return data
 
-    elif isinstance(data, dict):
-        data = dict([
-            (k, _normalize(data[k], strip_strings, make_empty_none))
-            for k in data.keys()
-        ])
+    if isinstance(data, STRING_TYPES):
+        return _normalize_string(data, strip_strings, make_empty_none)
+    if isinstance(data, _CONTAINER_TYPES):
+        _normalize_containers(
+            data, strip_strings, make_empty_none, _CONTAINER_TYPES)
+    return data
 
-    elif isinstance(data, list):
-        data = [
-            _normalize(v, strip_strings, make_empty_none)
-            for v in data
-        ]
 
+def _normalize_containers(data, strip_strings, make_empty_none, nested_types):
+    """Normalizes the strings in a dict or list in place, including the
+    strings in nested containers of the nested_types."""
+    pending = [data]
+    while pending:
+        container = pending.pop()
+        if isinstance(container, dict):
+            items = container.items()
+        else:
+            items = enumerate(container)
+        # Assigning to existing keys does not change the size of the
+        # dict, so the dict can be modified while iterating over it.
+        for (key, value) in items:
+            if isinstance(value, STRING_TYPES):
+                if strip_strings:
+                    value = value.strip()
+                if make_empty_none and value == "":
+                    value = None
+                container[key] = value
+            elif isinstance(value, nested_types):
+                pending.append(value)
+
+
+def _normalize_string(data, strip_strings, make_empty_none):
+    if strip_strings:
+        data = data.strip()
+    if make_empty_none and data == "":
+        data = None
     return data
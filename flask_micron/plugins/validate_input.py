@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""This plugin validates the input for Micron methods against a schema.
+
+Mode of operation
+-----------------
+
+Validation is enabled for a method by setting the ``schema`` option.
+For methods that do not have a schema, the plugin does not add any hooks
+to the request handling.
+
+The schema is compiled into a validation function once, when the method
+is decorated, so the schema is not interpreted on every request.
+A schema that cannot be compiled results in an ``ImplementationError``
+at that point.
+
+The validation is done on the normalized input (see
+:ref:`plugins_normalize_input`). Note that normalization turns empty
+strings into ``None``, so allow for ``"null"`` in the schema where empty
+strings are acceptable.
+
+When the input does not match the schema, an ``InvalidInput`` exception
+(see :mod:`flask_micron.errors`) is raised. Its details contain all
+violations that were found, each described by the path to the offending
+value (a JSON Pointer, e.g. ``/items/0/name``) and a message::
+
+    [
+        {"path": "/name", "message": "is required"},
+        {"path": "/items/0", "message": "must be of type integer"}
+    ]
+
+Schemas
+-------
+
+A schema is a dict, using a subset of `JSON Schema`_. The supported
+keywords are:
+
+* **type**: the type or a list of types to accept, out of "null",
+  "boolean", "integer", "number", "string", "array" and "object".
+* **enum**: a list of accepted values.
+* for strings: **minLength**, **maxLength** and **pattern** (a regular
+  expression that must match somewhere in the string).
+* for numbers: **minimum**, **maximum**, **exclusiveMinimum** and
+  **exclusiveMaximum**.
+* for arrays: **items** (the schema for all items), **minItems** and
+  **maxItems**.
+* for objects: **properties** (a dict of schemas per property),
+  **required** (a list of property names) and **additionalProperties**
+  (False to disallow other properties, or a schema for them).
+
+Like in JSON Schema, the keywords for a specific type are ignored for
+values of other types. Unknown keywords are not ignored: they result in
+an ``ImplementationError``.
+
+.. _JSON Schema: https://json-schema.org/
+
+Configuration options
+---------------------
+
+**schema**: dict (default = None)
+    The schema to validate the input against.
+
+Example::
+
+    @micron.method(schema={
+        'type': 'object',
+        'properties': {
+            'name': {'type': 'string', 'maxLength': 100},
+            'age': {'type': ['integer', 'null'], 'minimum': 0}
+        },
+        'required': ['name'],
+        'additionalProperties': False
+    })
+    def register(person):
+        ...
+
+Members
+-------
+"""
+
+import re
+from numbers import Integral
+from numbers import Number
+from flask_micron import plugin
+from flask_micron.compat import STRING_TYPES
+from flask_micron.errors import ImplementationError
+from flask_micron.errors import InvalidInput
+
+
+_TYPES = {
+    'null': lambda value: value is None,
+    'boolean': lambda value: isinstance(value, bool),
+    'integer': lambda value: (
+        isinstance(value, Integral) and not isinstance(value, bool)) or (
+            isinstance(value, float) and value.is_integer()),
+    'number': lambda value: (
+        isinstance(value, Number) and not isinstance(value, bool)),
+    'string': lambda value: isinstance(value, STRING_TYPES),
+    'array': lambda value: isinstance(value, list),
+    'object': lambda value: isinstance(value, dict),
+}
+
+_KEYWORDS = frozenset((
+    'type', 'enum',
+    'minLength', 'maxLength', 'pattern',
+    'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum',
+    'items', 'minItems', 'maxItems',
+    'properties', 'required', 'additionalProperties',
+    # Annotations, which do not affect validation.
+    'title', 'description', 'default', '$schema',
+))
+
+_violation = InvalidInput.violation
+
+_NUMBER_CHECKS = (
+    ('minimum', lambda value, limit: value >= limit, "must be >= %s"),
+    ('maximum', lambda value, limit: value <= limit, "must be <= %s"),
+    ('exclusiveMinimum', lambda value, limit: value > limit, "must be > %s"),
+    ('exclusiveMaximum', lambda value, limit: value < limit, "must be < %s"),
+)
+
+
+class Plugin(plugin.Plugin):
+    """A plugin to validate the input for Micron methods."""
+
+    def compile_hook(self, hook, function, config):
+        """Compiles the schema for the method into a validation function.
+        Leaves the plugin out of the request pipeline for methods that do
+        not have a schema."""
+        schema = config.get('schema', None)
+        if schema is None:
+            return None
+        return _create_hook_function(compile_schema(schema))
+
+    def validate_input(self, ctx):
+        """Validates the input against the schema from the config.
+        The request pipeline uses the validation function that is compiled
+        by :meth:`compile_hook` instead. This method is only used when
+        the hook is called directly."""
+        schema = ctx.config.get('schema', None)
+        if schema is not None:
+            _create_hook_function(compile_schema(schema))(ctx)
+
+
+def compile_schema(schema):
+    """Compiles a schema into a validation function.
+
+    :param dict schema:
+        The schema to compile.
+
+    :returns:
+        A function that takes the data to validate as its argument.
+        It returns a list of violations, which is empty when the data
+        are valid.
+
+    :raises ImplementationError:
+        When the schema cannot be compiled.
+    """
+    validate = _compile(schema, '#')
+
+    def validate_data(data):
+        violations = []
+        validate(data, (), violations)
+        return violations
+    return validate_data
+
+
+def _create_hook_function(validate_data):
+    def validate_input(ctx):
+        violations = validate_data(ctx.input)
+        if violations:
+            raise InvalidInput(violations)
+    return validate_input
+
+
+def _compile(schema, where):
+    """Compiles a (sub)schema into a function that takes the value to
+    validate, its path and the list to add violations to. The location
+    of the subschema is used for reporting errors in the schema."""
+    if not isinstance(schema, dict):
+        raise ImplementationError(
+            "Schema at %s must be a dict, not %s" % (
+                where, type(schema).__name__))
+    unknown = set(schema) - _KEYWORDS
+    if unknown:
+        raise ImplementationError(
+            "Schema at %s uses unsupported keyword(s): %s" % (
+                where, ", ".join(sorted(unknown))))
+
+    checks = []
+    checks.extend(_compile_enum(schema, where))
+    checks.extend(_compile_string_checks(schema, where))
+    checks.extend(_compile_number_checks(schema, where))
+    checks.extend(_compile_array_checks(schema, where))
+    checks.extend(_compile_object_checks(schema, where))
+    check_type = _compile_type(schema, where)
+
+    if check_type is None:
+        def validate(value, path, violations):
+            for check in checks:
+                check(value, path, violations)
+    else:
+        def validate(value, path, violations):
+            if check_type(value, path, violations):
+                for check in checks:
+                    check(value, path, violations)
+    return validate
+
+
+def _compile_type(schema, where):
+    if 'type' not in schema:
+        return None
+    names = schema['type']
+    if isinstance(names, STRING_TYPES):
+        names = [names]
+    for name in names:
+        if name not in _TYPES:
+            raise ImplementationError(
+                "Schema at %s uses unsupported type '%s'" % (where, name))
+    tests = tuple(_TYPES[name] for name in names)
+    message = "must be of type %s" % " or ".join(names)
+
+    def check_type(value, path, violations):
+        for test in tests:
+            if test(value):
+                return True
+        violations.append(_violation(path, message))
+        return False
+    return check_type
+
+
+def _compile_enum(schema, where):
+    if 'enum' not in schema:
+        return
+    allowed = list(schema['enum'])
+    message = "must be one of: %s" % ", ".join(repr(v) for v in allowed)
+
+    def check_enum(value, path, violations):
+        # bool is a subclass of int, so True would be equal to 1 otherwise.
+        for option in allowed:
+            if value == option and isinstance(value, bool) == \
+               isinstance(option, bool):
+                return
+        violations.append(_violation(path, message))
+    yield check_enum
+
+
+def _compile_string_checks(schema, where):
+    if 'minLength' in schema:
+        yield _compile_length_check(
+            schema, 'minLength', where, STRING_TYPES, _at_least,
+            "must be at least %d characters long")
+    if 'maxLength' in schema:
+        yield _compile_length_check(
+            schema, 'maxLength', where, STRING_TYPES, _at_most,
+            "must be at most %d characters long")
+    if 'pattern' in schema:
+        try:
+            search = re.compile(schema['pattern']).search
+        except (re.error, TypeError):
+            raise ImplementationError(
+                "Schema at %s uses an invalid pattern" % where)
+        message = "must match pattern %s" % schema['pattern']
+
+        def check_pattern(value, path, violations):
+            if isinstance(value, STRING_TYPES) and search(value) is None:
+                violations.append(_violation(path, message))
+        yield check_pattern
+
+
+def _compile_number_checks(schema, where):
+    for (keyword, test, message) in _NUMBER_CHECKS:
+        if keyword in schema:
+            limit = schema[keyword]
+            if not _TYPES['number'](limit):
+                raise ImplementationError(
+                    "Schema at %s: %s must be a number" % (where, keyword))
+            yield _compile_number_check(test, limit, message % limit)
+
+
+def _compile_number_check(test, limit, message):
+    def check_number(value, path, violations):
+        if isinstance(value, Number) and not isinstance(value, bool) and \
+           not test(value, limit):
+            violations.append(_violation(path, message))
+    return check_number
+
+
+def _compile_array_checks(schema, where):
+    if 'minItems' in schema:
+        yield _compile_length_check(
+            schema, 'minItems', where, list, _at_least,
+            "must contain at least %d items")
+    if 'maxItems' in schema:
+        yield _compile_length_check(
+            schema, 'maxItems', where, list, _at_most,
+            "must contain at most %d items")
+    if 'items' in schema:
+        validate_item = _compile(schema['items'], where + '/items')
+
+        def check_items(value, path, violations):
+            if isinstance(value, list):
+                for (index, item) in enumerate(value):
+                    validate_item(item, path + (index,), violations)
+        yield check_items
+
+
+def _compile_object_checks(schema, where):
+    properties = schema.get('properties', {})
+    if not isinstance(properties, dict):
+        raise ImplementationError(
+            "Schema at %s: properties must be a dict" % where)
+    validators = dict(
+        (name, _compile(subschema, '%s/properties/%s' % (where, name)))
+        for (name, subschema) in properties.items())
+    required = tuple(schema.get('required', ()))
+    additional = schema.get('additionalProperties', True)
+    if additional is True:
+        validate_additional = None
+    elif additional is False:
+        validate_additional = _reject_property
+    else:
+        validate_additional = _compile(
+            additional, where + '/additionalProperties')
+
+    if required:
+        def check_required(value, path, violations):
+            if isinstance(value, dict):
+                for name in required:
+                    if name not in value:
+                        violations.append(
+                            _violation(path + (name,), "is required"))
+        yield check_required
+
+    if validators or validate_additional is not None:
+        def check_properties(value, path, violations):
+            if not isinstance(value, dict):
+                return
+            for (name, item) in value.items():
+                validate = validators.get(name, validate_additional)
+                if validate is not None:
+                    validate(item, path + (name,), violations)
+        yield check_properties
+
+
+def _reject_property(value, path, violations):
+    violations.append(_violation(path, "is not allowed"))
+
+
+def _compile_length_check(schema, keyword, where, types, test, message):
+    limit = schema[keyword]
+    if not isinstance(limit, Integral) or isinstance(limit, bool):
+        raise ImplementationError(
+            "Schema at %s: %s must be an integer" % (where, keyword))
+    message = message % limit
+
+    def check_length(value, path, violations):
+        if isinstance(value, types) and not test(len(value), limit):
+            violations.append(_violation(path, message))
+    return check_length
+
+
+def _at_least(value, limit):
+    return value >= limit
+
+
+def _at_most(value, limit):
+    return value <= limit
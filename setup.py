@@ -74,6 +74,11 @@ setup(
     install_requires=[
         'Flask'
     ],
+    extras_require={
+        'orjson': ['orjson'],
+        'ujson': ['ujson'],
+        'simplejson': ['simplejson']
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Environment :: Web Environment',
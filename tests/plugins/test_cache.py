@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+from flask import session
+from flask_micron.errors import ImplementationError
+from flask_micron.plugins import cache
+from tests import MicronTestCase
+
+
+class Tests(MicronTestCase):
+
+    def setUp(self):
+        super(Tests, self).setUp()
+        self.calls = []
+        self.micron.batch()
+
+        @self.micron.method(
+            cache_ttl=60, cache_tags=lambda input: ['item:%s' % input])
+        def lookup(arg=None):
+            self.calls.append(arg)
+            return {'arg': arg, 'call': len(self.calls)}
+
+        @self.micron.method()
+        def uncached(arg=None):
+            self.calls.append(arg)
+            return len(self.calls)
+
+        @self.micron.method(cache_ttl=60, cache_max_entries=2)
+        def small(arg=None):
+            self.calls.append(arg)
+            return arg
+
+        @self.micron.method(cache_ttl=60, cache_scope='session')
+        def per_session():
+            self.calls.append(None)
+            return session.get('user', None)
+
+        @self.micron.method(cache_ttl=60)
+        def fail():
+            self.calls.append(None)
+            raise ValueError('No caching for me')
+
+        @self.micron.method(cache_ttl=60)
+        def boom(arg):
+            self.calls.append(arg)
+            raise ValueError('Boom')
+
+    def test_GivenSameInput_CachedResponseIsReturned(self):
+        first = self.request('/lookup', {'a': 1, 'b': 2})
+        second = self.request('/lookup', {'b': 2, 'a': 1})
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual('application/json', second.content_type)
+
+    def test_GivenNormalizedEquivalentInput_CachedResponseIsReturned(self):
+        self.request('/lookup', ' text ')
+        self.request('/lookup', 'text')
+        self.assertEqual(['text'], self.calls)
+
+    def test_GivenDifferentInput_FunctionIsCalled(self):
+        self.request('/lookup', 'a')
+        self.request('/lookup', 'b')
+        self.assertEqual(['a', 'b'], self.calls)
+
+    def test_GivenMethodWithoutCacheTtl_NoCachingIsDone(self):
+        self.request('/uncached', 'a')
+        self.request('/uncached', 'a')
+        self.assertEqual(2, len(self.calls))
+
+    def test_GivenMethodWithoutCacheTtl_NoHooksAreInPipeline(self):
+        (request_pipeline, _) = self.micron.methods['uncached'].pipeline
+        hooks = [getattr(f, '__self__', None) for f in request_pipeline]
+        self.assertNotIn(self.micron.cache, hooks)
+
+    def test_GivenError_ResponseIsNotCached(self):
+        self.request('/fail')
+        response = self.request('/fail')
+        self.assertEqual(2, len(self.calls))
+        self.assertEqual('UnhandledException', response.output['code'])
+
+    def test_GivenMoreThanMaxEntries_LeastRecentlyUsedIsEvicted(self):
+        self.request('/small', 'a')
+        self.request('/small', 'b')
+        self.request('/small', 'a')
+        self.request('/small', 'c')
+        self.request('/small', 'a')
+        self.request('/small', 'b')
+        self.assertEqual(['a', 'b', 'c', 'b'], self.calls)
+
+    def test_GivenInvalidatedTag_FunctionIsCalledAgain(self):
+        self.request('/lookup', 'a')
+        self.request('/lookup', 'b')
+        self.micron.cache.invalidate('item:a')
+        self.request('/lookup', 'a')
+        self.request('/lookup', 'b')
+        self.assertEqual(['a', 'b', 'a'], self.calls)
+
+    def test_GivenClear_FunctionIsCalledAgain(self):
+        self.request('/lookup', 'a')
+        self.micron.cache.clear()
+        self.request('/lookup', 'a')
+        self.assertEqual(['a', 'a'], self.calls)
+
+    def test_GivenSessionScope_CacheIsPerSession(self):
+        self.app.secret_key = 'test'
+        with self.editable_session() as sess:
+            sess['user'] = 'john'
+        self.assertEqual('john', self.request('/per_session').output)
+        self.assertEqual('john', self.request('/per_session').output)
+        with self.editable_session() as sess:
+            sess['user'] = 'jane'
+        self.assertEqual('jane', self.request('/per_session').output)
+        self.assertEqual(2, len(self.calls))
+
+    def test_GivenBatchCall_CachedOutputIsUsed(self):
+        self.request('/lookup', 'a')
+        response = self.request('/batch', [
+            {'method': 'lookup', 'input': 'a'},
+            {'method': 'lookup', 'input': 'b'},
+            {'method': 'lookup', 'input': 'b'},
+        ])
+        self.assertEqual([
+            {'output': {'arg': 'a', 'call': 1}},
+            {'output': {'arg': 'b', 'call': 2}},
+            {'output': {'arg': 'b', 'call': 3}},
+        ], response.output)
+
+
+    def test_GivenFailingBatchCall_NoResponseIsStoredForIt(self):
+        # With reused contexts, the next request gets the context of the
+        # failed batch call. A cache hit for that request must not store
+        # its response for the failed call.
+        self.micron.configure(pool_contexts=True)
+        self.request('/lookup', 1)
+        (output, _) = self.micron.methods['boom'].call_with_input(1)
+        self.assertEqual('UnhandledException', output['code'])
+        self.assertEqual(
+            {'arg': 1, 'call': 1}, self.request('/lookup', 1).output)
+        response = self.request('/boom', 1)
+        self.assertEqual(
+            'UnhandledException', response.output.get('code', None))
+        self.assertEqual([1, 1, 1], self.calls)
+
+
+class CacheTests(MicronTestCase):
+
+    def test_GivenExpiredEntry_EntryIsNotReturned(self):
+        store = cache._Cache(-1, 10, None)
+        store.put('key', cache._Entry(b'data', 'application/json', None, ()))
+        self.assertIsNone(store.get('key'))
+        self.assertEqual(0, len(store))
+        self.assertEqual(0, store.size)
+
+    def test_GivenMoreThanMaxBytes_LeastRecentlyUsedIsEvicted(self):
+        store = cache._Cache(60, 10, 10)
+        store.put('a', cache._Entry(b'12345', 'application/json', None, ()))
+        store.put('b', cache._Entry(b'12345', 'application/json', None, ()))
+        store.get('a')
+        store.put('c', cache._Entry(b'123', 'application/json', None, ()))
+        self.assertIsNotNone(store.get('a'))
+        self.assertIsNone(store.get('b'))
+        self.assertIsNotNone(store.get('c'))
+        self.assertEqual(8, store.size)
+
+    def test_GivenEntryLargerThanMaxBytes_EntryIsNotStored(self):
+        store = cache._Cache(60, 10, 4)
+        store.put('a', cache._Entry(b'12345', 'application/json', None, ()))
+        self.assertEqual(0, len(store))
+
+    def test_GivenUnsupportedScope_ExceptionIsRaisedOnDecoration(self):
+        with self.assertRaises(ImplementationError):
+            @self.micron.method(cache_ttl=60, cache_scope='planet')
+            def scoped():
+                pass
@@ -1,4 +1,8 @@
 # -*- coding: utf-8 -*-
+import threading
+from typing import List
+from typing import NamedTuple
+from flask import json
 from flask_micron.errors import ImplementationError
 from flask_micron import plugin
 from flask_micron.plugins.call_function import MissingInput
@@ -33,6 +37,31 @@ class Tests(MicronTestCase):
         with self.assertRaises(ImplementationError):
             _call_plugin(func_multipleargs, None)
 
+    def test_MultipleArgsFunction_NotOKWhenDecorating(self):
+        with self.assertRaises(ImplementationError):
+            self.decorate(func_multipleargs)
+
+    def test_CompiledHook_InputNone_NoArgFunction_OK(self):
+        self.assertEqual(True, _call_compiled(func_noargs, None))
+
+    def test_CompiledHook_InputNotNone_NoArgFunction_NotOK(self):
+        with self.assertRaises(UnexpectedInput):
+            _call_compiled(func_noargs, False)
+
+    def test_CompiledHook_InputNone_OneArgFunction_NotOK(self):
+        with self.assertRaises(MissingInput):
+            _call_compiled(func_onearg, None)
+
+    def test_CompiledHook_InputNotNone_OneArgFunction_OK(self):
+        self.assertEqual(False, _call_compiled(func_onearg, False))
+
+    def test_CompiledHook_InputNone_OneArgWithDefaultFunction_OK(self):
+        self.assertEqual(True, _call_compiled(func_oneargwithdefault, None))
+
+    def test_CompiledHook_InputNotNone_OneArgWithDefaultFunction_OK(self):
+        self.assertEqual(
+            False, _call_compiled(func_oneargwithdefault, False))
+
     def test_integration(self):
         # The 'call_function' plugin is loaded by default by Micron,
         # so we only need to setup a test method here.
@@ -43,6 +72,94 @@ class Tests(MicronTestCase):
         response = self.request('/echo', 'well ..well ..ell ..ll ..')
         self.assertEqual('well ..well ..ell ..ll ..', response.output)
 
+    def test_GivenAnnotatedArgument_InputIsConverted(self):
+        @self.micron.method()
+        def describe(point: Point):
+            return [type(point).__name__, point.x, point.y]
+
+        response = self.request('/describe', {'x': 1, 'y': 2})
+        self.assertEqual(['Point', 1, 2], response.output)
+
+    def test_GivenAnnotatedArgument_InvalidInputIsRaised(self):
+        @self.micron.method()
+        def describe(point: Point):
+            return point
+
+        response = self.request('/describe', {'x': 1, 'z': 2})
+        self.assertEqual('InvalidInput', response.output['code'])
+        self.assertEqual(
+            [{'path': '/z', 'message': 'is not allowed'}],
+            response.output['details'])
+
+    def test_GivenAnnotatedCoroutineFunction_InputIsConverted(self):
+        async def describe(point: Point):
+            return point.x + point.y
+
+        self.assertEqual(3, _call_compiled(describe, [1, 2]))
+
+    def test_GivenBatchOption_FunctionIsCalledWithListOfInputs(self):
+        def double(inputs):
+            return [value * 2 for value in inputs]
+
+        self.assertEqual(
+            4, _call_compiled(double, 2, batch=True, max_wait_ms=0))
+
+    def test_GivenBatchOption_NoArgFunction_NotOKWhenDecorating(self):
+        with self.assertRaises(ImplementationError):
+            self.decorate(func_noargs, batch=True)
+
+    def test_GivenBatchOption_InputNone_OneArgFunction_NotOK(self):
+        with self.assertRaises(MissingInput):
+            _call_compiled(func_onearg, None, batch=True, max_wait_ms=0)
+
+    def test_GivenBatchOption_InputNone_OneArgWithDefaultFunction_OK(self):
+        self.assertEqual([None], _call_compiled(
+            lambda inputs=None: [inputs], None, batch=True, max_wait_ms=0))
+
+    def test_GivenBatchOption_ListItemAnnotationIsUsedForConversion(self):
+        def describe(points: List[Point]):
+            return [type(point).__name__ for point in points]
+
+        self.assertEqual('Point', _call_compiled(
+            describe, [1, 2], batch=True, max_wait_ms=0))
+
+    def test_GivenBatchOption_NonListAnnotation_NotOKWhenDecorating(self):
+        def describe(point: Point):
+            return point
+
+        with self.assertRaises(ImplementationError):
+            self.decorate(describe, batch=True)
+
+    def test_GivenBatchOption_ConcurrentRequestsAreBatched(self):
+        calls = []
+
+        @self.micron.method(batch=True, max_batch=3, max_wait_ms=10000)
+        def double(inputs):
+            calls.append(len(inputs))
+            return [value * 2 for value in inputs]
+
+        outputs = {}
+
+        def request(value):
+            with self.app.test_client() as client:
+                outputs[value] = json.loads(
+                    client.post('/double', data=json.dumps(value)).data)
+
+        threads = [
+            threading.Thread(target=request, args=(value,))
+            for value in (1, 2, 3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({1: 2, 2: 4, 3: 6}, outputs)
+        self.assertEqual([3], calls)
+
+
+class Point(NamedTuple):
+    x: int
+    y: int = 0
+
 
 def _call_plugin(function, arg):
     ctx = plugin.Context()
@@ -52,6 +169,13 @@ def _call_plugin(function, arg):
     return ctx.output
 
 
+def _call_compiled(function, arg, **config):
+    ctx = plugin.Context()
+    ctx.input = arg
+    Plugin().compile_hook('call_function', function, config)(ctx)
+    return ctx.output
+
+
 def func_noargs():
     return True
 
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import gzip
+import io
+import zlib
+from flask import json
+from tests import MicronTestCase
+
+
+class Tests(MicronTestCase):
+
+    def setUp(self):
+        super(Tests, self).setUp()
+        self.calls = []
+
+        @self.micron.method(compress=True, compress_min_size=100, etag=True)
+        def large():
+            return ['item'] * 100
+
+        @self.micron.method(compress=True, compress_min_size=100)
+        def small():
+            return 'small'
+
+        @self.micron.method()
+        def uncompressed():
+            return ['item'] * 100
+
+        @self.micron.method(compress=True, compress_min_size=100,
+                            cache_ttl=60)
+        def cached():
+            self.calls.append(None)
+            return ['item'] * 100
+
+    def test_GivenGzipAccepted_ResponseIsGzipped(self):
+        response = self._post('/large', 'gzip')
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        data = gzip.GzipFile(fileobj=io.BytesIO(response.data)).read()
+        self.assertEqual(['item'] * 100, json.loads(data))
+
+    def test_GivenDeflatePreferred_ResponseIsDeflated(self):
+        response = self._post('/large', 'gzip;q=0.5, deflate')
+        self.assertEqual('deflate', response.headers['Content-Encoding'])
+        data = zlib.decompress(response.data)
+        self.assertEqual(['item'] * 100, json.loads(data))
+
+    def test_GivenNoAcceptEncoding_ResponseIsNotCompressed(self):
+        response = self._post('/large', None)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(['item'] * 100, json.loads(response.data))
+
+    def test_GivenSmallBody_ResponseIsNotCompressed(self):
+        response = self._post('/small', 'gzip')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_GivenNoCompressOption_ResponseIsNotCompressed(self):
+        response = self._post('/uncompressed', 'gzip')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_GivenCompressedResponse_EtagIsWeak(self):
+        response = self._post('/large', 'gzip')
+        (etag, weak) = response.get_etag()
+        self.assertTrue(weak)
+        response = self.client.post('/large', headers={
+            'Accept-Encoding': 'gzip',
+            'If-None-Match': response.headers['ETag']})
+        self.assertEqual(304, response.status_code)
+
+    def test_GivenCachedResponse_CompressedVariantIsCached(self):
+        self._post('/cached', 'gzip')
+        first = self._post('/cached', 'gzip')
+        function = self.micron.methods['cached'].function
+        entry = list(self.micron.cache._caches[function]._entries.values())[0]
+        self.assertEqual({('gzip', 6): first.data}, entry.variants)
+        second = self._post('/cached', 'gzip')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual(
+            b'[' + b','.join([b'"item"'] * 100) + b']',
+            zlib.decompress(second.data, 31))
+
+    def _post(self, path, accept_encoding):
+        headers = {}
+        if accept_encoding is not None:
+            headers['Accept-Encoding'] = accept_encoding
+        return self.client.post(path, headers=headers)
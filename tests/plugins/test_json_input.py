@@ -1,4 +1,13 @@
 # -*- coding: utf-8 -*-
+import io
+import zlib
+from flask import json
+from flask import request
+from flask_micron import plugin
+from flask_micron.errors import ImplementationError
+from flask_micron.plugins import json_input
+from flask_micron.plugins.json_input import InputTooLarge
+from flask_micron.plugins.call_function import UnexpectedInput
 from tests import MicronTestCase
 
 
@@ -30,3 +39,378 @@ class Tests(MicronTestCase):
     def _assertInputIsOutput(self, arg):
         response = self.request('/echo', arg)
         self.assertEqual(arg, response.output)
+
+
+class StreamInputTests(MicronTestCase):
+
+    def setUp(self):
+        super(StreamInputTests, self).setUp()
+        @self.micron.method(
+            normalize=False, stream_input=True, input_chunk_size=4)
+        def echo(arg=None):
+            return arg
+
+        @self.micron.method(stream_input=True)
+        def cached(arg):
+            return [arg, request.get_data().decode('utf-8')]
+
+    def test_GivenNone_NoneIsReturned(self):
+        self._assertInputIsOutput(None)
+
+    def test_GivenWhitespace_NoneIsReturned(self):
+        response = self.client.post('/echo', data=" \n\t ")
+        self.assertIsNone(json.loads(response.data))
+
+    def test_GivenEmptyBody_NoneIsReturned(self):
+        response = self.client.post('/echo', data="")
+        self.assertIsNone(json.loads(response.data))
+
+    def test_GivenJsonDict_DictIsReturned(self):
+        self._assertInputIsOutput({
+            'key1': ' value1 ',
+            'key2': u'€ uro',
+            'key3': [1, 2, 3]
+        })
+
+    def test_GivenInvalidJson_NonJsonInputIsRaised(self):
+        response = self.client.post('/echo', data="{invalid")
+        self.assertEqual('NonJsonInput', json.loads(response.data)['code'])
+
+    def test_BodyIsNotCachedInRequest(self):
+        response = self.request('/cached', 'data')
+        self.assertEqual(['data', ''], response.output)
+
+    def _assertInputIsOutput(self, arg):
+        response = self.request('/echo', arg)
+        self.assertEqual(arg, response.output)
+
+
+class CompressedInputTests(MicronTestCase):
+
+    def setUp(self):
+        super(CompressedInputTests, self).setUp()
+        @self.micron.method(normalize=False, input_chunk_size=16)
+        def echo(arg=None):
+            return arg
+
+        @self.micron.method(normalize=False, max_decompressed_size=100)
+        def limited(arg=None):
+            return arg
+
+        @self.micron.method(normalize=False, input_chunk_size=1)
+        def trickled(arg=None):
+            return arg
+
+    def test_GivenGzipBody_InputIsDecompressed(self):
+        response = self._post('/echo', ['gzip'] * 50, 'gzip')
+        self.assertEqual(['gzip'] * 50, json.loads(response.data))
+
+    def test_GivenDeflateBody_InputIsDecompressed(self):
+        response = self._post('/echo', {'key': u'€ uro'}, 'Deflate')
+        self.assertEqual({'key': u'€ uro'}, json.loads(response.data))
+
+    def test_GivenRawDeflateBody_InputIsDecompressed(self):
+        for path in ('/echo', '/trickled'):
+            response = self.client.post(
+                path, data=_compress(json.dumps(['raw'] * 50), 'raw'),
+                headers={'Content-Encoding': 'deflate'})
+            self.assertEqual(['raw'] * 50, json.loads(response.data), path)
+
+    def test_GivenDeflateBodyInSmallChunks_InputIsDecompressed(self):
+        response = self._post('/trickled', {'key': 'value'}, 'deflate')
+        self.assertEqual({'key': 'value'}, json.loads(response.data))
+
+    def test_GivenIdentityEncoding_InputIsReadAsIs(self):
+        response = self.client.post(
+            '/echo', data='"plain"', headers={'Content-Encoding': 'identity'})
+        self.assertEqual('plain', json.loads(response.data))
+
+    def test_GivenBodyWithinMaxSize_InputIsDecompressed(self):
+        response = self._post('/limited', 'x' * 98, 'gzip')
+        self.assertEqual('x' * 98, json.loads(response.data))
+
+    def test_GivenBodyLargerThanMaxSize_InputTooLargeIsRaised(self):
+        response = self._post('/limited', 'x' * 99, 'gzip')
+        self.assertEqual('InputTooLarge', json.loads(response.data)['code'])
+
+    def test_GivenCorruptBody_NonJsonInputIsRaised(self):
+        response = self.client.post(
+            '/echo', data=b'not gzipped', headers={'Content-Encoding': 'gzip'})
+        self.assertEqual('NonJsonInput', json.loads(response.data)['code'])
+
+    def test_GivenTruncatedBody_NonJsonInputIsRaised(self):
+        data = _compress(json.dumps('truncated'), 'gzip')[:-4]
+        response = self.client.post(
+            '/echo', data=data, headers={'Content-Encoding': 'gzip'})
+        self.assertEqual('NonJsonInput', json.loads(response.data)['code'])
+
+    def test_GivenUnsupportedEncoding_UnsupportedContentEncodingIsRaised(self):
+        response = self.client.post(
+            '/echo', data=b'"x"', headers={'Content-Encoding': 'br'})
+        self.assertEqual(
+            'UnsupportedContentEncoding', json.loads(response.data)['code'])
+
+    def _post(self, path, arg, encoding):
+        return self.client.post(
+            path, data=_compress(json.dumps(arg), encoding.lower()),
+            headers={'Content-Encoding': encoding})
+
+
+def _compress(data, encoding):
+    wbits = {'gzip': 31, 'deflate': 15, 'raw': -15}[encoding]
+    compressor = zlib.compressobj(9, zlib.DEFLATED, wbits)
+    return compressor.compress(data.encode('utf-8')) + compressor.flush()
+
+
+class LimitTests(MicronTestCase):
+
+    def setUp(self):
+        super(LimitTests, self).setUp()
+        self.calls = []
+
+        @self.micron.method(normalize=False, max_input_bytes=10)
+        def sized(arg=None):
+            return arg
+
+        @self.micron.method(normalize=False, max_input_bytes=10,
+                            stream_input=True, input_chunk_size=4)
+        def streamed(arg=None):
+            return arg
+
+        @self.micron.method(normalize=False, max_input_bytes=10,
+                            readonly=True)
+        def queried(arg=None):
+            return arg
+
+        @self.micron.method(normalize=False, max_depth=2, max_items=5)
+        def shaped(arg=None):
+            self.calls.append(arg)
+            return arg
+
+    def test_GivenBodyWithinMaxInputBytes_InputIsRead(self):
+        response = self.request('/sized', '12345678')
+        self.assertEqual('12345678', response.output)
+
+    def test_GivenContentLengthAboveMaxInputBytes_BodyIsNotRead(self):
+        ctx = plugin.Context()
+        ctx.config = {'max_input_bytes': 10}
+        with self.app.test_request_context(
+                '/sized', method='POST', input_stream=_UnreadableStream(),
+                environ_overrides={'CONTENT_LENGTH': '11'}):
+            with self.assertRaises(InputTooLarge):
+                json_input.Plugin().read_input(ctx)
+
+    def test_GivenBodyAboveMaxInputBytes_InputTooLargeIsRaised(self):
+        for path in ('/sized', '/streamed'):
+            response = self.request(path, '123456789')
+            self.assertEqual('InputTooLarge', response.output['code'])
+            self.assertEqual(
+                {'max_input_bytes': 10}, response.output['details'])
+
+    def test_GivenQueryInputAboveMaxInputBytes_InputTooLargeIsRaised(self):
+        response = self.client.get(
+            '/queried', query_string={'input': '"123456789"'})
+        self.assertEqual('InputTooLarge', json.loads(response.data)['code'])
+
+    def test_GivenInputWithinShapeLimits_InputIsRead(self):
+        response = self.request('/shaped', [[1, 2], {'a': 3}])
+        self.assertEqual([[1, 2], {'a': 3}], response.output)
+
+    def test_GivenTooDeepInput_InputTooDeepIsRaised(self):
+        response = self.request('/shaped', [[[1]]])
+        self.assertEqual('InputTooDeep', response.output['code'])
+        self.assertEqual({'max_depth': 2}, response.output['details'])
+        self.assertEqual([], self.calls)
+
+    def test_GivenTooManyItems_InputTooLargeIsRaised(self):
+        response = self.request('/shaped', [[1, 2], {'a': 3, 'b': 4}])
+        self.assertEqual('InputTooLarge', response.output['code'])
+        self.assertEqual({'max_items': 5}, response.output['details'])
+
+    def test_GivenVeryDeepInput_InputTooDeepIsRaised(self):
+        response = self.client.post('/shaped', data='[' * 500 + ']' * 500)
+        self.assertEqual('InputTooDeep', json.loads(response.data)['code'])
+
+    def test_GivenTooDeepInputInBatch_InputTooDeepIsRaised(self):
+        self.micron.batch()
+        response = self.request('/batch', [
+            {'method': 'shaped', 'input': [[[1]]]},
+            {'method': 'shaped', 'input': [[1]]},
+        ])
+        self.assertEqual('InputTooDeep', response.output[0]['error']['code'])
+        self.assertEqual({'output': [[1]]}, response.output[1])
+        self.assertEqual([[[1]]], self.calls)
+
+    def test_GivenTooManyItemsInBatch_InputTooLargeIsRaised(self):
+        self.micron.batch()
+        response = self.request('/batch', [
+            {'method': 'shaped', 'input': [[1, 2], {'a': 3, 'b': 4}]},
+        ])
+        self.assertEqual(
+            'InputTooLarge', response.output[0]['error']['code'])
+        self.assertEqual([], self.calls)
+
+
+class _UnreadableStream(io.BytesIO):
+
+    def read(self, *args):
+        raise AssertionError('The request body must not be read')
+
+
+class _CountingStream(io.BytesIO):
+
+    size = 0
+
+    def read(self, *args):
+        data = super(_CountingStream, self).read(*args)
+        self.size += len(data)
+        return data
+
+
+class NoInputTests(MicronTestCase):
+
+    def setUp(self):
+        super(NoInputTests, self).setUp()
+        @self.micron.method(readonly=True)
+        def ping():
+            return 'pong'
+
+    def test_GivenEmptyBody_BodyIsNotRead(self):
+        ctx = plugin.Context()
+        with self.app.test_request_context(
+                '/ping', method='POST', input_stream=_UnreadableStream(),
+                environ_overrides={'CONTENT_LENGTH': '0'}):
+            self.micron.methods['ping'].pipeline[0][0](ctx)
+        self.assertTrue(ctx.is_assigned('input'))
+        self.assertIsNone(ctx.input)
+
+    def test_GivenNullOrWhitespaceBody_MethodIsCalled(self):
+        for body in ('', ' \n', 'null', ' null\n'):
+            response = self.client.post('/ping', data=body)
+            self.assertEqual('pong', json.loads(response.data))
+
+    def test_GivenEmptyString_MethodIsCalled(self):
+        for body in ('""', ' " \\t " '):
+            response = self.client.post('/ping', data=body)
+            self.assertEqual('pong', json.loads(response.data))
+        response = self.client.get('/ping', query_string={'input': '""'})
+        self.assertEqual('pong', json.loads(response.data))
+
+    def test_GivenEmptyStringWithoutNormalization_UnexpectedInputIsRaised(
+            self):
+        @self.micron.method(normalize=False)
+        def plain_ping():
+            return 'pong'
+
+        response = self.client.post('/plain_ping', data='""')
+        self.assertEqual('UnexpectedInput', json.loads(response.data)['code'])
+
+    def test_GivenCompressedEmptyString_MethodIsCalled(self):
+        response = self.client.post(
+            '/ping', data=_compress('""', 'gzip'),
+            headers={'Content-Encoding': 'gzip'})
+        self.assertEqual('pong', json.loads(response.data))
+
+    def test_GivenInputInBody_UnexpectedInputIsRaised(self):
+        # Bodies longer than 64 bytes are rejected without reading them,
+        # even when they contain only whitespace.
+        for body in ('"input"', '[null]', '[""]', ' ' * 100):
+            response = self.client.post('/ping', data=body)
+            self.assertEqual(
+                'UnexpectedInput', json.loads(response.data)['code'])
+
+    def test_GivenInvalidJson_NonJsonInputIsRaised(self):
+        response = self.client.post('/ping', data='{')
+        self.assertEqual('NonJsonInput', json.loads(response.data)['code'])
+
+    def test_GivenLargeBody_BodyIsNotRead(self):
+        with self.app.test_request_context(
+                '/ping', method='POST', input_stream=_UnreadableStream(),
+                environ_overrides={'CONTENT_LENGTH': '65'}):
+            with self.assertRaises(UnexpectedInput):
+                self.micron.methods['ping'].pipeline[0][0](plugin.Context())
+
+    def test_GivenLargeChunkedBody_BodyIsNotReadInFull(self):
+        ctx = plugin.Context()
+        ctx.config = {}
+        stream = _CountingStream(b' ' * 5000000)
+        with self.app.test_request_context(
+                '/ping', method='POST', input_stream=stream,
+                environ_overrides={
+                    'CONTENT_LENGTH': '', 'wsgi.input_terminated': True}):
+            with self.assertRaises(UnexpectedInput):
+                self.micron.methods['ping'].pipeline[0][0](ctx)
+        self.assertLessEqual(stream.size, 65)
+
+    def test_GivenLargeCompressedBody_BodyIsNotReadInFull(self):
+        ctx = plugin.Context()
+        ctx.config = {}
+        stream = _CountingStream(_compress(' ' * 5000000, 'gzip'))
+        with self.app.test_request_context(
+                '/ping', method='POST', input_stream=stream,
+                headers={'Content-Encoding': 'gzip'}):
+            with self.assertRaises(UnexpectedInput):
+                self.micron.methods['ping'].pipeline[0][0](ctx)
+        self.assertLessEqual(stream.size, 65)
+
+    def test_GivenCompressedNull_MethodIsCalled(self):
+        response = self.client.post(
+            '/ping', data=_compress('null', 'gzip'),
+            headers={'Content-Encoding': 'gzip'})
+        self.assertEqual('pong', json.loads(response.data))
+
+    def test_GivenQueryInput_UnexpectedInputIsRaised(self):
+        response = self.client.get('/ping', query_string={'input': '1'})
+        self.assertEqual('UnexpectedInput', json.loads(response.data)['code'])
+        response = self.client.get('/ping', query_string={'input': 'null'})
+        self.assertEqual('pong', json.loads(response.data))
+
+
+class CodecTests(MicronTestCase):
+
+    def test_EveryAvailableCodecCanBeUsed(self):
+        for name in self.micron.codecs.names:
+            def echo(arg=None):
+                return arg
+            echo.__name__ = 'echo_' + name
+            self.micron.method(json_codec=name)(echo)
+
+        for name in self.micron.codecs.names:
+            response = self.request('/echo_' + name, {'key': u'€ uro'})
+            self.assertEqual({'key': u'€ uro'}, response.output, name)
+
+    def test_GivenUnknownCodec_ExceptionIsRaisedOnDecoration(self):
+        with self.assertRaises(ImplementationError):
+            @self.micron.method(json_codec='no_such_codec')
+            def echo(arg=None):
+                return arg
+
+    def test_GivenInvalidUtf8_NonJsonInputIsRaised(self):
+        @self.micron.method(json_codec='json')
+        def echo(arg=None):
+            return arg
+
+        response = self.client.post('/echo', data=b'"\xff"')
+        self.assertEqual('NonJsonInput', json.loads(response.data)['code'])
+
+
+class QueryInputTests(MicronTestCase):
+
+    def setUp(self):
+        super(QueryInputTests, self).setUp()
+        @self.micron.method(readonly=True)
+        def echo(arg=None):
+            return arg
+
+    def test_GivenQueryParameter_InputIsRead(self):
+        response = self.client.get(
+            '/echo', query_string={'input': '{"key": " value "}'})
+        self.assertEqual({'key': 'value'}, json.loads(response.data))
+
+    def test_GivenNoQueryParameter_InputIsNone(self):
+        response = self.client.get('/echo')
+        self.assertIsNone(json.loads(response.data))
+
+    def test_GivenInvalidJson_NonJsonInputIsRaised(self):
+        response = self.client.get('/echo', query_string={'input': '{'})
+        self.assertEqual('NonJsonInput', json.loads(response.data)['code'])
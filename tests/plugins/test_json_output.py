@@ -3,13 +3,13 @@
 # No idea what triggers the error in _call_plugin():
 # Instance of 'str' has no 'data' member (no-member)
 
-from datetime import datetime
-from datetime import timedelta
+from decimal import Decimal
 import unittest
 from flask import json
 from flask_micron import plugin
 from flask_micron.plugins import json_output
 from flask_micron.errors import ImplementationError
+from tests import MicronTestCase
 
 
 class JsonOutputTests(unittest.TestCase):
@@ -31,38 +31,211 @@ class JsonOutputTests(unittest.TestCase):
         output = json.loads(response.decode('utf-8'))
         self.assertEqual(arg, output)
 
-    def _call_plugin(self, output, error):
+    def test_GivenComplex_CompactJsonIsReturned(self):
+        response = self._call_plugin({"key": [1, 2]}, None)
+        self.assertEqual(b'{"key":[1,2]}', response)
+
+    def test_GivenPrettyOutput_IndentedJsonIsReturned(self):
+        response = self._call_plugin(
+            {"key": [1, 2]}, None, {'pretty_output': True})
+        self.assertEqual(
+            b'{\n  "key": [\n    1,\n    2\n  ]\n}', response)
+
+    def test_GivenDecimal_StringIsReturned(self):
+        response = self._call_plugin([Decimal('1.10')], None)
+        self.assertEqual(b'["1.10"]', response)
+
+    def _call_plugin(self, output, error, config=None):
         ctx = plugin.Context()
         ctx.output = output
         ctx.error = error
+        ctx.config = config
         json_output.Plugin().create_response(ctx)
         return ctx.response.data
 
 
-class SerializerHookTests(unittest.TestCase):
+class PrettyOutputTests(MicronTestCase):
 
-    def test_str(self):
-        self.assertEqual(
-            'this is it',
-            json_output._serializer_hook('this is it'))
+    def setUp(self):
+        super(PrettyOutputTests, self).setUp()
+        @self.micron.method()
+        def default():
+            return [1]
 
-    def test_bytes(self):
-        self.assertEqual(
-            'this is it',
-            json_output._serializer_hook(b'this is it'))
+        @self.micron.method(pretty_output=False)
+        def compact():
+            return [1]
 
-    def test_datetime(self):
-        d = datetime(2000, 1, 2, 10, 11, 12)
-        self.assertEqual(
-            '2000-01-02T10:11:12',
-            json_output._serializer_hook(d))
+    def test_GivenNoDebugMode_OutputIsCompact(self):
+        self.assertEqual(b'[1]', self.client.post('/default').data)
+
+    def test_GivenDebugMode_OutputIsPrettyPrinted(self):
+        self.app.debug = True
+        self.assertEqual(b'[\n  1\n]', self.client.post('/default').data)
+
+    def test_GivenDebugModeAndPrettyOutputFalse_OutputIsCompact(self):
+        self.app.debug = True
+        self.assertEqual(b'[1]', self.client.post('/compact').data)
 
-    def test_timedelta(self):
-        d = timedelta(1, 2, 3)
+
+class StreamingOutputTests(MicronTestCase):
+
+    def test_GivenGenerator_NdjsonIsStreamed(self):
+        response = self._call_plugin(_generate(3), {})
+        self.assertEqual('application/x-ndjson', response.content_type)
+        self.assertTrue(response.is_streamed)
         self.assertEqual(
-            '1 day, 0:00:02.000003',
-            json_output._serializer_hook(d))
+            b'{"n":0}\n{"n":1}\n{"n":2}\n', response.get_data())
+
+    def test_GivenIteratorAndArrayFormat_JsonArrayIsStreamed(self):
+        response = self._call_plugin(
+            iter(['a', 'b']), {'stream_format': 'array'})
+        self.assertEqual('application/json', response.content_type)
+        self.assertEqual(b'["a","b"]', response.get_data())
 
-    def test_unsupported_type(self):
+    def test_GivenEmptyIteratorAndArrayFormat_EmptyJsonArrayIsStreamed(self):
+        response = self._call_plugin(iter([]), {'stream_format': 'array'})
+        self.assertEqual(b'[]', response.get_data())
+
+    def test_GivenList_OutputIsNotStreamed(self):
+        response = self._call_plugin([1, 2], {})
+        self.assertFalse(response.is_streamed)
+
+    def test_GivenUnknownStreamFormat_ExceptionIsRaised(self):
         with self.assertRaises(ImplementationError):
-            json_output._serializer_hook(object())
+            self._call_plugin(iter([]), {'stream_format': 'csv'})
+
+    def test_GivenFailingGenerator_StreamEndsWithError(self):
+        response = self._call_plugin(_generate(2, fail=True), {})
+        lines = response.get_data().decode('utf-8').splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertEqual({'n': 1}, json.loads(lines[1]))
+        error = json.loads(lines[2])['error']
+        self.assertEqual('UnhandledException', error['code'])
+        self.assertEqual('server', error['caused_by'])
+
+    def test_Integration(self):
+        @self.micron.method(stream_format='array')
+        def numbers(count):
+            return _generate(count)
+
+        response = self.client.post('/numbers', data=json.dumps(2))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            [{'n': 0}, {'n': 1}], json.loads(response.get_data()))
+
+    def _call_plugin(self, output, config):
+        ctx = plugin.Context()
+        ctx.output = output
+        ctx.config = config
+        json_output.Plugin().create_response(ctx)
+        return ctx.response
+
+
+def _generate(count, fail=False):
+    for n in range(count):
+        yield {'n': n}
+    if fail:
+        raise ValueError('Generator failed')
+
+
+
+class EtagTests(MicronTestCase):
+
+    def setUp(self):
+        super(EtagTests, self).setUp()
+        @self.micron.method(etag=True)
+        def poll(arg=None):
+            if arg == 'fail':
+                raise ValueError('failed')
+            return {'status': 'ok', 'arg': arg}
+
+        @self.micron.method(etag=True, cache_ttl=60)
+        def cached_poll():
+            return {'status': 'ok'}
+
+        @self.micron.method()
+        def no_etag():
+            return {'status': 'ok'}
+
+    def test_GivenEtagOption_EtagIsAdded(self):
+        response = self.request('/poll')
+        (etag, weak) = response.get_etag()
+        self.assertIsNotNone(etag)
+        self.assertFalse(weak)
+        self.assertEqual(etag, self.request('/poll').get_etag()[0])
+        self.assertNotEqual(etag, self.request('/poll', 'x').get_etag()[0])
+
+    def test_GivenMatchingIfNoneMatch_NotModifiedIsReturned(self):
+        etag = self.request('/poll').headers['ETag']
+        response = self.client.post(
+            '/poll', data='null', headers={'If-None-Match': etag})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b'', response.data)
+        self.assertEqual(etag, response.headers['ETag'])
+
+    def test_GivenOtherIfNoneMatch_ResponseIsReturned(self):
+        response = self.client.post(
+            '/poll', data='null', headers={'If-None-Match': '"other"'})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'status': 'ok', 'arg': None},
+                         json.loads(response.data))
+
+    def test_GivenError_NoEtagIsAdded(self):
+        response = self.request('/poll', 'fail')
+        self.assertEqual(500, response.status_code)
+        self.assertNotIn('ETag', response.headers)
+
+    def test_GivenNoEtagOption_NoEtagIsAdded(self):
+        self.assertNotIn('ETag', self.request('/no_etag').headers)
+
+    def test_GivenCachedResponse_NotModifiedIsReturned(self):
+        etag = self.request('/cached_poll').headers['ETag']
+        self.assertEqual(etag, self.request('/cached_poll').headers['ETag'])
+        response = self.client.post(
+            '/cached_poll', data='null', headers={'If-None-Match': etag})
+        self.assertEqual(304, response.status_code)
+
+
+class HttpCacheTests(MicronTestCase):
+
+    def setUp(self):
+        super(HttpCacheTests, self).setUp()
+        @self.micron.method(http_cache=60, http_vary=['Accept-Language'])
+        def public_data(arg=None):
+            if arg == 'fail':
+                raise ValueError('failed')
+            return arg
+
+        @self.micron.method(http_cache='private, max-age=10', etag=True)
+        def private_data():
+            return 'mine'
+
+    def test_GivenGetRequest_CacheHeadersAreAdded(self):
+        response = self.client.get('/public_data')
+        self.assertEqual('public, max-age=60',
+                         response.headers['Cache-Control'])
+        self.assertIn('Accept-Language', response.headers['Vary'])
+
+    def test_GivenStringOption_StringIsUsedForCacheControl(self):
+        response = self.client.get('/private_data')
+        self.assertEqual('private, max-age=10',
+                         response.headers['Cache-Control'])
+
+    def test_GivenNotModified_CacheHeadersAreAdded(self):
+        etag = self.client.get('/private_data').headers['ETag']
+        response = self.client.get(
+            '/private_data', headers={'If-None-Match': etag})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual('private, max-age=10',
+                         response.headers['Cache-Control'])
+
+    def test_GivenPostRequest_NoCacheHeadersAreAdded(self):
+        response = self.client.post('/public_data')
+        self.assertNotIn('Cache-Control', response.headers)
+
+    def test_GivenError_NoCacheHeadersAreAdded(self):
+        response = self.client.get(
+            '/public_data', query_string={'input': '"fail"'})
+        self.assertEqual(500, response.status_code)
+        self.assertNotIn('Cache-Control', response.headers)
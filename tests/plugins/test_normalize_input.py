@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from flask_micron import plugin
+from flask_micron.method import MicronMethod
 from flask_micron.plugins import normalize_input
 from tests import MicronTestCase
 
@@ -66,6 +68,22 @@ class Tests(MicronTestCase):
             }
         })
 
+    def test_GivenDeeplyNestedData_NormalizedDataIsReturned(self):
+        data = inner = []
+        for _ in range(100000):
+            inner.append([])
+            inner = inner[0]
+        inner.append(' value ')
+        normalize_input._normalize(data, True, True)
+        self.assertEqual('value', inner[0])
+
+    def test_GivenListOrDict_DataAreNormalizedInPlace(self):
+        data = {'key': [' value ']}
+        nested = data['key']
+        self.assertIs(data, normalize_input._normalize(data, True, True))
+        self.assertIs(nested, data['key'])
+        self.assertEqual(['value'], nested)
+
     def _assertNormalized(self, expected, arg):
         self.assertEqual(
             expected,
@@ -88,6 +106,18 @@ class Tests(MicronTestCase):
         response = self.request('/echo', {"my": " yo1 ", "mi": ""})
         self.assertEqual({"my": " yo1 ", "mi": ""}, response.output)
 
+    def test_Configuration_Normalize_HookIsLeftOutOfPipeline(self):
+        method = MicronMethod(self.micron, lambda arg: arg)
+        normalize = self.micron.plugins._plugins[1].normalize_input
+        self.assertIn(normalize, method.pipeline[0])
+        method.configure(normalize=False)
+        self.assertNotIn(normalize, method.pipeline[0])
+
+    def test_GivenMethodWithoutArguments_HookIsLeftOutOfPipeline(self):
+        method = MicronMethod(self.micron, lambda: None)
+        normalize = self.micron.plugins._plugins[1].normalize_input
+        self.assertNotIn(normalize, method.pipeline[0])
+
     def test_Configuration_StripStrings(self):
         @self.micron.method(
             strip_strings=False,
@@ -107,3 +137,68 @@ class Tests(MicronTestCase):
 
         response = self.request('/echo', {"my": " \t\r\n "})
         self.assertEqual({"my": ""}, response.output)
+
+
+class NormalizeWhileDecodingTests(MicronTestCase):
+
+    def setUp(self):
+        super(NormalizeWhileDecodingTests, self).setUp()
+        @self.micron.method(normalize_while_decoding=True, json_codec='json')
+        def echo(arg):
+            return arg
+
+    def test_GivenNestedData_NormalizedNestedDataIsReturned(self):
+        response = self.request('/echo', {
+            'key1': ' value1 ',
+            'key2': [' a ', ['', {'key3': ' b '}], {'key4': [' c ']}],
+            'key3': {'key5': {'key6': ' d '}}
+        })
+        self.assertEqual({
+            'key1': 'value1',
+            'key2': ['a', [None, {'key3': 'b'}], {'key4': ['c']}],
+            'key3': {'key5': {'key6': 'd'}}
+        }, response.output)
+
+    def test_GivenString_NormalizedStringIsReturned(self):
+        self.assertEqual('value', self.request('/echo', ' value ').output)
+
+    def test_GivenList_NormalizedListIsReturned(self):
+        self.assertEqual(['a', None], self.request('/echo', [' a', ' ']).output)
+
+    def test_GivenInputNormalizedFlag_InputIsNotNormalizedAgain(self):
+        ctx = plugin.Context()
+        ctx.config = {'normalize_while_decoding': True}
+        ctx.input = ['a', ' b ']
+        ctx.input_normalized = True
+        normalize_input.Plugin().normalize_input(ctx)
+        self.assertEqual(['a', ' b '], ctx.input)
+        ctx.input_normalized = False
+        normalize_input.Plugin().normalize_input(ctx)
+        self.assertEqual(['a', 'b'], ctx.input)
+
+    def test_WithoutInputNormalizedFlag_InputIsNormalized(self):
+        ctx = plugin.Context()
+        ctx.config = {'normalize_while_decoding': True}
+        ctx.input = [' a ']
+        normalize_input.Plugin().normalize_input(ctx)
+        self.assertEqual(['a'], ctx.input)
+
+    def test_GivenInputTooDeepAfterDecoding_NextInputIsNormalized(self):
+        @self.micron.method(
+            normalize_while_decoding=True, json_codec='json', max_depth=1)
+        def shallow(arg):
+            return arg
+
+        self.assertEqual(
+            'InputTooDeep', self.request('/shallow', [[' a ']]).output['code'])
+        (output, _) = self.micron.methods['shallow'].call_with_input(
+            [' a '])
+        self.assertEqual(['a'], output)
+
+    def test_GivenBatchCall_InputIsNormalized(self):
+        (output, _) = self.micron.methods['echo'].call_with_input(' a ')
+        self.assertEqual('a', output)
+
+    def test_GivenNormalizationDisabled_NoNormalizerIsCreated(self):
+        self.assertIsNone(normalize_input.create_decoding_normalizer(
+            {'normalize': False}))
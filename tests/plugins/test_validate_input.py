@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import unittest
+from flask_micron.errors import ImplementationError
+from flask_micron.plugins.validate_input import compile_schema
+from tests import MicronTestCase
+
+
+class Tests(MicronTestCase):
+
+    def setUp(self):
+        super(Tests, self).setUp()
+        self.calls = []
+        self.micron.batch()
+
+        @self.micron.method(schema={
+            'type': 'object',
+            'properties': {
+                'name': {'type': 'string', 'maxLength': 5},
+                'age': {'type': ['integer', 'null'], 'minimum': 0}
+            },
+            'required': ['name'],
+            'additionalProperties': False
+        })
+        def register(person):
+            self.calls.append(person)
+            return person
+
+        @self.micron.method()
+        def unchecked(arg=None):
+            return arg
+
+    def test_GivenValidInput_FunctionIsCalled(self):
+        response = self.request('/register', {'name': 'John', 'age': 42})
+        self.assertEqual({'name': 'John', 'age': 42}, response.output)
+
+    def test_GivenInvalidInput_AllViolationsAreReported(self):
+        response = self.request(
+            '/register', {'age': -1, 'email': 'john@example.com'})
+        self.assertEqual('InvalidInput', response.output['code'])
+        self.assertEqual('client', response.output['caused_by'])
+        self.assertEqual(sorted([
+            {'path': '/name', 'message': 'is required'},
+            {'path': '/age', 'message': 'must be >= 0'},
+            {'path': '/email', 'message': 'is not allowed'},
+        ], key=_by_path), sorted(response.output['details'], key=_by_path))
+        self.assertEqual([], self.calls)
+
+    def test_GivenNormalizedInput_NormalizedInputIsValidated(self):
+        response = self.request('/register', {'name': ' John  '})
+        self.assertEqual({'name': 'John'}, response.output)
+
+    def test_GivenBatchCall_InputIsValidated(self):
+        response = self.request('/batch', [
+            {'method': 'register', 'input': {'name': 'John'}},
+            {'method': 'register', 'input': {'name': 'Johnny'}},
+        ])
+        self.assertEqual({'name': 'John'}, response.output[0]['output'])
+        self.assertEqual(
+            'InvalidInput', response.output[1]['error']['code'])
+
+    def test_GivenMethodWithoutSchema_NoHooksAreInPipeline(self):
+        (request_pipeline, _) = self.micron.methods['unchecked'].pipeline
+        hooks = [getattr(f, '__name__', None) for f in request_pipeline]
+        self.assertNotIn('validate_input', hooks)
+
+    def test_GivenInvalidSchema_ExceptionIsRaisedOnDecoration(self):
+        with self.assertRaises(ImplementationError):
+            @self.micron.method(schema={'type': 'text'})
+            def invalid(arg):
+                pass
+
+
+class CompileSchemaTests(unittest.TestCase):
+
+    def test_Types(self):
+        cases = (
+            ('null', [None], [0, '', False]),
+            ('boolean', [True, False], [0, 1, None]),
+            ('integer', [0, -5, 2.0], [1.5, True, '1']),
+            ('number', [0, 1.5, -2], [True, '1', None]),
+            ('string', ['', u'€'], [None, 1, []]),
+            ('array', [[], [1]], [{}, 'a', None]),
+            ('object', [{}, {'a': 1}], [[], 'a', None]),
+        )
+        for (name, valid, invalid) in cases:
+            validate = compile_schema({'type': name})
+            for value in valid:
+                self.assertEqual([], validate(value), (name, value))
+            for value in invalid:
+                self.assertEqual([{
+                    'path': '', 'message': 'must be of type %s' % name
+                }], validate(value), (name, value))
+
+    def test_Enum(self):
+        validate = compile_schema({'enum': ['a', 1, None]})
+        self.assertEqual([], validate('a'))
+        self.assertEqual([], validate(None))
+        self.assertEqual(1, len(validate('b')))
+        self.assertEqual(1, len(validate(True)))
+
+    def test_StringChecks(self):
+        validate = compile_schema(
+            {'minLength': 2, 'maxLength': 3, 'pattern': '^[a-z]+$'})
+        self.assertEqual([], validate('abc'))
+        self.assertEqual([], validate(12345))
+        self.assertEqual(
+            ['must be at least 2 characters long'],
+            _messages(validate('a')))
+        self.assertEqual(
+            ['must be at most 3 characters long',
+             'must match pattern ^[a-z]+$'],
+            _messages(validate('ABCD')))
+
+    def test_NumberChecks(self):
+        validate = compile_schema({
+            'minimum': 1, 'maximum': 5,
+            'exclusiveMinimum': 0, 'exclusiveMaximum': 5})
+        self.assertEqual([], validate(1))
+        self.assertEqual([], validate('string'))
+        self.assertEqual(['must be < 5'], _messages(validate(5)))
+        self.assertEqual(
+            ['must be >= 1', 'must be > 0'], _messages(validate(0)))
+
+    def test_ArrayChecks(self):
+        validate = compile_schema({
+            'minItems': 1, 'maxItems': 2, 'items': {'type': 'integer'}})
+        self.assertEqual([], validate([1, 2]))
+        self.assertEqual(
+            ['must contain at least 1 items'], _messages(validate([])))
+        self.assertEqual([
+            {'path': '', 'message': 'must contain at most 2 items'},
+            {'path': '/1', 'message': 'must be of type integer'},
+        ], validate([1, 'x', 3]))
+
+    def test_GivenNestedData_PathPointsToValue(self):
+        validate = compile_schema({'properties': {'a/b': {'items': {
+            'properties': {'c': {'type': 'string'}}}}}})
+        self.assertEqual(
+            [{'path': '/a~1b/1/c', 'message': 'must be of type string'}],
+            validate({'a/b': [{'c': 'ok'}, {'c': 1}]}))
+
+    def test_GivenAdditionalPropertiesSchema_OtherPropertiesAreValidated(self):
+        validate = compile_schema({
+            'properties': {'a': {}},
+            'additionalProperties': {'type': 'integer'}})
+        self.assertEqual([], validate({'a': 'x', 'b': 1}))
+        self.assertEqual(
+            [{'path': '/b', 'message': 'must be of type integer'}],
+            validate({'a': 'x', 'b': 'y'}))
+
+    def test_GivenInvalidSchema_ImplementationErrorIsRaised(self):
+        for schema in (
+                'string',
+                {'type': 'text'},
+                {'maxLenght': 5},
+                {'minLength': 'five'},
+                {'minimum': '0'},
+                {'pattern': '('},
+                {'properties': []},
+                {'items': {'type': 'text'}}):
+            with self.assertRaises(ImplementationError, msg=repr(schema)):
+                compile_schema(schema)
+
+
+def _messages(violations):
+    return [violation['message'] for violation in violations]
+
+
+def _by_path(violation):
+    return violation['path']
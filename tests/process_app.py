@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""A Flask app with a Micron method that uses the 'process' executor,
+defined using the decorator syntax. Used by tests.test_executor."""
+import os
+from flask import Flask
+from flask_micron import Micron
+
+app = Flask(__name__)
+micron = Micron(app)
+
+
+@micron.method(executor='process', executor_workers=1)
+def get_pid_for(name):
+    return [name, os.getpid()]
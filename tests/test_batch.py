@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from flask_micron.errors import AccessDenied
+from tests import MicronTestCase
+
+
+class Tests(MicronTestCase):
+
+    def setUp(self):
+        super(Tests, self).setUp()
+        self.micron.batch()
+
+        @self.micron.method()
+        def greet(who='World'):
+            return 'Hello, %s' % who
+
+        @self.micron.method('/raw/echo', normalize=False)
+        def echo(arg):
+            return arg
+
+        @self.micron.method(deny=True)
+        def secret():
+            return 'the secret'
+
+        self.micron.plugin(DenyPlugin())
+
+    def test_CallsAreHandledInOrder(self):
+        response = self.request('/batch', [
+            {'method': 'greet', 'input': 'you'},
+            {'method': 'greet'},
+        ])
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([
+            {'output': 'Hello, you'},
+            {'output': 'Hello, World'},
+        ], response.output)
+
+    def test_CallsUseTheirOwnConfiguration(self):
+        response = self.request('/batch', [
+            {'method': 'greet', 'input': '  you  '},
+            {'method': 'raw/echo', 'input': '  you  '},
+        ])
+        self.assertEqual([
+            {'output': 'Hello, you'},
+            {'output': '  you  '},
+        ], response.output)
+
+    def test_ErrorsAreReportedPerCall(self):
+        response = self.request('/batch', [
+            {'method': 'secret'},
+            {'method': 'raw/echo'},
+            {'method': 'nope'},
+            {'input': 'no method'},
+            {'method': 'greet'},
+        ])
+        self.assertEqual(200, response.status_code)
+        codes = [
+            result['error']['code'] if 'error' in result else None
+            for result in response.output
+        ]
+        self.assertEqual([
+            'AccessDenied',
+            'MissingInput',
+            'UnknownMethod',
+            'InvalidBatchCall',
+            None
+        ], codes)
+        self.assertEqual('client', response.output[0]['error']['caused_by'])
+        self.assertEqual({'output': 'Hello, World'}, response.output[4])
+
+    def test_InputMustBeAList(self):
+        response = self.request('/batch', {'method': 'greet'})
+        self.assertEqual(500, response.status_code)
+        self.assertEqual('InvalidBatch', response.output['code'])
+
+    def test_BatchCannotBeCalledFromBatch(self):
+        response = self.request('/batch', [{'method': 'batch', 'input': []}])
+        self.assertEqual('UnknownMethod', response.output[0]['error']['code'])
+
+
+class DenyPlugin(object):
+    def check_access(self, ctx):
+        if ctx.config.get('deny', False):
+            raise AccessDenied()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+import unittest
+from flask import json
+from flask_micron import codec
+from flask_micron.errors import ImplementationError
+from flask_micron.encoder import EncoderRegistry
+
+
+class RegistryTests(unittest.TestCase):
+
+    def test_DefaultCodecsAreRegistered(self):
+        names = codec.CodecRegistry().names
+        self.assertIn('json', names)
+        self.assertIn('flask', names)
+
+    def test_GivenAuto_PreferredAvailableCodecIsReturned(self):
+        registry = codec.CodecRegistry()
+        preferred = [
+            name for name in codec.PREFERRED_CODECS
+            if name in registry.names][0]
+        self.assertIs(registry.get(preferred), registry.get('auto'))
+
+    def test_GivenNoName_FlaskCodecIsReturned(self):
+        registry = codec.CodecRegistry()
+        self.assertIs(registry.get('flask'), registry.get(None))
+        self.assertIs(registry.get('flask'), registry.get())
+
+    def test_GivenIncompleteCodec_ItCannotBeCreated(self):
+        class LoadsOnly(codec.Codec):
+            def loads(self, data, object_hook=None):
+                return None
+
+        with self.assertRaises(TypeError):
+            LoadsOnly()
+
+    def test_GivenRegisteredCodec_CodecIsReturned(self):
+        my_codec = codec.JsonCodec()
+        registry = codec.CodecRegistry().register('mine', my_codec)
+        self.assertIs(my_codec, registry.get('mine'))
+
+    def test_GivenUnknownCodec_ExceptionIsRaised(self):
+        with self.assertRaises(ImplementationError):
+            codec.CodecRegistry().get('no_such_codec')
+
+
+class CodecTests(unittest.TestCase):
+
+    DATA = {
+        'key1': u'€ uro',
+        'key2': [1, 2.5, None, True],
+        'key3': {'nested': 'value/slash'}
+    }
+
+    def test_AllAvailableCodecsRoundTripData(self):
+        registry = codec.CodecRegistry()
+        encode = EncoderRegistry().encode
+        for name in registry.names:
+            json_codec = registry.get(name)
+            serialized = json_codec.dumps(self.DATA, encode)
+            self.assertIsInstance(serialized, bytes)
+            self.assertEqual(self.DATA, json.loads(serialized), name)
+            self.assertEqual(self.DATA, json_codec.loads(serialized), name)
+            self.assertEqual(
+                self.DATA, json_codec.loads(serialized.decode('utf-8')), name)
+
+    def test_AllAvailableCodecsUseDefaultFunction(self):
+        registry = codec.CodecRegistry()
+        encode = EncoderRegistry().encode
+        for name in registry.names:
+            serialized = registry.get(name).dumps(
+                [timedelta(1)], encode, indent=2)
+            self.assertEqual(['1 day, 0:00:00'], json.loads(serialized), name)
+
+    def test_AllAvailableCodecsPassOnDefaultFunctionErrors(self):
+        registry = codec.CodecRegistry()
+        encode = EncoderRegistry().encode
+        for name in registry.names:
+            with self.assertRaises(ImplementationError):
+                registry.get(name).dumps(object(), encode)
+
+    def test_GivenObjectHook_HookIsCalledForEveryObject(self):
+        registry = codec.CodecRegistry()
+        for name in registry.names:
+            json_codec = registry.get(name)
+            if json_codec.supports_object_hook:
+                data = json_codec.loads(
+                    b'[{"a": {"b": 1}}]', lambda obj: sorted(obj))
+                self.assertEqual([['a']], data, name)
+            else:
+                with self.assertRaises(ImplementationError):
+                    json_codec.loads(b'{}', lambda obj: obj)
+
+    def test_GivenNoIndent_AllAvailableCodecsProduceCompactOutput(self):
+        registry = codec.CodecRegistry()
+        encode = EncoderRegistry().encode
+        for name in registry.names:
+            serialized = registry.get(name).dumps({'a': [1, 2]}, encode)
+            self.assertEqual(b'{"a":[1,2]}', serialized, name)
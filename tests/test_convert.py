@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+import unittest
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import TypedDict
+from typing import Union
+from flask_micron.convert import compile_converter
+from flask_micron.convert import get_argument_annotation
+from flask_micron.errors import ImplementationError
+from flask_micron.errors import InvalidInput
+
+
+@dataclass
+class Address:
+    street: str
+    city: Optional[str] = None
+
+
+@dataclass
+class Person:
+    name: str
+    address: Optional[Address] = None
+    previous: List[Address] = field(default_factory=list)
+
+
+class Point(NamedTuple):
+    x: int
+    y: int = 0
+
+
+class Shape(TypedDict):
+    name: str
+    points: List[Point]
+
+
+class Options(TypedDict, total=False):
+    verbose: bool
+
+
+@dataclass
+class Node:
+    value: int
+    children: List['Node'] = field(default_factory=list)
+
+
+class Tests(unittest.TestCase):
+
+    def test_GivenPlainAnnotation_NoConverterIsCompiled(self):
+        for annotation in (None, str, int, dict, List[int], Dict[str, str],
+                           Optional[str]):
+            self.assertIsNone(compile_converter(annotation), annotation)
+
+    def test_GivenDataclass_DataclassIsCreated(self):
+        convert = compile_converter(Person)
+        self.assertEqual(
+            Person('John', Address('Main Street', 'Springfield'),
+                   [Address('Old Street')]),
+            convert({
+                'name': 'John',
+                'address': {'street': 'Main Street', 'city': 'Springfield'},
+                'previous': [{'street': 'Old Street'}]
+            }))
+
+    def test_GivenNone_NoneIsReturned(self):
+        self.assertIsNone(compile_converter(Person)(None))
+        self.assertEqual(
+            Person('John'), compile_converter(Person)(
+                {'name': 'John', 'address': None}))
+
+    def test_GivenNamedTuple_NamedTupleIsCreatedFromObjectOrArray(self):
+        convert = compile_converter(Point)
+        self.assertEqual(Point(1, 2), convert({'x': 1, 'y': 2}))
+        self.assertEqual(Point(1, 2), convert([1, 2]))
+        self.assertEqual(Point(1), convert([1]))
+
+    def test_GivenTypedDict_DictWithConvertedValuesIsCreated(self):
+        shape = compile_converter(Shape)(
+            {'name': 'line', 'points': [[0, 0], {'x': 1, 'y': 1}]})
+        self.assertEqual(
+            {'name': 'line', 'points': [Point(0, 0), Point(1, 1)]}, shape)
+        self.assertIsInstance(shape['points'][0], Point)
+        self.assertEqual({}, compile_converter(Options)({}))
+
+    def test_GivenContainersOfTypes_ContainerItemsAreConverted(self):
+        self.assertEqual(
+            [Point(1), Point(2)], compile_converter(List[Point])([[1], [2]]))
+        self.assertEqual(
+            {'a': Point(1)}, compile_converter(Dict[str, Point])({'a': [1]}))
+        self.assertEqual(
+            Point(1), compile_converter(Optional[Point])([1]))
+
+    def test_GivenSelfReferencingType_NestedDataAreConverted(self):
+        self.assertEqual(
+            Node(1, [Node(2, [Node(3)])]),
+            compile_converter(Node)(
+                {'value': 1, 'children': [
+                    {'value': 2, 'children': [{'value': 3}]}]}))
+
+    def test_GivenInvalidInput_AllViolationsAreReported(self):
+        convert = compile_converter(Person)
+        with self.assertRaises(InvalidInput) as context:
+            convert({
+                'address': 'Main Street',
+                'previous': [{'city': 'Springfield'}, {'street': 'x', 'z': 1}],
+                'age': 42
+            })
+        self.assertEqual([
+            {'path': '/name', 'message': 'is required'},
+            {'path': '/address', 'message': 'must be an object'},
+            {'path': '/previous/0/street', 'message': 'is required'},
+            {'path': '/previous/1/z', 'message': 'is not allowed'},
+            {'path': '/age', 'message': 'is not allowed'},
+        ], context.exception.details)
+
+    def test_GivenTooManyTupleItems_ViolationIsReported(self):
+        with self.assertRaises(InvalidInput) as context:
+            compile_converter(Point)([1, 2, 3])
+        self.assertEqual(
+            [{'path': '', 'message': 'must contain at most 2 items'}],
+            context.exception.details)
+
+    def test_GivenUnionOfTypes_ImplementationErrorIsRaised(self):
+        with self.assertRaises(ImplementationError):
+            compile_converter(Union[Point, Person])
+
+    def test_GetArgumentAnnotation(self):
+        def annotated(person: 'Person') -> str:
+            pass
+
+        def plain(person):
+            pass
+
+        self.assertIs(Person, get_argument_annotation(annotated))
+        self.assertIsNone(get_argument_annotation(plain))
+
+    def test_GivenUnresolvableAnnotation_ImplementationErrorIsRaised(self):
+        def unresolvable(arg: 'NoSuchType'):
+            pass
+
+        with self.assertRaises(ImplementationError):
+            get_argument_annotation(unresolvable)
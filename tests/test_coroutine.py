@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+from flask import request
+from flask_micron import coroutine
+from flask_micron import plugin
+from tests import MicronTestCase
+
+
+class Tests(unittest.TestCase):
+
+    def test_IsCoroutineFunction(self):
+        self.assertTrue(coroutine.is_coroutine_function(async_double))
+        self.assertTrue(
+            coroutine.is_coroutine_function(AsyncHooks().end_request))
+        self.assertFalse(coroutine.is_coroutine_function(sync_double))
+        self.assertFalse(coroutine.is_coroutine_function(None))
+
+    def test_ToSyncRunsCoroutineUntilCompletion(self):
+        double = coroutine.to_sync(async_double)
+        self.assertEqual(4, double(2))
+        self.assertEqual('async_double', double.__name__)
+
+    def test_EventLoopIsReusedWithinThread(self):
+        self.assertIs(coroutine.run(get_loop()), coroutine.run(get_loop()))
+
+    def test_CompiledCoroutineHooksCanBeCalledDirectly(self):
+        hooks = plugin.Compiler().compile(AsyncHooks())
+        ctx = plugin.Context()
+        ctx.output = 'output'
+        hooks['process_output'](ctx)
+        self.assertEqual('output, processed async', ctx.output)
+
+
+class IntegrationTests(MicronTestCase):
+
+    def test_CoroutineMethod(self):
+        @self.micron.method()
+        async def gather(count):
+            return await asyncio.gather(
+                *[async_double(i) for i in range(count)])
+
+        response = self.request('/gather', 3)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([0, 2, 4], response.output)
+
+    def test_CoroutineMethodWithoutArgument(self):
+        @self.micron.method()
+        async def ping():
+            await asyncio.sleep(0)
+            return 'pong'
+
+        self.assertEqual('pong', self.request('/ping').output)
+
+    def test_RequestContextIsAvailableInCoroutineMethod(self):
+        @self.micron.method()
+        async def path():
+            return request.path
+
+        self.assertEqual('/path', self.request('/path').output)
+
+    def test_CoroutineHooks(self):
+        self.micron.plugin(AsyncHooks())
+
+        @self.micron.method()
+        async def hello():
+            return 'hello'
+
+        response = self.request('/hello')
+        self.assertEqual('hello, processed async', response.output)
+        self.assertEqual('yes', response.headers['X-Async'])
+
+    def test_CoroutineMethodInBatch(self):
+        self.micron.batch()
+
+        @self.micron.method()
+        async def double(value):
+            return await async_double(value)
+
+        response = self.request('/batch', [
+            {'method': 'double', 'input': 1},
+            {'method': 'double', 'input': 2}
+        ])
+        self.assertEqual([{'output': 2}, {'output': 4}], response.output)
+
+
+class AsyncHooks(plugin.Plugin):
+
+    async def process_output(self, ctx):
+        await asyncio.sleep(0)
+        ctx.output = '%s, processed async' % ctx.output
+
+    async def process_response(self, ctx):
+        ctx.response.headers['X-Async'] = 'yes'
+
+    async def end_request(self, ctx):
+        pass
+
+
+async def get_loop():
+    return asyncio.get_running_loop()
+
+
+async def async_double(value):
+    await asyncio.sleep(0)
+    return value * 2
+
+
+def sync_double(value):
+    return value * 2
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from decimal import Decimal
+from uuid import UUID
+import unittest
+from flask_micron.encoder import EncoderRegistry
+from flask_micron.errors import ImplementationError
+
+try:
+    from dataclasses import dataclass
+except ImportError:
+    dataclass = None
+
+try:
+    import attr
+except ImportError:
+    attr = None
+
+
+class DefaultEncoderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.encode = EncoderRegistry().encode
+
+    def test_str(self):
+        self.assertEqual('this is it', self.encode('this is it'))
+
+    def test_bytes(self):
+        self.assertEqual('this is it', self.encode(b'this is it'))
+
+    def test_datetime(self):
+        d = datetime(2000, 1, 2, 10, 11, 12)
+        self.assertEqual('2000-01-02T10:11:12', self.encode(d))
+
+    def test_date(self):
+        self.assertEqual('2000-01-02', self.encode(date(2000, 1, 2)))
+
+    def test_timedelta(self):
+        d = timedelta(1, 2, 3)
+        self.assertEqual('1 day, 0:00:02.000003', self.encode(d))
+
+    def test_decimal(self):
+        self.assertEqual('1.10', self.encode(Decimal('1.10')))
+
+    def test_uuid(self):
+        uuid = '12345678-1234-5678-1234-567812345678'
+        self.assertEqual(uuid, self.encode(UUID(uuid)))
+
+    def test_set(self):
+        self.assertEqual([1], self.encode(set([1])))
+        self.assertEqual([1], self.encode(frozenset([1])))
+
+    @unittest.skipIf(dataclass is None, "dataclasses not available")
+    def test_dataclass(self):
+        @dataclass
+        class Point(object):
+            x: int
+            y: int
+        self.assertEqual({'x': 1, 'y': 2}, self.encode(Point(1, 2)))
+
+    @unittest.skipIf(dataclass is None, "dataclasses not available")
+    def test_dataclass_FieldValuesAreNotCopied(self):
+        @dataclass
+        class Wrapper(object):
+            items: list
+            inner: object
+        items = [1, 2]
+        inner = Wrapper([], None)
+        encoded = self.encode(Wrapper(items, inner))
+        self.assertIs(items, encoded['items'])
+        self.assertIs(inner, encoded['inner'])
+
+    @unittest.skipIf(attr is None, "attrs not available")
+    def test_attrs_class(self):
+        @attr.s(slots=True)
+        class Point(object):
+            x = attr.ib()
+            y = attr.ib()
+        self.assertEqual({'x': 1, 'y': 2}, self.encode(Point(1, 2)))
+
+    def test_GivenFieldNamesThatAreNoIdentifiers_FieldsAreEncoded(self):
+        class Field(object):
+            def __init__(self, name):
+                self.name = name
+
+        class Odd(object):
+            __attrs_attrs__ = (Field('class'), Field('a-b'), Field('c'))
+        value = Odd()
+        setattr(value, 'class', 1)
+        setattr(value, 'a-b', 2)
+        value.c = 3
+        self.assertEqual({'class': 1, 'a-b': 2, 'c': 3}, self.encode(value))
+
+    def test_unsupported_type(self):
+        with self.assertRaises(ImplementationError):
+            self.encode(object())
+
+
+class Money(Decimal):
+    pass
+
+
+class RegistryTests(unittest.TestCase):
+
+    def test_GivenSubclass_EncoderForBaseClassIsUsed(self):
+        registry = EncoderRegistry()
+        self.assertEqual('1.5', registry.encode(Money('1.5')))
+
+    def test_GivenRegisteredSubclass_EncoderForSubclassIsUsed(self):
+        registry = EncoderRegistry()
+        registry.encode(Money('1.5'))
+        registry.register(Money, lambda value: 'EUR %s' % value)
+        self.assertEqual('EUR 1.5', registry.encode(Money('1.5')))
+        self.assertEqual('1.5', registry.encode(Decimal('1.5')))
+
+    def test_GivenRegisteredType_EncoderIsUsed(self):
+        registry = EncoderRegistry().register(complex, lambda value: 'c')
+        self.assertEqual('c', registry.encode(1j))
+
+    def test_EncoderIsResolvedOnlyOnce(self):
+        registry = EncoderRegistry()
+        registry.encode(Money('1'))
+        registry._encoders.clear()
+        self.assertEqual('2', registry.encode(Money('2')))
+
+    @unittest.skipIf(dataclass is None, "dataclasses not available")
+    def test_DataclassEncoderIsCompiledOnlyOnce(self):
+        @dataclass
+        class Point(object):
+            x: int
+        registry = EncoderRegistry()
+        registry.encode(Point(1))
+        encoder = registry._dispatch[Point]
+        self.assertEqual({'x': 2}, registry.encode(Point(2)))
+        self.assertIs(encoder, registry._dispatch[Point])
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import os
+import unittest
+from flask import json
+from flask_micron import executor
+from flask_micron.errors import ImplementationError
+from flask_micron.errors import MicronClientError
+from tests import MicronTestCase
+
+
+class Tests(unittest.TestCase):
+
+    def test_FunctionIsCalledInWorkerProcess(self):
+        call = executor.to_process(get_pid, workers=1)
+        self.assertNotEqual(os.getpid(), call())
+
+    def test_ArgumentsAndReturnValueArePassed(self):
+        call = executor.to_process(double, workers=1)
+        self.assertEqual([1, 2, 1, 2], call([1, 2]))
+
+    def test_CoroutineFunctionIsRunInWorkerProcess(self):
+        call = executor.to_process(async_double, workers=1)
+        self.assertEqual(4, call(2))
+
+    def test_ErrorFromFunctionIsRaised(self):
+        call = executor.to_process(fail, workers=1)
+        with self.assertRaises(Failure) as context:
+            call('details')
+        self.assertEqual('details', context.exception.details)
+
+    def test_GivenDeadWorker_PoolIsRestarted(self):
+        pool = executor.get_pool(1)
+        pool.warm_up()
+        with self.assertRaises(Exception):
+            pool.call(os._exit, 1)
+        self.assertEqual(4, pool.call(double, 2))
+
+    def test_PoolIsSharedForSameNumberOfWorkers(self):
+        self.assertIs(executor.get_pool(1), executor.get_pool(1))
+        self.assertIsNot(executor.get_pool(1), executor.get_pool(2))
+
+    def test_GivenNonModuleLevelFunction_ImplementationErrorIsRaised(self):
+        with self.assertRaises(ImplementationError):
+            executor.to_process(lambda: None, workers=1)
+
+    def test_GivenInvalidSettings_ImplementationErrorIsRaised(self):
+        with self.assertRaises(ImplementationError):
+            executor.check_executor('thread')
+        with self.assertRaises(ImplementationError):
+            executor.get_pool(0)
+
+
+class IntegrationTests(MicronTestCase):
+
+    def test_MethodIsCalledInWorkerProcess(self):
+        self.decorate(get_pid_for, executor='process', executor_workers=1)
+        response = self.request('/get_pid_for', 'me')
+        self.assertEqual('me', response.output[0])
+        self.assertNotEqual(os.getpid(), response.output[1])
+
+    def test_DecoratedModuleLevelFunctionIsCalledInWorkerProcess(self):
+        from tests.process_app import app
+        response = app.test_client().post(
+            '/get_pid_for', data=json.dumps('me'))
+        output = json.loads(response.data)
+        self.assertEqual('me', output[0])
+        self.assertNotEqual(os.getpid(), output[1])
+
+    def test_GivenUnpicklableFunction_ImplementationErrorIsRaised(self):
+        call = executor.to_process(_shadowed, workers=1)
+        with self.assertRaises(ImplementationError):
+            call()
+
+    def test_BatchIsCalledInWorkerProcess(self):
+        self.decorate(
+            double_all, executor='process', executor_workers=1,
+            batch=True, max_wait_ms=0)
+        self.assertEqual(6, self.request('/double_all', 3).output)
+
+
+class Failure(MicronClientError):
+    """The function failed."""
+
+
+def get_pid():
+    return os.getpid()
+
+
+def get_pid_for(name):
+    return [name, os.getpid()]
+
+
+def double(value):
+    return value * 2
+
+
+def double_all(values):
+    return [value * 2 for value in values]
+
+
+async def async_double(value):
+    return value * 2
+
+
+def fail(details):
+    raise Failure(details)
+
+
+def shadowed():
+    pass
+
+
+# The module attribute no longer refers to the function, so the function
+# cannot be pickled by reference.
+_shadowed = shadowed
+shadowed = None
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from flask import Response
+from flask_micron.method import MicronMethod
 from tests import MicronTestCase
 
 
@@ -81,6 +83,147 @@ class Tests(MicronTestCase):
 
         self.assertIsNone(response.output['trace'])
 
+    def test_PipelineIsCompiledOnce(self):
+        method = MicronMethod(self.micron, hello)
+        self.assertIs(method.pipeline[0], method.pipeline[0])
+
+    def test_PipelineIsRecompiledWhenPluginIsAdded(self):
+        method = MicronMethod(self.micron, hello)
+        pipeline = method.pipeline[0]
+        self.micron.plugin(OutputSpy())
+        self.assertIsNot(pipeline, method.pipeline[0])
+
+    def test_PipelineIsRecompiledWhenConfigurationIsChanged(self):
+        method = MicronMethod(self.micron, hello)
+        pipeline = method.pipeline[0]
+        self.micron.configure(option='value')
+        self.assertIsNot(pipeline, method.pipeline[0])
+        pipeline = method.pipeline[0]
+        method.configure(option='other value')
+        self.assertIsNot(pipeline, method.pipeline[0])
+
+    def test_PluginAddedAfterDecorating_IsUsed(self):
+        self.decorate(say_it)
+        self.assertEqual('it', self.request('/say_it').output)
+        self.micron.plugin(OutputSpy())
+        self.assertEqual('spied: it', self.request('/say_it').output)
+
+    def test_WithPoolContexts_ContextIsReused(self):
+        spy = ContextSpy()
+        self.micron.plugin(spy)
+        self.decorate(say_it, pool_contexts=True)
+        self.assertEqual('it', self.request('/say_it').output)
+        self.assertEqual('it', self.request('/say_it').output)
+        self.assertIs(spy.contexts[0], spy.contexts[1])
+        self.assertFalse(spy.contexts[0].is_assigned('output'))
+
+    def test_WithoutPoolContexts_ContextIsNotReused(self):
+        spy = ContextSpy()
+        self.micron.plugin(spy)
+        self.decorate(say_it)
+        self.request('/say_it')
+        self.request('/say_it')
+        self.assertIsNot(spy.contexts[0], spy.contexts[1])
+
+    def test_WithPoolContexts_PluginStateIsNotReused(self):
+        spy = StateSpy()
+        self.micron.plugin(spy)
+        self.decorate(say_it, pool_contexts=True)
+        self.assertEqual('it', self.request('/say_it').output)
+        self.assertEqual('it', self.request('/say_it').output)
+        self.assertEqual([None, None], spy.previous)
+
+    def test_GivenEarlyResponse_RemainingHooksAreSkipped(self):
+        calls = []
+        self.micron.plugin(EarlyResponder(calls))
+        self.decorate(say_it, respond_early=True)
+        response = self.client.post('/say_it')
+        self.assertEqual(b'early', response.data)
+        self.assertEqual(['check_access', 'process_response'], calls)
+
+    def test_GivenNoEarlyResponse_AllHooksAreCalled(self):
+        calls = []
+        self.micron.plugin(EarlyResponder(calls))
+        self.decorate(say_it)
+        self.assertEqual('it', self.request('/say_it').output)
+        self.assertEqual(
+            ['check_access', 'process_output', 'process_response'], calls)
+
+    def test_GivenEarlyResponseInBatchCall_FunctionIsNotCalled(self):
+        self.micron.plugin(EarlyResponder([]))
+        self.decorate(goodbye, respond_early=True)
+        method = self.micron.methods['goodbye']
+        self.assertEqual(('early', None), method.call_with_input(None))
+
+    def test_GivenFailingBatchCall_ErrorAndFinishingHooksAreCalled(self):
+        calls = []
+        self.micron.plugin(ErrorRecorder(calls))
+        self.decorate(hello)
+        method = self.micron.methods['hello']
+        (output, error) = method.call_with_input(None)
+        self.assertEqual('MissingInput', output['code'])
+        self.assertEqual('MissingInput', type(error).__name__)
+        self.assertEqual(['process_error', 'end_request'], calls)
+
+    def test_GivenSuccessfulBatchCall_FinishingHooksAreCalled(self):
+        calls = []
+        self.micron.plugin(ErrorRecorder(calls))
+        self.decorate(hello)
+        method = self.micron.methods['hello']
+        self.assertEqual(
+            ('Hello, you', None), method.call_with_input('you'))
+        self.assertEqual(['end_request'], calls)
+
+
+class EarlyResponder(object):
+    def __init__(self, calls):
+        self.calls = calls
+
+    def check_access(self, ctx):
+        self.calls.append('check_access')
+        if ctx.config.get('respond_early', False):
+            ctx.output = 'early'
+            ctx.response = Response('early')
+
+    def process_output(self, ctx):
+        self.calls.append('process_output')
+
+    def process_response(self, ctx):
+        self.calls.append('process_response')
+
+
+class ErrorRecorder(object):
+    def __init__(self, calls):
+        self.calls = calls
+
+    def process_error(self, ctx):
+        self.calls.append('process_error')
+
+    def end_request(self, ctx):
+        self.calls.append('end_request')
+
+
+class ContextSpy(object):
+    def __init__(self):
+        self.contexts = []
+
+    def end_request(self, ctx):
+        self.contexts.append(ctx)
+
+
+class StateSpy(object):
+    def __init__(self):
+        self.previous = []
+
+    def start_request(self, ctx):
+        self.previous.append(getattr(ctx, 'spy_state', None))
+        ctx.spy_state = 'seen'
+
+
+class OutputSpy(object):
+    def process_output(self, ctx):
+        ctx.output = 'spied: %s' % ctx.output
+
 
 def hello(who):
     return "Hello, %s" % who
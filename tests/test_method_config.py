@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import copy
+import pickle
 import unittest
 from flask_micron.method import MicronMethodConfig
 from flask_micron.errors import ImplementationError
@@ -98,3 +100,58 @@ class Tests(unittest.TestCase):
             'second': 'value two',
             'third': 'value3'
         }, level3.flattened)
+
+    def test_SnapshotProvidesResolvedDictOfAllOptions(self):
+        level1 = MicronMethodConfig(first='value1', one=1)
+        level2 = MicronMethodConfig(level1, one='one', second='value2')
+        self.assertEqual(level2.flattened, level2.snapshot)
+
+    def test_SnapshotIsReused(self):
+        config = MicronMethodConfig(MicronMethodConfig(one=1), two=2)
+        self.assertIs(config.snapshot, config.snapshot)
+
+    def test_SnapshotIsInvalidatedByChangeInConfig(self):
+        config = MicronMethodConfig(one=1)
+        snapshot = config.snapshot
+        config.configure(one='one')
+        self.assertIsNot(snapshot, config.snapshot)
+        self.assertEqual({'one': 'one'}, config.snapshot)
+
+    def test_SnapshotIsInvalidatedByChangeInParentConfig(self):
+        level1 = MicronMethodConfig(one=1)
+        level2 = MicronMethodConfig(level1, two=2)
+        level3 = MicronMethodConfig(level2)
+        snapshot = level3.snapshot
+        level1.set('one', 'one')
+        self.assertIsNot(snapshot, level3.snapshot)
+        self.assertEqual({'one': 'one', 'two': 2}, level3.snapshot)
+
+    def test_CopyOfSnapshot_IsPlainDict(self):
+        snapshot = MicronMethodConfig(one=1, two={'deep': 2}).snapshot
+        for copied in (copy.copy(snapshot), copy.deepcopy(snapshot),
+                       pickle.loads(pickle.dumps(snapshot))):
+            self.assertIs(dict, type(copied))
+            self.assertEqual({'one': 1, 'two': {'deep': 2}}, copied)
+            copied['one'] = 'one'
+        self.assertIsNot(
+            snapshot['two'], copy.deepcopy(snapshot)['two'])
+        self.assertEqual(1, snapshot['one'])
+
+    def test_SnapshotIsReadOnly(self):
+        snapshot = MicronMethodConfig(one=1).snapshot
+        with self.assertRaises(ImplementationError):
+            snapshot['one'] = 'one'
+        with self.assertRaises(ImplementationError):
+            snapshot.setdefault('two', 2)
+        with self.assertRaises(ImplementationError):
+            snapshot.update(three=3)
+        with self.assertRaises(ImplementationError):
+            del snapshot['one']
+        with self.assertRaises(ImplementationError):
+            snapshot |= {'four': 4}
+        for name in ('clear', 'popitem'):
+            with self.assertRaises(ImplementationError):
+                getattr(snapshot, name)()
+        with self.assertRaises(ImplementationError):
+            snapshot.pop('one')
+        self.assertEqual({'one': 1}, snapshot)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+from flask_micron.errors import ImplementationError
+from flask_micron.errors import MicronClientError
+from flask_micron.microbatch import Batcher
+
+
+class Tests(unittest.TestCase):
+
+    def test_GivenSingleCall_FunctionIsCalledAfterWaiting(self):
+        calls = []
+        batcher = Batcher(_recording_double(calls), max_wait_ms=1)
+        self.assertEqual(4, batcher.call(2))
+        self.assertEqual([[2]], calls)
+
+    def test_ConcurrentCallsAreBatched(self):
+        calls = []
+        batcher = Batcher(
+            _recording_double(calls), max_batch=4, max_wait_ms=10000)
+        results = _call_concurrently(batcher, [1, 2, 3, 4])
+        self.assertEqual([2, 4, 6, 8], results)
+        self.assertEqual(1, len(calls))
+        self.assertEqual([1, 2, 3, 4], sorted(calls[0]))
+
+    def test_GivenMaxBatch_InputsAreSplitOverMultipleBatches(self):
+        calls = []
+        batcher = Batcher(
+            _recording_double(calls), max_batch=2, max_wait_ms=10000)
+        results = _call_concurrently(batcher, [1, 2, 3, 4])
+        self.assertEqual([2, 4, 6, 8], results)
+        self.assertEqual([2, 2], [len(inputs) for inputs in calls])
+
+    def test_GivenFailingFunction_ErrorIsRaisedForAllCalls(self):
+        def fail(inputs):
+            raise ValueError("failed")
+        batcher = Batcher(fail, max_batch=2, max_wait_ms=10000)
+        results = _call_concurrently(batcher, [1, 2])
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    def test_GivenFailingFunction_EveryCallGetsItsOwnError(self):
+        def fail(inputs):
+            raise Failure({'inputs': len(inputs)})
+        batcher = Batcher(fail, max_batch=3, max_wait_ms=10000)
+        results = _call_concurrently(batcher, [1, 2, 3])
+        self.assertTrue(all(isinstance(r, Failure) for r in results))
+        self.assertEqual(3, len(set(id(r) for r in results)))
+        self.assertTrue(all(r.details == {'inputs': 3} for r in results))
+        originals = [r for r in results if r.__cause__ is None]
+        self.assertEqual(1, len(originals))
+        self.assertTrue(all(
+            r.__cause__ is originals[0] for r in results
+            if r is not originals[0]))
+
+    def test_GivenWrongNumberOfOutputs_ImplementationErrorIsRaised(self):
+        batcher = Batcher(lambda inputs: [], max_wait_ms=0)
+        with self.assertRaises(ImplementationError):
+            batcher.call(1)
+
+    def test_GivenInvalidSettings_ImplementationErrorIsRaised(self):
+        for settings in ({'max_batch': 0}, {'max_batch': 1.5},
+                         {'max_wait_ms': -1}, {'max_wait_ms': 'soon'}):
+            with self.assertRaises(ImplementationError):
+                Batcher(list, **settings)
+
+
+class Failure(MicronClientError):
+    """The batch function failed."""
+
+
+def _recording_double(calls):
+    def double(inputs):
+        calls.append(list(inputs))
+        return [value * 2 for value in inputs]
+    return double
+
+
+def _call_concurrently(batcher, inputs):
+    results = [None] * len(inputs)
+
+    def call(index):
+        try:
+            results[index] = batcher.call(inputs[index])
+        except Exception as error:
+            results[index] = error
+
+    threads = [
+        threading.Thread(target=call, args=(index,))
+        for index in range(len(inputs))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
@@ -6,19 +6,25 @@ from flask_micron import Micron
 from flask_micron.errors import ImplementationError
 from flask_micron.plugins import json_input
 from flask_micron.plugins import normalize_input
+from flask_micron.plugins import validate_input
 from flask_micron.plugins import call_function
 from flask_micron.plugins import json_output
+from flask_micron.plugins import cache
+from flask_micron.plugins import compress
 
 
 class Tests(unittest.TestCase):
 
     def test_AutoloadedPlugins(self):
         autoloaded_plugins = Micron().plugins
-        self.assertEqual(4, len(autoloaded_plugins))
+        self.assertEqual(7, len(autoloaded_plugins))
         self.assertTrue(json_input.Plugin in autoloaded_plugins)
         self.assertTrue(normalize_input.Plugin in autoloaded_plugins)
+        self.assertTrue(validate_input.Plugin in autoloaded_plugins)
         self.assertTrue(call_function.Plugin in autoloaded_plugins)
         self.assertTrue(json_output.Plugin in autoloaded_plugins)
+        self.assertTrue(cache.Plugin in autoloaded_plugins)
+        self.assertTrue(compress.Plugin in autoloaded_plugins)
 
     def test_DecoratorCanOnlyBeUsedWhenFlaskAppIsLinkedToMicron(self):
         micron = Micron()
@@ -62,6 +68,33 @@ class Tests(unittest.TestCase):
             'option3': 'z'
         }, config)
 
+    def test_MethodsOnlyAcceptPostByDefault(self):
+        app = Flask('TestApp')
+        micron = Micron(app)
+
+        @micron.method()
+        def f():
+            return 'f'
+
+        self.assertEqual(405, app.test_client().get('/f').status_code)
+        self.assertEqual(200, app.test_client().post('/f').status_code)
+
+    def test_ReadonlyMethodsAcceptGet(self):
+        app = Flask('TestApp')
+        micron = Micron(app, readonly=True).batch()
+
+        @micron.method()
+        def f():
+            return 'f'
+
+        @micron.method(readonly=False, http_cache=10)
+        def g():
+            return 'g'
+
+        self.assertEqual(b'"f"', app.test_client().get('/f').data)
+        self.assertEqual(b'"g"', app.test_client().get('/g').data)
+        self.assertEqual(405, app.test_client().get('/batch').status_code)
+
 
 class ConfigSpy(object):
     def process_output(self, ctx):
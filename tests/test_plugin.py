@@ -20,3 +20,29 @@ class Tests(MicronTestCase):
         self.decorate(lambda: 'hi', rule='/hi', dommy='yo')
         response = self.request('/hi')
         self.assertEqual('I made it, mister', response.output)
+
+    def test_WithoutStartRequestHook_ConfigSnapshotIsShared(self):
+        spy = ConfigSpy()
+        self.micron.plugin(spy)
+        self.decorate(lambda: 'hi', rule='/hi')
+        self.request('/hi')
+        self.request('/hi')
+        self.assertIs(spy.configs[0], spy.configs[1])
+
+    def test_WithStartRequestHook_ConfigIsPrivateCopy(self):
+        spy = ConfigSpy()
+        self.micron.plugin(DummyPlugin()).plugin(spy)
+        self.decorate(lambda: 'hi', rule='/hi', dommy='yo')
+        self.request('/hi')
+        self.request('/hi')
+        self.assertIsNot(spy.configs[0], spy.configs[1])
+        self.assertEqual('mister', spy.configs[1]['dommy'])
+
+
+class ConfigSpy(plugin.Plugin):
+
+    def __init__(self):
+        self.configs = []
+
+    def end_request(self, ctx):
+        self.configs.append(ctx.config)
@@ -86,6 +86,48 @@ class Tests(unittest.TestCase):
         self.assertTrue(ctx.is_assigned('input'))
         self.assertEqual(None, ctx.input)
 
+    def test_PipelineContainsOnlyImplementedHooks(self):
+        dummy = Dummy()
+        container = plugin.Container(dummy)
+        pipeline = container.pipeline(
+            (('start_request', None), ('process_output', None)), {})
+        self.assertEqual([dummy.process_output], pipeline)
+
+    def test_PipelineCallsAllForHooksWithoutMonitorField(self):
+        container = plugin.Container(
+            CallAllTestPlugin('A'),
+            CallAllTestPlugin('B'),
+            CallAllTestPlugin('C'))
+        ctx = plugin.Context()
+        ctx.input = 'START'
+        for hook_function in container.pipeline(
+                (('normalize_input', None),), {}):
+            hook_function(ctx)
+        self.assertEqual('START|A|B|C', ctx.input)
+
+    def test_PipelineFollowsChainOfCommandPatternForMonitorField(self):
+        container = plugin.Container(
+            CallOneTestPlugin('A', True),
+            CallOneTestPlugin('B', True),
+            CallOneTestPlugin('C', False))
+        pipeline = container.pipeline((('read_input', 'input'),), {})
+        self.assertEqual(1, len(pipeline))
+        ctx = plugin.Context()
+        pipeline[0](ctx)
+        self.assertEqual('B', ctx.input)
+
+    def test_PipelineLeavesOutHooksThatAreNotCompiledByPlugin(self):
+        container = plugin.Container(Switchable())
+        hooks = (('process_output', None),)
+        self.assertEqual([], container.pipeline(hooks, {}))
+        self.assertEqual(1, len(container.pipeline(hooks, {'switch': True})))
+
+    def test_AddingPluginsUpdatesVersion(self):
+        container = plugin.Container()
+        version = container.version
+        container.add(Dummy())
+        self.assertNotEqual(version, container.version)
+
 
 class Dummy(plugin.Plugin):
 
@@ -124,3 +166,12 @@ class CallOneTestPlugin(plugin.Plugin):
     def read_input(self, ctx):
         if self.handle:
             ctx.input = self.data
+
+
+class Switchable(plugin.Plugin):
+
+    def compile_hook(self, hook, function, config):
+        return self.process_output if config.get('switch', False) else None
+
+    def process_output(self, ctx):
+        ctx.output = 'switched on'
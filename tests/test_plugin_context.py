@@ -8,6 +8,7 @@ class Tests(MicronTestCase):
     def setUp(self):
         super(Tests, self).setUp()
         self.ctx = plugin.Context()
+        plugin._free_contexts.contexts = []
 
     def test_NewContextHasNoConfig(self):
         self.assertIsNone(self.ctx.config)
@@ -67,3 +68,39 @@ class Tests(MicronTestCase):
         self.ctx.error = Exception("Broken?")
         self.assertEqual('Broken?', str(self.ctx.error))
         self.assertTrue(self.ctx.is_assigned('error'))
+
+    def test_ContextAcceptsExtraAttributes(self):
+        self.ctx.my_state = 'value'
+        self.assertEqual('value', self.ctx.my_state)
+        self.assertTrue(self.ctx.is_assigned('my_state'))
+
+    def test_UnassignedExtraAttribute_RaisesAttributeError(self):
+        with self.assertRaises(AttributeError):
+            self.ctx.unknown
+        self.assertIsNone(getattr(self.ctx, 'unknown', None))
+        self.assertFalse(self.ctx.is_assigned('unknown'))
+
+    def test_ResetUnassignsAllProperties(self):
+        self.ctx.input = 'in'
+        self.ctx.output = None
+        self.ctx.reset()
+        self.assertIsNone(self.ctx.input)
+        self.assertFalse(self.ctx.is_assigned('input'))
+        self.assertFalse(self.ctx.is_assigned('output'))
+
+    def test_ResetRemovesExtraAttributes(self):
+        self.ctx.my_state = 'state'
+        self.ctx.reset()
+        self.assertFalse(self.ctx.is_assigned('my_state'))
+
+    def test_ReleasedContextIsReusedByAcquire(self):
+        self.ctx.input = 'in'
+        self.ctx.release()
+        ctx = plugin.Context.acquire()
+        self.assertIs(self.ctx, ctx)
+        self.assertFalse(ctx.is_assigned('input'))
+
+    def test_AcquireWithEmptyFreeList_CreatesNewContext(self):
+        ctx1 = plugin.Context.acquire()
+        ctx2 = plugin.Context.acquire()
+        self.assertIsNot(ctx1, ctx2)